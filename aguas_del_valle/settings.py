@@ -31,7 +31,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'facturacion.middleware.MetricasMiddleware',
+    'facturacion.middleware.RepeticionesMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'facturacion.middleware.RateLimitMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -67,6 +70,9 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Base de pruebas en archivo: en memoria SQLite bloquea por tabla entre
+        # conexiones y las pruebas con varios hilos fallarían
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
@@ -102,6 +108,53 @@ STATICFILES_DIRS = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Caché (contadores del panel); en producción se comparte entre workers
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Límite de solicitudes por IP: (prefijo de la ruta, solicitudes, segundos).
+# Gana la primera regla que coincide; cada regla cuenta por separado.
+LIMITE_SOLICITUDES = [
+    ('/clientes/importar/', 10, 60),
+    ('/mediciones/importar/', 10, 60),
+    ('/boletas/zip/', 10, 60),
+    ('/reportes/tarifas/', 30, 60),
+    ('', 100, 60),
+]
+# 'memoria': contadores por proceso; 'cache': compartidos entre workers vía CACHES
+LIMITE_SOLICITUDES_ALMACEN = 'memoria'
+# Proxies de confianza delante de la aplicación: la IP del cliente se toma de
+# X-Forwarded-For solo si hay alguno (ver facturacion.middleware.ip_cliente)
+PROXIES_CONFIABLES = int(os.environ.get('PROXIES_CONFIABLES', 0))
+
+# Métricas por vista en /metrics: visibles para el personal o con
+# "Authorization: Bearer <METRICAS_TOKEN>". Con METRICAS_DIRECTORIO los
+# workers comparten sus acumulados a través de ese directorio.
+METRICAS_TOKEN = os.environ.get('METRICAS_TOKEN')
+METRICAS_DIRECTORIO = None
+METRICAS_INTERVALO = 5  # segundos entre escrituras de cada worker
+
+# Registro de consultas lentas (CONSULTAS_LENTAS=1): totales por huella de SQL
+# y vista en CONSULTAS_LENTAS_DIRECTORIO (ver `manage.py consultas_lentas`) y
+# las sentencias sobre el umbral, con su plan, en logs/consultas_lentas.log
+CONSULTAS_LENTAS = os.environ.get('CONSULTAS_LENTAS') == '1'
+CONSULTAS_LENTAS_UMBRAL_MS = 100
+# Escribir también los parámetros de las sentencias lentas (datos de clientes)
+CONSULTAS_LENTAS_PARAMETROS = False
+CONSULTAS_LENTAS_DIRECTORIO = BASE_DIR / 'logs' / 'consultas'
+CONSULTAS_LENTAS_INTERVALO = 10  # segundos entre escrituras de cada proceso
+
+# En desarrollo, avisar en la consola cuando una solicitud ejecuta la misma
+# consulta CONSULTAS_REPETIDAS_UMBRAL veces o más (N+1)
+CONSULTAS_REPETIDAS = DEBUG
+CONSULTAS_REPETIDAS_UMBRAL = 5
+
+# Filas por página en los listados (se puede cambiar con ?por_pagina=)
+PAGINACION_TAMANO = 50
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -135,8 +188,23 @@ LOGGING = {
         'console': {
             'class': 'logging.StreamHandler',
         },
+        'consultas_lentas': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': BASE_DIR / 'logs' / 'consultas_lentas.log',
+            'maxBytes': 5 * 1024 * 1024,
+            'backupCount': 3,
+            'delay': True,
+            'encoding': 'utf-8',
+        },
     },
     'root': {
         'handlers': ['console'],
     },
+    'loggers': {
+        'facturacion.consultas_lentas': {
+            'handlers': ['consultas_lentas'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
 }
@@ -28,6 +28,35 @@ else:
         }
     }
 
+# Caché compartido entre workers: Redis si está configurado, si no archivos locales
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ.get('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': BASE_DIR / 'cache',
+        }
+    }
+
+# Con Redis el límite de solicitudes es uno solo para todos los workers;
+# el caché en archivos no tiene incr() atómico, así que ahí se cuenta por proceso
+LIMITE_SOLICITUDES_ALMACEN = 'cache' if os.environ.get('REDIS_URL') else 'memoria'
+
+# Render y Heroku ponen un balanceador delante de gunicorn
+PROXIES_CONFIABLES = int(os.environ.get('PROXIES_CONFIABLES', 1))
+
+# El detector de consultas repetidas es solo para desarrollo
+CONSULTAS_REPETIDAS = False
+
+# Métricas de todos los workers de gunicorn (start.sh vacía el directorio al iniciar)
+METRICAS_DIRECTORIO = os.environ.get('METRICAS_DIRECTORIO', BASE_DIR / 'metricas')
+
 # Configuración de archivos estáticos
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
@@ -48,8 +77,23 @@ LOGGING = {
         'console': {
             'class': 'logging.StreamHandler',
         },
+        'consultas_lentas': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': BASE_DIR / 'logs' / 'consultas_lentas.log',
+            'maxBytes': 5 * 1024 * 1024,
+            'backupCount': 3,
+            'delay': True,
+            'encoding': 'utf-8',
+        },
     },
     'root': {
         'handlers': ['console'],
     },
+    'loggers': {
+        'facturacion.consultas_lentas': {
+            'handlers': ['consultas_lentas'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
 }
\ No newline at end of file
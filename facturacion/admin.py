@@ -1,5 +1,9 @@
-from django.contrib import admin
-from .models import Cliente, Medicion, Boleta, Aviso
+from django.contrib import admin, messages
+from django.utils import timezone
+from .models import (
+    Cliente, Medicion, Boleta, Aviso, AvisoMasivo, CorreoSaliente, Tarifa, TramoTarifa, ResumenMensual,
+)
+from .facturacion_masiva import facturar_periodo
 
 
 @admin.register(Cliente)
@@ -8,6 +12,17 @@ class ClienteAdmin(admin.ModelAdmin):
     list_filter = ['activo', 'fecha_registro']
     search_fields = ['nombre', 'email', 'direccion']
     list_editable = ['activo']
+    actions = ['facturar_periodo_actual']
+
+    @admin.action(description='Facturar período actual para los clientes seleccionados')
+    def facturar_periodo_actual(self, request, queryset):
+        hoy = timezone.localdate()
+        resultado = facturar_periodo(hoy.year, hoy.month, clientes=queryset)
+        self.message_user(
+            request,
+            f"{resultado['creadas']} boletas emitidas ({resultado['filas_por_segundo']:.0f} filas/s).",
+            messages.SUCCESS,
+        )
 
 
 @admin.register(Medicion)
@@ -15,6 +30,7 @@ class MedicionAdmin(admin.ModelAdmin):
     list_display = ['cliente', 'fecha', 'consumo_m3', 'monto_calculado', 'fecha_registro']
     list_filter = ['fecha', 'cliente']
     search_fields = ['cliente__nombre', 'observaciones']
+    autocomplete_fields = ['cliente']
     date_hierarchy = 'fecha'
 
 
@@ -23,6 +39,9 @@ class BoletaAdmin(admin.ModelAdmin):
     list_display = ['numero_boleta', 'cliente', 'fecha_emision', 'monto_total', 'estado']
     list_filter = ['estado', 'fecha_emision']
     search_fields = ['numero_boleta', 'cliente__nombre']
+    autocomplete_fields = ['cliente']
+    # Un selector con todas las mediciones consultaría el cliente de cada una
+    raw_id_fields = ['medicion']
     date_hierarchy = 'fecha_emision'
 
 
@@ -31,4 +50,42 @@ class AvisoAdmin(admin.ModelAdmin):
     list_display = ['titulo', 'cliente', 'tipo_aviso', 'fecha', 'enviado']
     list_filter = ['tipo_aviso', 'enviado', 'fecha']
     search_fields = ['titulo', 'mensaje', 'cliente__nombre']
+    autocomplete_fields = ['cliente']
+    date_hierarchy = 'fecha'
+
+
+@admin.register(AvisoMasivo)
+class AvisoMasivoAdmin(admin.ModelAdmin):
+    list_display = ['titulo', 'tipo_aviso', 'fecha']
+    list_filter = ['tipo_aviso', 'fecha']
+    search_fields = ['titulo', 'mensaje']
     date_hierarchy = 'fecha'
+
+
+@admin.register(CorreoSaliente)
+class CorreoSalienteAdmin(admin.ModelAdmin):
+    list_display = ['asunto', 'destinatario', 'estado', 'intentos', 'fecha_creacion', 'fecha_envio']
+    list_filter = ['estado', 'fecha_creacion']
+    search_fields = ['asunto', 'destinatario']
+    date_hierarchy = 'fecha_creacion'
+    readonly_fields = ['ultimo_error']
+    raw_id_fields = ['boleta', 'aviso', 'destinatario_aviso']
+
+
+class TramoTarifaInline(admin.TabularInline):
+    model = TramoTarifa
+    extra = 1
+
+
+@admin.register(Tarifa)
+class TarifaAdmin(admin.ModelAdmin):
+    list_display = ['nombre', 'vigente_desde', 'cargo_fijo']
+    date_hierarchy = 'vigente_desde'
+    inlines = [TramoTarifaInline]
+
+
+@admin.register(ResumenMensual)
+class ResumenMensualAdmin(admin.ModelAdmin):
+    list_display = ['periodo', 'boletas_pendientes', 'boletas_pagadas', 'boletas_vencidas',
+                    'monto_facturado', 'monto_recaudado', 'mediciones', 'consumo_m3']
+    readonly_fields = [campo.name for campo in ResumenMensual._meta.fields]
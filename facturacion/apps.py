@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class FacturacionConfig(AppConfig):
+    name = 'facturacion'
+    verbose_name = 'Facturación'
+
+    def ready(self):
+        from . import signals  # noqa: F401
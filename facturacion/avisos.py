@@ -0,0 +1,70 @@
+"""
+Avisos masivos: un solo contenido compartido y una fila liviana por cliente.
+"""
+
+import heapq
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Aviso, AvisoMasivo, CorreoSaliente, DestinatarioAviso
+
+
+def registrar_aviso_masivo(tipo_aviso, titulo, mensaje, clientes):
+    """
+    Crea el aviso y registra como destinatarios a todos los `clientes`.
+
+    Los destinatarios se insertan con un único INSERT ... SELECT a partir del
+    queryset, sin traer los clientes a Python. Devuelve el aviso y la
+    cantidad de destinatarios.
+    """
+    q = connection.ops.quote_name
+    with transaction.atomic():
+        aviso = AvisoMasivo.objects.create(tipo_aviso=tipo_aviso, titulo=titulo, mensaje=mensaje)
+        sql, params = clientes.order_by().values('id').query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {q(DestinatarioAviso._meta.db_table)} "
+                f"({q('aviso_id')}, {q('cliente_id')}, {q('enviado')}) "
+                f"SELECT %s, U.{q('id')}, %s FROM ({sql}) U",
+                [aviso.id, False, *params],
+            )
+            cantidad = cursor.rowcount
+    return aviso, cantidad
+
+
+def encolar_aviso_masivo(aviso):
+    """
+    Deja en la bandeja de salida un correo por cada destinatario sin enviar.
+
+    Los correos se insertan con un único INSERT ... SELECT y solo guardan la
+    dirección y el destinatario: el texto se arma con el contenido del aviso
+    cuando el worker los envía (ver correo._construir). Devuelve la cantidad
+    de correos encolados.
+    """
+    q = connection.ops.quote_name
+    pendientes = DestinatarioAviso.objects.filter(
+        aviso=aviso,
+        enviado=False,
+        correosaliente__isnull=True,
+    ).order_by().values('id', 'cliente__email')
+    sql, params = pendientes.query.sql_with_params()
+    ahora = connection.ops.adapt_datetimefield_value(timezone.now())
+    columnas = ['destinatario', 'asunto', 'mensaje', 'destinatario_aviso_id', 'estado', 'intentos',
+                'proximo_intento', 'fecha_creacion']
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {q(CorreoSaliente._meta.db_table)} ({', '.join(q(c) for c in columnas)}) "
+            f"SELECT U.{q('email')}, %s, %s, U.{q('id')}, %s, %s, %s, %s FROM ({sql}) U",
+            [f'{aviso.titulo} - Prueba', '', 'pendiente', 0, ahora, ahora, *params],
+        )
+        return cursor.rowcount
+
+
+def avisos_de_cliente(cliente, limite=5):
+    """Avisos individuales y masivos del cliente, los más recientes primero"""
+    individuales = Aviso.objects.filter(cliente=cliente).order_by('-fecha')[:limite]
+    masivos = DestinatarioAviso.objects.filter(
+        cliente=cliente
+    ).select_related('aviso').order_by('-aviso__fecha')[:limite]
+    return list(heapq.merge(individuales, masivos, key=lambda aviso: aviso.fecha, reverse=True))[:limite]
@@ -0,0 +1,249 @@
+"""
+Búsqueda de texto completo sobre clientes, boletas y avisos.
+
+Cada tipo tiene su tabla de índice (facturacion_busqueda_<tipo>), con el
+mismo id que la fila indexada, mantenida por triggers de la base de datos;
+así también refleja las escrituras masivas (bulk_create, update,
+INSERT ... SELECT) que no pasan por las señales. En SQLite se usan tablas
+virtuales FTS5 y en Postgres una columna tsvector con índice GIN. Ambos
+ignoran tildes, ordenan por relevancia y buscan por prefijo.
+
+Calcular la relevancia cuesta por documento, así que se calcula sobre las
+CANDIDATOS coincidencias más recientes (el orden del índice, por id). Si hay
+menos coincidencias se ordenan todas; con términos muy frecuentes, un
+documento antiguo puede quedar fuera aunque sea más relevante.
+
+Las columnas de SUFIJOS se indexan además con algunos de sus sufijos, para
+que la búsqueda por prefijo encuentre la boleta B2025090042 por "202509",
+"0042" o "42". Indexar todos los sufijos permitiría buscar cualquier parte del
+número, pero con 1M de boletas el índice pasa de 14 a 122 MiB; con estos tres
+ocupa 42 MiB y cada INSERT suma unos 2 µs.
+
+Las migraciones que crean o cambian el índice llevan una copia congelada de
+este SQL; si cambia el texto indexado hace falta una migración nueva. En
+SQLite, una migración que reconstruye una tabla indexada (AlterField, por
+ejemplo) borra sus triggers y tiene que volver a crearlos.
+"""
+
+import re
+import unicodedata
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import Aviso, AvisoMasivo, Boleta, Cliente
+
+PREFIJO = 'facturacion_busqueda'
+LIMITE = 10
+CANDIDATOS = 1000
+
+# tipo: (tabla indexada, columnas indexadas)
+TIPOS = {
+    'cliente': ('facturacion_cliente', ['nombre', 'email', 'direccion', 'telefono']),
+    'boleta': ('facturacion_boleta', ['numero_boleta']),
+    'aviso': ('facturacion_aviso', ['titulo', 'mensaje']),
+    'aviso_masivo': ('facturacion_avisomasivo', ['titulo', 'mensaje']),
+}
+
+# columna: expresiones SQL adicionales que se indexan como palabras ({} es la columna)
+SUFIJOS = {
+    'numero_boleta': [
+        'substr({}, 2)',  # sin la letra: 2025090042
+        'substr({}, 8)',  # correlativo: 0042
+        "ltrim(substr({}, 8), '0')",  # correlativo sin ceros: 42
+    ],
+}
+
+
+def tabla_indice(tipo):
+    return f'{PREFIJO}_{tipo}'
+
+
+def normalizar(texto):
+    """Texto en minúsculas y sin tildes, como lo guarda el índice"""
+    descompuesto = unicodedata.normalize('NFKD', texto.lower())
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c))
+
+
+def terminos(texto):
+    """Palabras de la consulta; cualquier otro carácter se descarta"""
+    return re.findall(r'\w+', normalizar(texto))
+
+
+def soportada(conexion=connection):
+    return conexion.vendor in ('sqlite', 'postgresql')
+
+
+def _expresiones(prefijo, columnas):
+    """Expresiones SQL con el texto a indexar: cada columna y sus SUFIJOS"""
+    expresiones = []
+    for columna in columnas:
+        expresiones.append(f'{prefijo}.{columna}')
+        expresiones.extend(sufijo.format(f'{prefijo}.{columna}') for sufijo in SUFIJOS.get(columna, []))
+    return expresiones
+
+
+def _texto_sqlite(prefijo, columnas):
+    return " || ' ' || ".join(f"coalesce({expresion}, '')" for expresion in _expresiones(prefijo, columnas))
+
+
+def _documento_postgres(prefijo, columnas):
+    texto = ', '.join(_expresiones(prefijo, columnas))
+    return f"to_tsvector('simple', unaccent(concat_ws(' ', {texto})))"
+
+
+def _sql_sqlite(tipo, tabla, columnas):
+    indice = tabla_indice(tipo)
+    insertar = f"INSERT INTO {indice} (rowid, texto) VALUES (NEW.id, {_texto_sqlite('NEW', columnas)});"
+    borrar = f"DELETE FROM {indice} WHERE rowid = OLD.id;"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {indice} USING fts5("
+        f"texto, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')",
+        # Se reemplazan para que reinstalar aplique cambios en el texto indexado
+        f"DROP TRIGGER IF EXISTS {indice}_ai",
+        f"DROP TRIGGER IF EXISTS {indice}_au",
+        f"CREATE TRIGGER IF NOT EXISTS {indice}_ai AFTER INSERT ON {tabla} BEGIN {insertar} END",
+        f"CREATE TRIGGER IF NOT EXISTS {indice}_au AFTER UPDATE OF {', '.join(columnas)} "
+        f"ON {tabla} BEGIN {borrar} {insertar} END",
+        f"CREATE TRIGGER IF NOT EXISTS {indice}_ad AFTER DELETE ON {tabla} BEGIN {borrar} END",
+    ]
+
+
+def _sql_postgres(tipo, tabla, columnas):
+    indice = tabla_indice(tipo)
+    return [
+        f"CREATE TABLE IF NOT EXISTS {indice} (id bigint PRIMARY KEY, documento tsvector NOT NULL)",
+        f"CREATE INDEX IF NOT EXISTS {indice}_gin ON {indice} USING gin (documento)",
+        f"""
+        CREATE OR REPLACE FUNCTION {indice}() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                DELETE FROM {indice} WHERE id = OLD.id;
+                RETURN OLD;
+            END IF;
+            INSERT INTO {indice} (id, documento) VALUES (NEW.id, {_documento_postgres('NEW', columnas)})
+            ON CONFLICT (id) DO UPDATE SET documento = EXCLUDED.documento;
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+        f"DROP TRIGGER IF EXISTS {indice} ON {tabla}",
+        f"CREATE TRIGGER {indice} AFTER INSERT OR UPDATE OF {', '.join(columnas)} OR DELETE "
+        f"ON {tabla} FOR EACH ROW EXECUTE FUNCTION {indice}()",
+    ]
+
+
+def instalar(conexion=connection):
+    """Crea las tablas del índice y los triggers que las mantienen"""
+    if not soportada(conexion):
+        return
+    generar = _sql_sqlite if conexion.vendor == 'sqlite' else _sql_postgres
+    with conexion.cursor() as cursor:
+        if conexion.vendor == 'postgresql':
+            cursor.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+        for tipo, (tabla, columnas) in TIPOS.items():
+            for sentencia in generar(tipo, tabla, columnas):
+                cursor.execute(sentencia)
+
+
+def desinstalar(conexion=connection):
+    """Elimina triggers, funciones y tablas del índice"""
+    if not soportada(conexion):
+        return
+    with conexion.cursor() as cursor:
+        for tipo, (tabla, columnas) in TIPOS.items():
+            indice = tabla_indice(tipo)
+            if conexion.vendor == 'sqlite':
+                for sufijo in ('ai', 'au', 'ad'):
+                    cursor.execute(f"DROP TRIGGER IF EXISTS {indice}_{sufijo}")
+            else:
+                cursor.execute(f"DROP TRIGGER IF EXISTS {indice} ON {tabla}")
+                cursor.execute(f"DROP FUNCTION IF EXISTS {indice}()")
+            cursor.execute(f"DROP TABLE IF EXISTS {indice}")
+
+
+def reconstruir(conexion=connection):
+    """Vuelve a indexar todas las filas existentes; devuelve la cantidad de documentos"""
+    if not soportada(conexion):
+        return 0
+    total = 0
+    with conexion.cursor() as cursor:
+        for tipo, (tabla, columnas) in TIPOS.items():
+            indice = tabla_indice(tipo)
+            cursor.execute(f"DELETE FROM {indice}")
+            if conexion.vendor == 'sqlite':
+                cursor.execute(
+                    f"INSERT INTO {indice} (rowid, texto) SELECT T.id, {_texto_sqlite('T', columnas)} FROM {tabla} T"
+                )
+                total += cursor.rowcount
+                cursor.execute(f"INSERT INTO {indice} ({indice}) VALUES ('optimize')")
+            else:
+                cursor.execute(
+                    f"INSERT INTO {indice} (id, documento) "
+                    f"SELECT T.id, {_documento_postgres('T', columnas)} FROM {tabla} T"
+                )
+                total += cursor.rowcount
+    return total
+
+
+def _consulta(palabras, vendor):
+    if vendor == 'sqlite':
+        # Cada palabra como prefijo entre comillas; FTS5 las combina con AND
+        return ' '.join(f'"{palabra}"*' for palabra in palabras)
+    return ' & '.join(f'{palabra}:*' for palabra in palabras)
+
+
+def buscar_ids(texto, tipo, limite=LIMITE):
+    """Ids de `tipo` que contienen todas las palabras de `texto`, de más a menos relevante"""
+    palabras = terminos(texto)
+    if not palabras:
+        return []
+    indice = tabla_indice(tipo)
+    consulta = _consulta(palabras, connection.vendor)
+    with connection.cursor() as cursor:
+        # A igual relevancia, la más reciente primero
+        if connection.vendor == 'sqlite':
+            cursor.execute(
+                f"SELECT id FROM ("
+                f"SELECT rowid AS id, rank FROM {indice} WHERE {indice} MATCH %s ORDER BY rowid DESC LIMIT %s"
+                f") ORDER BY rank, id DESC LIMIT %s",
+                [consulta, CANDIDATOS, limite],
+            )
+        else:
+            cursor.execute(
+                f"SELECT id FROM ("
+                f"SELECT id, documento FROM {indice} WHERE documento @@ to_tsquery('simple', %s) "
+                f"ORDER BY id DESC LIMIT %s"
+                f") candidatos ORDER BY ts_rank(documento, to_tsquery('simple', %s)) DESC, id DESC LIMIT %s",
+                [consulta, CANDIDATOS, consulta, limite],
+            )
+        return [id for (id,) in cursor.fetchall()]
+
+
+def en_orden(queryset, ids):
+    """Objetos del queryset con esos ids, en el mismo orden"""
+    objetos = queryset.in_bulk(ids)
+    return [objetos[i] for i in ids if i in objetos]
+
+
+def buscar(texto, limite=LIMITE):
+    """Resultados de la búsqueda global agrupados como los muestra la vista"""
+    return {
+        'clientes': en_orden(Cliente.objects.all(), buscar_ids(texto, 'cliente', limite)),
+        'boletas': en_orden(Boleta.objects.select_related('cliente'), buscar_ids(texto, 'boleta', limite)),
+        'avisos': en_orden(Aviso.objects.select_related('cliente'), buscar_ids(texto, 'aviso', limite)),
+        'avisos_masivos': en_orden(AvisoMasivo.objects.all(), buscar_ids(texto, 'aviso_masivo', limite)),
+    }
+
+
+def clientes_por_prefijo(texto, limite=LIMITE):
+    """Clientes cuyo nombre, email o teléfono empieza con `texto`, para autocompletar"""
+    if soportada():
+        ids = buscar_ids(texto, 'cliente', limite)
+        return en_orden(Cliente.objects.only('id', 'nombre', 'email'), ids)
+    texto = texto.strip()
+    if not texto:
+        return []
+    return list(Cliente.objects.filter(
+        Q(nombre__istartswith=texto) | Q(email__istartswith=texto) | Q(telefono__startswith=texto)
+    ).only('id', 'nombre', 'email').order_by('nombre')[:limite])
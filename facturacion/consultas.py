@@ -0,0 +1,251 @@
+"""
+Registro de consultas lentas y totales por huella de SQL (opcional).
+
+Con CONSULTAS_LENTAS activo, cada conexión a la base de datos recibe un
+execute_wrapper que mide cada sentencia. La sentencia se reduce a su huella
+(sin literales, con las listas de IN y de VALUES colapsadas) para agrupar las
+que solo cambian en sus parámetros, y por huella y vista se acumulan la
+cantidad, el tiempo total y un histograma logarítmico del que sale el p95.
+
+Las sentencias que superan CONSULTAS_LENTAS_UMBRAL_MS se escriben en el
+logger 'facturacion.consultas_lentas' (logs/consultas_lentas.log) junto con
+su plan de ejecución (EXPLAIN en PostgreSQL, EXPLAIN QUERY PLAN en SQLite).
+
+Como en metricas, cada hilo acumula por separado y cada proceso escribe sus
+totales en CONSULTAS_LENTAS_DIRECTORIO, donde los lee el comando
+consultas_lentas.
+"""
+
+import atexit
+import functools
+import logging
+import math
+import re
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+
+from .metricas import escribir_json, leer_json, nombre_archivo
+
+logger = logging.getLogger('facturacion.consultas_lentas')
+
+SIN_VISTA = '(sin vista)'
+TODAS = '(todas)'
+# Histograma de duraciones: buckets que crecen un 10% desde 10 µs
+DURACION_MINIMA = 1e-5
+FACTOR_BUCKET = 1.1
+INTERVALO = 10  # segundos entre escrituras de cada proceso
+LARGO_PARAMETROS = 500  # caracteres de los parámetros que se escriben en el log
+
+_TEXTO = re.compile(r"'(?:[^']|'')*'")
+_LITERALES = [
+    (_TEXTO, '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(...)'),
+    (re.compile(r'\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+'), '(...)'),
+    (re.compile(r'\s+'), ' '),
+]
+
+_LECTURA = re.compile(r'\s*(SELECT|WITH)\b', re.IGNORECASE)
+
+_hilo = threading.local()
+_acumulados = []  # un diccionario por hilo
+_guardado = 0.0
+
+
+def activo():
+    return getattr(settings, 'CONSULTAS_LENTAS', False)
+
+
+@functools.lru_cache(maxsize=2048)
+def huella(sql):
+    """SQL sin literales, para agrupar las sentencias que solo cambian en sus valores"""
+    for patron, reemplazo in _LITERALES:
+        sql = patron.sub(reemplazo, sql)
+    return sql.strip()
+
+
+def _bucket(segundos):
+    return max(0, int(math.log(max(segundos, DURACION_MINIMA) / DURACION_MINIMA) / math.log(FACTOR_BUCKET)))
+
+
+def percentil(buckets, fraccion):
+    """Límite superior del bucket donde se alcanza la fracción pedida, en segundos"""
+    buckets = {int(indice): cantidad for indice, cantidad in buckets.items()}
+    objetivo = sum(buckets.values()) * fraccion
+    acumulado = 0
+    for indice in sorted(buckets):
+        acumulado += buckets[indice]
+        if acumulado >= objetivo:
+            return DURACION_MINIMA * FACTOR_BUCKET ** (indice + 1)
+    return 0.0
+
+
+def solicitud_actual(request):
+    """Asocia las consultas siguientes del hilo a la vista de `request` (o a ninguna)"""
+    _hilo.request = request
+
+
+def _vista():
+    request = getattr(_hilo, 'request', None)
+    if request is not None and request.resolver_match:
+        return request.resolver_match.view_name
+    return SIN_VISTA
+
+
+def _propios():
+    try:
+        return _hilo.huellas
+    except AttributeError:
+        _hilo.huellas = {}
+        _acumulados.append(_hilo.huellas)
+        return _hilo.huellas
+
+
+def registrar(sql, segundos, vista=None):
+    """Suma una ejecución a los acumulados de su huella y vista"""
+    huellas = _propios()
+    clave = (vista or _vista(), huella(sql))
+    datos = huellas.get(clave)
+    if datos is None:
+        datos = huellas[clave] = [0, 0.0, {}]
+    datos[0] += 1
+    datos[1] += segundos
+    indice = _bucket(segundos)
+    datos[2][indice] = datos[2].get(indice, 0) + 1
+    if time.monotonic() - _guardado > getattr(settings, 'CONSULTAS_LENTAS_INTERVALO', INTERVALO):
+        guardar()
+
+
+def del_proceso():
+    """[vista, huella, cantidad, segundos, buckets] de todos los hilos de este proceso"""
+    total = {}
+    for huellas in list(_acumulados):
+        for clave, (cantidad, segundos, buckets) in dict(huellas).items():
+            _sumar(total, clave, cantidad, segundos, buckets)
+    return [[*clave, *datos] for clave, datos in total.items()]
+
+
+def _sumar(total, clave, cantidad, segundos, buckets):
+    datos = total.setdefault(clave, [0, 0.0, {}])
+    datos[0] += cantidad
+    datos[1] += segundos
+    for indice, veces in buckets.items():
+        datos[2][str(indice)] = datos[2].get(str(indice), 0) + veces
+
+
+def _directorio():
+    directorio = getattr(settings, 'CONSULTAS_LENTAS_DIRECTORIO', None)
+    return Path(directorio) if directorio else None
+
+
+def guardar():
+    """Escribe los acumulados del proceso en CONSULTAS_LENTAS_DIRECTORIO"""
+    global _guardado
+    _guardado = time.monotonic()
+    directorio = _directorio()
+    if directorio is not None and _acumulados:
+        escribir_json(directorio / nombre_archivo(), del_proceso())
+
+
+def combinadas():
+    """{(vista, huella): [cantidad, segundos, buckets]} de todos los procesos"""
+    total = {}
+    filas = [fila for filas in leer_json(_directorio(), omitir=nombre_archivo()) for fila in filas]
+    for vista, sql, cantidad, segundos, buckets in filas + del_proceso():
+        _sumar(total, (vista, sql), cantidad, segundos, buckets)
+    return total
+
+
+def por_huella(totales):
+    """Los totales de combinadas() sumados entre todas las vistas"""
+    total = {}
+    for (vista, sql), (cantidad, segundos, buckets) in totales.items():
+        _sumar(total, (TODAS, sql), cantidad, segundos, buckets)
+    return total
+
+
+def limpiar():
+    """Borra los acumulados guardados y los de este proceso"""
+    for huellas in list(_acumulados):
+        huellas.clear()
+    directorio = _directorio()
+    if directorio is not None and directorio.is_dir():
+        for ruta in directorio.glob('*.json'):
+            ruta.unlink(missing_ok=True)
+
+
+def _plan(conexion, sql, params):
+    """Líneas del plan de ejecución, o None si el motor o la sentencia no lo permiten"""
+    if not _LECTURA.match(sql):
+        return None
+    prefijos = {'sqlite': 'EXPLAIN QUERY PLAN ', 'postgresql': 'EXPLAIN '}
+    if conexion.vendor not in prefijos:
+        return None
+    try:
+        # Un punto de guardado para que un error no invalide la transacción en curso
+        with transaction.atomic(using=conexion.alias), conexion.cursor() as cursor:
+            cursor.execute(prefijos[conexion.vendor] + sql, params)
+            filas = cursor.fetchall()
+    except DatabaseError as e:
+        return [f'(no se pudo obtener el plan: {e})']
+    # SQLite entrega (id, padre, _, detalle); PostgreSQL una línea de texto por fila
+    return [fila[-1] for fila in filas]
+
+
+def _escribir_lenta(conexion, sql, params, segundos, vista):
+    _hilo.explicando = True
+    try:
+        plan = _plan(conexion, sql, params)
+    finally:
+        _hilo.explicando = False
+    lineas = [
+        f'{segundos * 1000:.1f} ms en {vista} ({conexion.alias})',
+        f'  SQL: {sql}',
+    ]
+    # Los parámetros traen datos de los clientes (emails, nombres, direcciones):
+    # solo se escriben si se pide explícitamente, y si no se quitan también los
+    # literales que PostgreSQL copia en el plan
+    if getattr(settings, 'CONSULTAS_LENTAS_PARAMETROS', False):
+        parametros = repr(params)
+        if len(parametros) > LARGO_PARAMETROS:
+            parametros = parametros[:LARGO_PARAMETROS] + '...'
+        lineas.append(f'  Parámetros: {parametros}')
+    elif plan:
+        plan = [_TEXTO.sub('?', linea) for linea in plan]
+    lineas.append(f'  Huella: {huella(sql)}')
+    if plan:
+        lineas += ['  Plan:', *(f'    {linea}' for linea in plan)]
+    logger.warning('\n'.join(lineas))
+
+
+def medir(execute, sql, params, many, context):
+    """execute_wrapper que registra la huella de cada sentencia y escribe las lentas"""
+    if getattr(_hilo, 'explicando', False):
+        return execute(sql, params, many, context)
+    vista = _vista()
+    inicio = time.perf_counter()
+    try:
+        resultado = execute(sql, params, many, context)
+    except Exception:
+        registrar(sql, time.perf_counter() - inicio, vista)
+        raise
+    segundos = time.perf_counter() - inicio
+    registrar(sql, segundos, vista)
+    if segundos * 1000 >= getattr(settings, 'CONSULTAS_LENTAS_UMBRAL_MS', 100) and not many:
+        _escribir_lenta(context['connection'], sql, params, segundos, vista)
+    return resultado
+
+
+def instalar(conexion):
+    """Agrega la medición a una conexión recién abierta"""
+    if medir not in conexion.execute_wrappers:
+        conexion.execute_wrappers.append(medir)
+
+
+# Los comandos cortos también dejan sus totales al terminar
+atexit.register(lambda: activo() and guardar())
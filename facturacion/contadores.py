@@ -0,0 +1,105 @@
+"""
+Contadores del panel principal guardados en el caché de Django.
+
+Cada grupo de cifras tiene su propia clave y se invalida solo cuando cambia
+el modelo del que depende (señales post_save/post_delete, o una llamada
+explícita después de bulk_create/update), al confirmar la transacción.
+
+Invalidar no borra las cifras: avanza la generación del grupo, que forma
+parte de la clave con que se guardan. Una solicitud que calculó las cifras
+antes del cambio las guarda bajo la generación anterior, que ya nadie lee,
+en vez de dejar un valor viejo por DURACION segundos. Ante un fallo, todos
+los conteos se obtienen con una sola consulta.
+"""
+
+import time
+
+from django.core.cache import cache
+from django.db import connection, transaction
+
+from .models import Aviso, Boleta, Cliente, Medicion
+
+PREFIJO = 'contadores'
+DURACION = 60 * 60  # segundos; las señales lo invalidan antes si hay cambios
+ULTIMAS_MEDICIONES = 5
+
+GRUPOS = ['clientes', 'boletas', 'avisos', 'mediciones']
+
+# Grupos que dependen de cada modelo
+DEPENDENCIAS = {
+    Cliente: ['clientes', 'mediciones'],  # las últimas mediciones muestran el nombre
+    Boleta: ['boletas'],
+    Aviso: ['avisos'],
+    Medicion: ['mediciones'],
+}
+
+
+def _conteos():
+    """Clientes activos, boletas por estado y avisos pendientes en una consulta"""
+    q = connection.ops.quote_name
+    cliente, boleta, aviso = (q(modelo._meta.db_table) for modelo in (Cliente, Boleta, Aviso))
+    estados = [estado for estado, _ in Boleta.ESTADO_CHOICES]
+    columnas = [
+        f"(SELECT COUNT(*) FROM {cliente} WHERE {q('activo')} = %s)",
+        f"(SELECT COUNT(*) FROM {aviso} WHERE {q('enviado')} = %s)",
+        *(f"(SELECT COUNT(*) FROM {boleta} WHERE {q('estado')} = %s)" for _ in estados),
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT {', '.join(columnas)}", [True, False, *estados])
+        clientes_activos, avisos_pendientes, *por_estado = cursor.fetchone()
+    return {
+        'clientes': {'activos': clientes_activos},
+        'avisos': {'pendientes': avisos_pendientes},
+        'boletas': dict(zip(estados, por_estado)),
+    }
+
+
+def _clave_generacion(grupo):
+    return f'{PREFIJO}:generacion:{grupo}'
+
+
+def _claves(grupos=GRUPOS):
+    """Clave de la generación vigente de cada grupo: {grupo: clave}"""
+    claves = {grupo: _clave_generacion(grupo) for grupo in grupos}
+    generaciones = cache.get_many(claves.values())
+    faltantes = [clave for clave in claves.values() if clave not in generaciones]
+    if faltantes:
+        # Se parte de la hora para no volver a una generación ya usada si el
+        # caché expulsó la clave
+        for clave in faltantes:
+            cache.add(clave, time.time_ns(), None)
+        generaciones.update(cache.get_many(faltantes))
+    return {grupo: f'{PREFIJO}:{grupo}:{generaciones[clave]}' for grupo, clave in claves.items()}
+
+
+def _avanzar(grupos):
+    for grupo in grupos:
+        try:
+            cache.incr(_clave_generacion(grupo))
+        except ValueError:
+            cache.add(_clave_generacion(grupo), time.time_ns(), None)
+
+
+def obtener():
+    """Contadores actuales, desde el caché si están vigentes"""
+    claves = _claves()
+    valores = cache.get_many(claves.values())
+    contadores = {grupo: valores[clave] for grupo, clave in claves.items() if clave in valores}
+
+    if not {'clientes', 'boletas', 'avisos'} <= contadores.keys():
+        conteos = _conteos()
+        cache.set_many({claves[grupo]: valor for grupo, valor in conteos.items()}, DURACION)
+        contadores.update(conteos)
+
+    if 'mediciones' not in contadores:
+        contadores['mediciones'] = list(
+            Medicion.objects.select_related('cliente').order_by('-fecha')[:ULTIMAS_MEDICIONES]
+        )
+        cache.set(claves['mediciones'], contadores['mediciones'], DURACION)
+    return contadores
+
+
+def invalidar(*modelos):
+    """Descarta los contadores que dependen de los modelos, al confirmar la transacción"""
+    grupos = {grupo for modelo in modelos for grupo in DEPENDENCIAS[modelo]}
+    transaction.on_commit(lambda: _avanzar(grupos))
@@ -0,0 +1,229 @@
+"""
+Bandeja de salida de correos.
+
+Las vistas solo encolan mensajes en CorreoSaliente; el comando enviar_correos
+los despacha en lotes reutilizando una sola conexión SMTP, con reintentos y
+espera exponencial para los que fallan.
+"""
+
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import contadores, pdf_cache
+from .models import Aviso, CorreoSaliente, DestinatarioAviso
+
+TAMANO_LOTE = 100
+MAX_INTENTOS = 5
+ESPERA_BASE = 60  # segundos antes del primer reintento
+ESPERA_MAXIMA = 3600
+# Tiempo que un lote queda reservado por un worker antes de poder retomarse
+RESERVA = timedelta(minutes=10)
+
+
+def mensaje_boleta(boleta):
+    """Texto del correo que acompaña al PDF de la boleta"""
+    return f'''
+        Estimado/a {boleta.cliente.nombre},
+
+        Adjunto encontrará su boleta de agua correspondiente al período.
+
+        Detalles:
+        - Número de Boleta: {boleta.numero_boleta}
+        - Fecha de Emisión: {boleta.fecha_emision}
+        - Fecha de Vencimiento: {boleta.fecha_vencimiento}
+        - Monto: ${boleta.monto_total:,.2f} CLP
+
+        Gracias por su preferencia.
+
+        Prueba
+        '''
+
+
+def _correo_boleta(boleta):
+    return CorreoSaliente(
+        destinatario=boleta.cliente.email,
+        asunto=f'Boleta de Agua - {boleta.numero_boleta}',
+        mensaje=mensaje_boleta(boleta),
+        boleta=boleta,
+    )
+
+
+def encolar_boleta(boleta):
+    """Encola el correo con la boleta para su cliente; el PDF se adjunta al enviarlo"""
+    correo = _correo_boleta(boleta)
+    correo.save()
+    return correo
+
+
+def encolar_boletas(boletas, tamano_lote=TAMANO_LOTE * 10):
+    """Encola en lotes el correo de cada boleta del queryset"""
+    encolados = 0
+    lote = []
+    for boleta in boletas.select_related('cliente').iterator(chunk_size=tamano_lote):
+        lote.append(_correo_boleta(boleta))
+        if len(lote) >= tamano_lote:
+            CorreoSaliente.objects.bulk_create(lote)
+            encolados += len(lote)
+            lote = []
+    if lote:
+        CorreoSaliente.objects.bulk_create(lote)
+        encolados += len(lote)
+    return encolados
+
+
+def mensaje_aviso(cliente, aviso):
+    """Texto del correo de un aviso individual o masivo para un cliente"""
+    return f'''
+        Estimado/a {cliente.nombre},
+
+        {aviso.mensaje}
+
+        Tipo de Aviso: {aviso.get_tipo_aviso_display()}
+        Fecha: {aviso.fecha.strftime('%d/%m/%Y %H:%M')}
+
+        Gracias por su atención.
+
+        Prueba
+        '''
+
+
+def encolar_aviso(aviso):
+    """Encola el correo del aviso; se marca como enviado cuando el worker lo despacha"""
+    return CorreoSaliente.objects.create(
+        destinatario=aviso.cliente.email,
+        asunto=f'{aviso.titulo} - Prueba',
+        mensaje=mensaje_aviso(aviso.cliente, aviso),
+        aviso=aviso,
+    )
+
+
+def _reservar_lote(tamano):
+    """Toma hasta `tamano` correos listos para enviar y los marca como en envío"""
+    ahora = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            CorreoSaliente.objects.select_for_update(skip_locked=True).filter(
+                Q(estado='pendiente') | Q(estado='enviando'),
+                proximo_intento__lte=ahora,
+            ).order_by('proximo_intento').values_list('id', flat=True)[:tamano]
+        )
+        CorreoSaliente.objects.filter(id__in=ids).update(
+            estado='enviando',
+            proximo_intento=ahora + RESERVA,
+        )
+    return list(
+        CorreoSaliente.objects.filter(id__in=ids).select_related(
+            'boleta__cliente', 'boleta__medicion', 'destinatario_aviso__cliente', 'destinatario_aviso__aviso'
+        ).order_by('id')
+    )
+
+
+def _cuerpo(correo):
+    """Texto del correo; el de un aviso masivo se arma al enviarlo, no al encolarlo"""
+    if correo.destinatario_aviso_id and not correo.mensaje:
+        destinatario = correo.destinatario_aviso
+        return mensaje_aviso(destinatario.cliente, destinatario.aviso)
+    return correo.mensaje
+
+
+def _construir(correo):
+    mensaje = EmailMessage(
+        subject=correo.asunto,
+        body=_cuerpo(correo),
+        from_email=settings.EMAIL_HOST_USER,
+        to=[correo.destinatario],
+    )
+    if correo.boleta_id:
+        # Mismo PDF que la descarga: se toma del caché si ya fue generado
+        mensaje.attach(
+            f'boleta_{correo.boleta.numero_boleta}.pdf',
+            pdf_cache.pdf_boleta(correo.boleta),
+            'application/pdf',
+        )
+    return mensaje
+
+
+def _espera(intentos):
+    return timedelta(seconds=min(ESPERA_BASE * 2 ** (intentos - 1), ESPERA_MAXIMA))
+
+
+def procesar_lote(tamano=TAMANO_LOTE, max_intentos=MAX_INTENTOS):
+    """
+    Envía un lote de correos pendientes por una sola conexión.
+
+    Devuelve los contadores del lote: enviados, fallidos, reintentos,
+    segundos y las latencias en cola (creación a envío) de los enviados.
+    """
+    correos = _reservar_lote(tamano)
+    resultado = {'enviados': 0, 'fallidos': 0, 'reintentos': 0, 'segundos': 0.0, 'latencias': []}
+    if not correos:
+        return resultado
+
+    inicio = time.perf_counter()
+    enviados = []
+    errores = {}
+    conexion = get_connection(fail_silently=False)
+    try:
+        conexion.open()
+        for correo in correos:
+            try:
+                conexion.send_messages([_construir(correo)])
+                enviados.append(correo)
+            except Exception as e:
+                errores[correo.id] = str(e)
+    except Exception as e:
+        # No se pudo abrir la conexión: todo el lote queda para reintento
+        for correo in correos:
+            if correo not in enviados:
+                errores.setdefault(correo.id, str(e))
+    finally:
+        try:
+            conexion.close()
+        except Exception:
+            pass
+
+    ahora = timezone.now()
+    CorreoSaliente.objects.filter(id__in=[c.id for c in enviados]).update(
+        estado='enviado',
+        fecha_envio=ahora,
+        ultimo_error=None,
+    )
+    if Aviso.objects.filter(id__in=[c.aviso_id for c in enviados if c.aviso_id]).update(
+        enviado=True,
+        fecha_envio=ahora,
+    ):
+        contadores.invalidar(Aviso)
+    DestinatarioAviso.objects.filter(
+        id__in=[c.destinatario_aviso_id for c in enviados if c.destinatario_aviso_id]
+    ).update(
+        enviado=True,
+        fecha_envio=ahora,
+    )
+
+    for correo in correos:
+        if correo.id not in errores:
+            continue
+        intentos = correo.intentos + 1
+        if intentos >= max_intentos:
+            estado, proximo = 'fallido', ahora
+            resultado['fallidos'] += 1
+        else:
+            estado, proximo = 'pendiente', ahora + _espera(intentos)
+            resultado['reintentos'] += 1
+        CorreoSaliente.objects.filter(id=correo.id).update(
+            estado=estado,
+            intentos=intentos,
+            proximo_intento=proximo,
+            ultimo_error=errores[correo.id],
+        )
+
+    resultado['enviados'] = len(enviados)
+    resultado['segundos'] = time.perf_counter() - inicio
+    resultado['latencias'] = [(ahora - c.fecha_creacion).total_seconds() for c in enviados]
+    return resultado
@@ -0,0 +1,44 @@
+"""
+Descargas masivas que se entregan por partes con StreamingHttpResponse.
+"""
+
+import zipfile
+
+from . import pdf_cache
+
+
+class _Flujo:
+    """Archivo de solo escritura que retiene los bytes hasta que se consumen"""
+
+    def __init__(self):
+        self._partes = []
+
+    def write(self, datos):
+        self._partes.append(bytes(datos))
+        return len(datos)
+
+    def flush(self):
+        pass
+
+    def vaciar(self):
+        datos = b''.join(self._partes)
+        self._partes = []
+        return datos
+
+
+def zip_boletas(boletas, tamano_lote=200):
+    """
+    Genera un ZIP con el PDF de cada boleta, entregando los bytes a medida
+    que se escribe cada entrada.
+
+    Los PDF se leen del caché o se generan uno a uno, así que la memoria no
+    depende de la cantidad de boletas. Se guardan sin comprimir porque el
+    contenido de un PDF ya viene comprimido.
+    """
+    flujo = _Flujo()
+    with zipfile.ZipFile(flujo, 'w', compression=zipfile.ZIP_STORED) as archivo:
+        for boleta in boletas.iterator(chunk_size=tamano_lote):
+            with archivo.open(f"boleta_{boleta.numero_boleta}.pdf", 'w') as entrada:
+                entrada.write(pdf_cache.pdf_boleta(boleta))
+            yield flujo.vaciar()
+    yield flujo.vaciar()
@@ -0,0 +1,110 @@
+"""
+Exportación de boletas, mediciones y clientes a CSV o JSON Lines.
+
+Las filas se leen con values_list().iterator(chunk_size=...), sin crear
+instancias de modelo ni cargar el resultado completo (en PostgreSQL con un
+cursor del lado del servidor), y se serializan por lotes. Así la memoria
+usada no depende de la cantidad de filas, ya sea que el resultado vaya a un
+StreamingHttpResponse o a un archivo.
+"""
+
+import csv
+import io
+import itertools
+import json
+
+from .forms import FiltroBoletasForm, FiltroMedicionesForm
+from .models import Boleta, Cliente, Medicion
+
+TAMANO_LOTE = 2000
+
+# tipo: (modelo, formulario de filtros, [(encabezado, campo)])
+TIPOS = {
+    'boletas': (Boleta, FiltroBoletasForm, [
+        ('id', 'id'),
+        ('numero_boleta', 'numero_boleta'),
+        ('cliente_id', 'cliente_id'),
+        ('cliente', 'cliente__nombre'),
+        ('email', 'cliente__email'),
+        ('fecha_emision', 'fecha_emision'),
+        ('fecha_vencimiento', 'fecha_vencimiento'),
+        ('consumo_m3', 'medicion__consumo_m3'),
+        ('monto_total', 'monto_total'),
+        ('estado', 'estado'),
+    ]),
+    'mediciones': (Medicion, FiltroMedicionesForm, [
+        ('id', 'id'),
+        ('cliente_id', 'cliente_id'),
+        ('cliente', 'cliente__nombre'),
+        ('fecha', 'fecha'),
+        ('lectura_anterior', 'lectura_anterior'),
+        ('lectura_actual', 'lectura_actual'),
+        ('consumo_m3', 'consumo_m3'),
+        ('observaciones', 'observaciones'),
+    ]),
+    'clientes': (Cliente, None, [
+        ('id', 'id'),
+        ('nombre', 'nombre'),
+        ('email', 'email'),
+        ('telefono', 'telefono'),
+        ('direccion', 'direccion'),
+        ('fecha_registro', 'fecha_registro'),
+        ('activo', 'activo'),
+    ]),
+}
+
+
+def encabezados(tipo):
+    return [encabezado for encabezado, _ in TIPOS[tipo][2]]
+
+
+def filas(tipo, parametros=None, tamano_lote=TAMANO_LOTE):
+    """Tuplas con los valores de cada fila a exportar, filtradas como en los listados"""
+    modelo, formulario, columnas = TIPOS[tipo]
+    queryset = modelo.objects.all()
+    if formulario and parametros:
+        queryset = formulario(parametros).filtrar(queryset)
+    campos = [campo for _, campo in columnas]
+    return queryset.order_by('id').values_list(*campos).iterator(chunk_size=tamano_lote)
+
+
+def _lotes(filas, tamano):
+    while lote := list(itertools.islice(filas, tamano)):
+        yield lote
+
+
+def _csv(filas, encabezados, tamano_lote):
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    # BOM para que Excel reconozca el archivo como UTF-8
+    buffer.write('\ufeff')
+    escritor.writerow(encabezados)
+    for lote in _lotes(filas, tamano_lote):
+        escritor.writerows(lote)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _jsonl(filas, encabezados, tamano_lote):
+    codificar = json.JSONEncoder(ensure_ascii=False, default=str).encode
+    for lote in _lotes(filas, tamano_lote):
+        yield ''.join(codificar(dict(zip(encabezados, fila))) + '\n' for fila in lote)
+
+
+# formato: (content type, extensión, serializador)
+FORMATOS = {
+    'csv': ('text/csv; charset=utf-8', 'csv', _csv),
+    'jsonl': ('application/x-ndjson; charset=utf-8', 'jsonl', _jsonl),
+}
+
+
+def serializar(filas, tipo, formato, tamano_lote=TAMANO_LOTE):
+    """Texto del archivo exportado, entregado en partes de `tamano_lote` filas"""
+    return FORMATOS[formato][2](filas, encabezados(tipo), tamano_lote)
+
+
+def exportar(tipo, formato, parametros=None, tamano_lote=TAMANO_LOTE):
+    """Partes del archivo con las filas de `tipo` que cumplen los filtros"""
+    return serializar(filas(tipo, parametros, tamano_lote), tipo, formato, tamano_lote)
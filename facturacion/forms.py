@@ -1,12 +1,50 @@
 from django import forms
 from django.core.exceptions import ValidationError
 from django.utils.html import strip_tags
-from .models import Cliente, Medicion, Boleta, Aviso
+from .models import Cliente, Medicion, Boleta, Aviso, AvisoMasivo
+from .simulacion import MESES, leer_escenario
+from .tarifas import cobrar_medicion
+from .widgets import ClienteAutocompletar
 from crispy_forms.helper import FormHelper
 from crispy_forms.layout import Layout, Submit, Row, Column
+from datetime import date
+import calendar
 import re
 
 
+def limpiar_nombre(nombre):
+    """Nombre sin etiquetas HTML; solo letras y espacios"""
+    if nombre:
+        # Sanitizar entrada
+        nombre = strip_tags(nombre).strip()
+        if len(nombre) < 2:
+            raise ValidationError('El nombre debe tener al menos 2 caracteres.')
+        if not re.match(r'^[a-zA-ZáéíóúÁÉÍÓÚñÑ\s]+$', nombre):
+            raise ValidationError('El nombre solo puede contener letras y espacios.')
+    return nombre
+
+
+def limpiar_direccion(direccion):
+    """Dirección sin etiquetas HTML y de al menos 10 caracteres"""
+    if direccion:
+        # Sanitizar entrada
+        direccion = strip_tags(direccion).strip()
+        if len(direccion) < 10:
+            raise ValidationError('La dirección debe tener al menos 10 caracteres.')
+    return direccion
+
+
+def limpiar_telefono(telefono):
+    """Teléfono sin etiquetas HTML y con formato válido"""
+    if telefono:
+        # Sanitizar entrada
+        telefono = strip_tags(telefono).strip()
+        # Validar formato de teléfono
+        if not re.match(r'^[\+]?[0-9\s\-\(\)]{8,20}$', telefono):
+            raise ValidationError('Formato de teléfono inválido.')
+    return telefono
+
+
 class ClienteForm(forms.ModelForm):
     class Meta:
         model = Cliente
@@ -19,34 +57,13 @@ class ClienteForm(forms.ModelForm):
         }
     
     def clean_nombre(self):
-        nombre = self.cleaned_data.get('nombre')
-        if nombre:
-            # Sanitizar entrada
-            nombre = strip_tags(nombre).strip()
-            if len(nombre) < 2:
-                raise ValidationError('El nombre debe tener al menos 2 caracteres.')
-            if not re.match(r'^[a-zA-ZáéíóúÁÉÍÓÚñÑ\s]+$', nombre):
-                raise ValidationError('El nombre solo puede contener letras y espacios.')
-        return nombre
+        return limpiar_nombre(self.cleaned_data.get('nombre'))
     
     def clean_direccion(self):
-        direccion = self.cleaned_data.get('direccion')
-        if direccion:
-            # Sanitizar entrada
-            direccion = strip_tags(direccion).strip()
-            if len(direccion) < 10:
-                raise ValidationError('La dirección debe tener al menos 10 caracteres.')
-        return direccion
+        return limpiar_direccion(self.cleaned_data.get('direccion'))
     
     def clean_telefono(self):
-        telefono = self.cleaned_data.get('telefono')
-        if telefono:
-            # Sanitizar entrada
-            telefono = strip_tags(telefono).strip()
-            # Validar formato de teléfono
-            if not re.match(r'^[\+]?[0-9\s\-\(\)]{8,20}$', telefono):
-                raise ValidationError('Formato de teléfono inválido.')
-        return telefono
+        return limpiar_telefono(self.cleaned_data.get('telefono'))
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -64,12 +81,19 @@ class ClienteForm(forms.ModelForm):
         )
 
 
+def calcular_consumo(lectura_anterior, lectura_actual):
+    """Consumo entre dos lecturas del medidor; la lectura no puede retroceder"""
+    if lectura_actual < lectura_anterior:
+        raise forms.ValidationError("La lectura actual no puede ser menor que la lectura anterior.")
+    return lectura_actual - lectura_anterior
+
+
 class MedicionForm(forms.ModelForm):
     class Meta:
         model = Medicion
         fields = ['cliente', 'fecha', 'lectura_anterior', 'lectura_actual', 'observaciones']
         widgets = {
-            'cliente': forms.Select(attrs={'class': 'form-control'}),
+            'cliente': ClienteAutocompletar(attrs={'class': 'form-control'}),
             'fecha': forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
             'lectura_anterior': forms.NumberInput(attrs={'class': 'form-control'}),
             'lectura_actual': forms.NumberInput(attrs={'class': 'form-control'}),
@@ -97,29 +121,48 @@ class MedicionForm(forms.ModelForm):
         lectura_anterior = cleaned_data.get('lectura_anterior')
         lectura_actual = cleaned_data.get('lectura_actual')
 
-        if lectura_anterior and lectura_actual:
-            if lectura_actual < lectura_anterior:
-                raise forms.ValidationError("La lectura actual no puede ser menor que la lectura anterior.")
-            
+        if lectura_anterior is not None and lectura_actual is not None:
             # Calcular consumo automáticamente
-            consumo = lectura_actual - lectura_anterior
-            cleaned_data['consumo_m3'] = consumo
+            cleaned_data['consumo_m3'] = calcular_consumo(lectura_anterior, lectura_actual)
+            self.instance.consumo_m3 = cleaned_data['consumo_m3']
+        elif not self.errors:
+            raise forms.ValidationError("Indique la lectura anterior y la actual para calcular el consumo.")
 
         return cleaned_data
 
 
+def mediciones_sin_facturar(cliente_id):
+    """Mediciones del cliente que todavía no tienen boleta"""
+    return Medicion.objects.filter(
+        cliente_id=cliente_id,
+        boleta__isnull=True,
+    ).order_by('-fecha')
+
+
+def etiqueta_medicion(medicion):
+    return f"{medicion.fecha.strftime('%d/%m/%Y')} - {medicion.consumo_m3} m³"
+
+
 class BoletaForm(forms.ModelForm):
     class Meta:
         model = Boleta
         fields = ['cliente', 'medicion', 'fecha_vencimiento']
         widgets = {
-            'cliente': forms.Select(attrs={'class': 'form-control'}),
+            'cliente': ClienteAutocompletar(attrs={'class': 'form-control'}),
             'medicion': forms.Select(attrs={'class': 'form-control'}),
             'fecha_vencimiento': forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
         }
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        # Solo las mediciones pendientes del cliente elegido; el resto llega por AJAX
+        cliente_id = self.data.get('cliente') or self.initial.get('cliente') or self.instance.cliente_id
+        medicion = self.fields['medicion']
+        if str(cliente_id).isdigit():
+            medicion.queryset = mediciones_sin_facturar(cliente_id)
+        else:
+            medicion.queryset = Medicion.objects.none()
+        medicion.label_from_instance = etiqueta_medicion
         self.helper = FormHelper()
         self.helper.layout = Layout(
             Row(
@@ -130,13 +173,31 @@ class BoletaForm(forms.ModelForm):
             Submit('submit', 'Generar Boleta', css_class='btn btn-success')
         )
 
+    def _get_validation_exclusions(self):
+        # Los campos del formulario ya cargaron el cliente y la medición; la
+        # validación del modelo volvería a consultar si existen
+        return super()._get_validation_exclusions() | {'cliente', 'medicion'}
+
+    def clean(self):
+        cleaned_data = super().clean()
+        cliente = cleaned_data.get('cliente')
+        medicion = cleaned_data.get('medicion')
+
+        if cliente and medicion and medicion.cliente_id != cliente.id:
+            raise forms.ValidationError("La medición seleccionada no pertenece al cliente.")
+        if medicion:
+            # Falla con un error del formulario si no hay tarifa para la fecha
+            self.instance.monto_total, self.instance.desglose = cobrar_medicion(medicion)
+
+        return cleaned_data
+
 
 class AvisoForm(forms.ModelForm):
     class Meta:
         model = Aviso
         fields = ['cliente', 'tipo_aviso', 'titulo', 'mensaje']
         widgets = {
-            'cliente': forms.Select(attrs={'class': 'form-control'}),
+            'cliente': ClienteAutocompletar(attrs={'class': 'form-control'}),
             'tipo_aviso': forms.Select(attrs={'class': 'form-control'}),
             'titulo': forms.TextInput(attrs={'class': 'form-control'}),
             'mensaje': forms.Textarea(attrs={'class': 'form-control', 'rows': 5}),
@@ -154,3 +215,173 @@ class AvisoForm(forms.ModelForm):
             'mensaje',
             Submit('submit', 'Crear Aviso', css_class='btn btn-warning')
         )
+
+
+class AvisoMasivoForm(forms.ModelForm):
+    solo_activos = forms.BooleanField(required=False, initial=True, label='Solo clientes activos')
+    sector = forms.CharField(required=False, max_length=200, label='Sector (dirección contiene)',
+                             widget=forms.TextInput(attrs={'class': 'form-control'}))
+
+    class Meta:
+        model = AvisoMasivo
+        fields = ['tipo_aviso', 'titulo', 'mensaje']
+        widgets = {
+            'tipo_aviso': forms.Select(attrs={'class': 'form-control'}),
+            'titulo': forms.TextInput(attrs={'class': 'form-control'}),
+            'mensaje': forms.Textarea(attrs={'class': 'form-control', 'rows': 5}),
+        }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.helper = FormHelper()
+        self.helper.layout = Layout(
+            Row(
+                Column('tipo_aviso', css_class='form-group col-md-6 mb-3'),
+                Column('sector', css_class='form-group col-md-6 mb-3'),
+            ),
+            'solo_activos',
+            'titulo',
+            'mensaje',
+            Submit('submit', 'Crear Aviso Masivo', css_class='btn btn-warning')
+        )
+
+    def clientes(self):
+        """Clientes que recibirán el aviso según los filtros del formulario"""
+        clientes = Cliente.objects.all()
+        if self.cleaned_data.get('solo_activos'):
+            clientes = clientes.filter(activo=True)
+        if self.cleaned_data.get('sector'):
+            clientes = clientes.filter(direccion__icontains=strip_tags(self.cleaned_data['sector']).strip())
+        return clientes
+
+
+class FiltroBoletasForm(forms.Form):
+    """Filtros y orden de boletas recibidos por query string"""
+    # Cada orden termina en un campo único para la paginación por cursor y
+    # sigue uno de los índices de Boleta
+    ORDENES = {
+        'emision': ['-fecha_emision', '-id'],
+        'emision_asc': ['fecha_emision', 'id'],
+        'vencimiento': ['fecha_vencimiento', 'id'],
+        'vencimiento_desc': ['-fecha_vencimiento', '-id'],
+        'monto': ['-monto_total', '-id'],
+        'numero': ['numero_boleta'],
+    }
+    ORDEN_CHOICES = [
+        ('emision', 'Emisión (más recientes)'),
+        ('emision_asc', 'Emisión (más antiguas)'),
+        ('vencimiento', 'Vencimiento (próximas primero)'),
+        ('vencimiento_desc', 'Vencimiento (lejanas primero)'),
+        ('monto', 'Monto (mayor primero)'),
+        ('numero', 'Número de boleta'),
+    ]
+
+    anio = forms.IntegerField(required=False, min_value=2000, max_value=2100)
+    mes = forms.IntegerField(required=False, min_value=1, max_value=12)
+    estado = forms.ChoiceField(required=False, choices=[('', 'Todos')] + Boleta.ESTADO_CHOICES,
+                               widget=forms.Select(attrs={'class': 'form-select'}))
+    cliente = forms.IntegerField(required=False, min_value=1,
+                                 widget=ClienteAutocompletar(attrs={'class': 'form-control'}))
+    emision_desde = forms.DateField(required=False, label='Emitida desde',
+                                    widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}))
+    emision_hasta = forms.DateField(required=False, label='Emitida hasta',
+                                    widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}))
+    vencimiento_desde = forms.DateField(required=False, label='Vence desde',
+                                        widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}))
+    vencimiento_hasta = forms.DateField(required=False, label='Vence hasta',
+                                        widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}))
+    orden = forms.ChoiceField(required=False, choices=ORDEN_CHOICES,
+                              widget=forms.Select(attrs={'class': 'form-select'}))
+
+    def _datos(self):
+        # Tras validar, cleaned_data conserva solo los campos válidos
+        self.is_valid()
+        return self.cleaned_data
+
+    def filtrar(self, boletas):
+        """Aplica los filtros válidos; los campos inválidos se ignoran"""
+        datos = self._datos()
+        anio = datos.get('anio')
+        mes = datos.get('mes')
+
+        # Rangos sobre fecha_emision para aprovechar sus índices
+        if anio and mes:
+            ultimo_dia = calendar.monthrange(anio, mes)[1]
+            boletas = boletas.filter(fecha_emision__range=(date(anio, mes, 1), date(anio, mes, ultimo_dia)))
+        elif anio:
+            boletas = boletas.filter(fecha_emision__range=(date(anio, 1, 1), date(anio, 12, 31)))
+        if datos.get('emision_desde'):
+            boletas = boletas.filter(fecha_emision__gte=datos['emision_desde'])
+        if datos.get('emision_hasta'):
+            boletas = boletas.filter(fecha_emision__lte=datos['emision_hasta'])
+        if datos.get('vencimiento_desde'):
+            boletas = boletas.filter(fecha_vencimiento__gte=datos['vencimiento_desde'])
+        if datos.get('vencimiento_hasta'):
+            boletas = boletas.filter(fecha_vencimiento__lte=datos['vencimiento_hasta'])
+        if datos.get('estado'):
+            boletas = boletas.filter(estado=datos['estado'])
+        if datos.get('cliente'):
+            boletas = boletas.filter(cliente_id=datos['cliente'])
+        return boletas
+
+    def orden_elegido(self):
+        """Campos de ordenamiento según el parámetro `orden`"""
+        return self.ORDENES.get(self._datos().get('orden') or 'emision', self.ORDENES['emision'])
+
+
+class FiltroMedicionesForm(forms.Form):
+    """Filtros de mediciones recibidos por query string"""
+    cliente = forms.IntegerField(required=False, min_value=1,
+                                 widget=ClienteAutocompletar(attrs={'class': 'form-control'}))
+    desde = forms.DateField(required=False, label='Medida desde',
+                            widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}))
+    hasta = forms.DateField(required=False, label='Medida hasta',
+                            widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}))
+
+    def filtrar(self, mediciones):
+        """Aplica los filtros válidos; los campos inválidos se ignoran"""
+        self.is_valid()
+        datos = self.cleaned_data
+        if datos.get('cliente'):
+            mediciones = mediciones.filter(cliente_id=datos['cliente'])
+        if datos.get('desde'):
+            mediciones = mediciones.filter(fecha__gte=datos['desde'])
+        if datos.get('hasta'):
+            mediciones = mediciones.filter(fecha__lte=datos['hasta'])
+        return mediciones
+
+
+class ImportarCSVForm(forms.Form):
+    """Archivo CSV para las importaciones masivas"""
+    archivo = forms.FileField(label='Archivo CSV',
+                              widget=forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': '.csv,text/csv'}))
+    simular = forms.BooleanField(required=False, label='Solo validar, sin guardar')
+
+
+class SimuladorTarifasForm(forms.Form):
+    """Tarifas candidatas a comparar con lo facturado, una por línea"""
+    escenarios = forms.CharField(
+        label='Escenarios',
+        help_text='Una tarifa por línea: Nombre; cargo fijo; desde=precio, desde=precio, ... '
+                  '(p. ej. "Propuesta; 1500; 0=400, 10=600, 30=900").',
+        widget=forms.Textarea(attrs={'class': 'form-control font-monospace', 'rows': 4}),
+    )
+    meses = forms.IntegerField(label='Meses de historial', min_value=1, max_value=36, initial=MESES,
+                               widget=forms.NumberInput(attrs={'class': 'form-control'}))
+
+    def clean_escenarios(self):
+        """[(nombre, Tarifario)] de las líneas no vacías"""
+        escenarios = []
+        errores = []
+        for linea in self.cleaned_data['escenarios'].splitlines():
+            if not linea.strip():
+                continue
+            try:
+                escenarios.append(leer_escenario(linea))
+            except ValidationError as e:
+                errores.extend(e.messages)
+        if errores:
+            raise ValidationError(errores)
+        if not escenarios:
+            raise ValidationError('Indique al menos un escenario.')
+        return escenarios
@@ -0,0 +1,234 @@
+"""
+Importación masiva de mediciones y clientes desde CSV.
+
+El archivo se lee por lotes de filas, se validan las filas con las mismas
+reglas que los formularios y las válidas se guardan con bulk_create en una
+transacción por lote. Las filas con errores se omiten y se informan con su
+número de línea.
+
+Para las mediciones, una sola consulta por lote resuelve los clientes (por
+id o email) junto con su última lectura. Los clientes se insertan o
+actualizan según su email (INSERT ... ON CONFLICT), así que volver a
+importar un archivo corregido actualiza los datos en vez de fallar.
+"""
+
+import csv
+import itertools
+import time
+
+from django import forms
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import OuterRef, Q, Subquery
+
+from . import contadores, resumen
+from .forms import calcular_consumo, limpiar_direccion, limpiar_nombre, limpiar_telefono
+from .models import Cliente, Medicion
+
+TAMANO_LOTE = 5000
+ERRORES_MOSTRADOS = 200  # filas con error que muestra la vista de importación
+COLUMNAS_MEDICIONES = ['cliente', 'fecha', 'lectura_actual']
+COLUMNAS_CLIENTES = ['nombre', 'email', 'direccion']
+# Datos que se sobrescriben al reimportar un cliente existente
+CAMPOS_ACTUALIZABLES = ['nombre', 'direccion', 'telefono']
+
+_fecha = forms.DateField(input_formats=['%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y'])
+_lectura = Medicion._meta.get_field('lectura_actual')
+_observaciones = Medicion._meta.get_field('observaciones')
+
+
+def leer_csv(archivo, requeridas):
+    """Lector de diccionarios para un CSV separado por coma o punto y coma"""
+    muestra = archivo.readline()
+    # Del encabezado solo se deduce el separador: sin comillas en él, el
+    # Sniffer supone doublequote=False y leería mal los "" de las filas
+    try:
+        separador = csv.Sniffer().sniff(muestra, delimiters=',;').delimiter
+    except csv.Error:
+        separador = ','
+    lector = csv.DictReader(itertools.chain([muestra], archivo), delimiter=separador)
+    columnas = [columna.strip().lower() for columna in lector.fieldnames or []]
+    faltantes = [columna for columna in requeridas if columna not in columnas]
+    if faltantes:
+        raise ValidationError(f"Faltan columnas en el archivo: {', '.join(faltantes)}.")
+    lector.fieldnames = columnas
+    return lector
+
+
+def _filas(lector):
+    # line_num es la línea del archivo donde termina la fila recién leída
+    return ((lector.line_num, fila) for fila in lector)
+
+
+def _lotes(filas, tamano):
+    while lote := list(itertools.islice(filas, tamano)):
+        yield lote
+
+
+def _mensaje(error):
+    # Sin repetir el mismo mensaje de dos validadores equivalentes
+    return ' '.join(dict.fromkeys(error.messages))
+
+
+def _lectura_decimal(valor):
+    # Se acepta coma decimal, como la escriben las planillas en español
+    return _lectura.clean((valor or '').strip().replace(',', '.') or None, None)
+
+
+def _clientes(identificadores):
+    """[(id, email, fecha, lectura)] de los clientes con su última medición"""
+    ids = {identificador for identificador in identificadores if identificador.isdigit()}
+    emails = {identificador for identificador in identificadores if '@' in identificador}
+    ultima = Medicion.objects.filter(cliente=OuterRef('pk')).order_by('-fecha', '-id')
+    return Cliente.objects.filter(Q(id__in=ids) | Q(email__in=emails)).annotate(
+        ultima_fecha=Subquery(ultima.values('fecha')[:1]),
+        ultima_lectura=Subquery(ultima.values('lectura_actual')[:1]),
+    ).values_list('id', 'email', 'ultima_fecha', 'ultima_lectura')
+
+
+def importar_mediciones(archivo, tamano_lote=TAMANO_LOTE, simular=False, progreso=None):
+    """
+    Registra las mediciones de un CSV con columnas cliente, fecha y
+    lectura_actual (y opcionalmente lectura_anterior y observaciones).
+
+    El cliente se indica por id o email. La lectura anterior es la última
+    registrada del cliente, o la columna lectura_anterior si no tiene
+    mediciones; las lecturas de un mismo cliente deben venir en orden de
+    fecha. Con `simular` se valida todo sin guardar nada.
+    """
+    cliente_de = {}  # identificador del archivo -> id del cliente
+    ultimas = {}  # id del cliente -> (fecha, lectura) más reciente, incluidas las del archivo
+    errores = []
+    guardadas = 0
+    leidas = 0
+    inicio = time.perf_counter()
+    filas = _filas(leer_csv(archivo, COLUMNAS_MEDICIONES))
+
+    for lote in _lotes(filas, tamano_lote):
+        nuevos = {(fila['cliente'] or '').strip() for _, fila in lote} - cliente_de.keys()
+        for cliente_id, email, fecha, lectura in _clientes(nuevos):
+            cliente_de[str(cliente_id)] = cliente_de[email] = cliente_id
+            ultimas.setdefault(cliente_id, (fecha, lectura))
+        mediciones = []
+
+        for linea, fila in lote:
+            leidas += 1
+            identificador = (fila['cliente'] or '').strip()
+            try:
+                if identificador not in cliente_de:
+                    raise ValidationError(f'No existe un cliente con id o email "{identificador}".')
+                cliente_id = cliente_de[identificador]
+                fecha_anterior, lectura_anterior = ultimas[cliente_id]
+                fecha = _fecha.clean((fila['fecha'] or '').strip())
+                lectura_actual = _lectura_decimal(fila['lectura_actual'])
+                if lectura_actual is None:
+                    raise ValidationError('Falta la lectura actual.')
+                if fecha_anterior and fecha <= fecha_anterior:
+                    raise ValidationError(
+                        f"La fecha debe ser posterior a la última medición del cliente ({fecha_anterior:%d/%m/%Y})."
+                    )
+                if lectura_anterior is None:
+                    lectura_anterior = _lectura_decimal(fila.get('lectura_anterior'))
+                    if lectura_anterior is None:
+                        raise ValidationError('El cliente no tiene lecturas previas: indique la lectura_anterior.')
+                consumo = calcular_consumo(lectura_anterior, lectura_actual)
+                observaciones = _observaciones.clean((fila.get('observaciones') or '').strip() or None, None)
+            except ValidationError as e:
+                errores.append((linea, identificador, _mensaje(e)))
+                continue
+
+            mediciones.append(Medicion(
+                cliente_id=cliente_id,
+                fecha=fecha,
+                lectura_anterior=lectura_anterior,
+                lectura_actual=lectura_actual,
+                consumo_m3=consumo,
+                observaciones=observaciones,
+            ))
+            ultimas[cliente_id] = (fecha, lectura_actual)
+
+        if mediciones and not simular:
+            with transaction.atomic():
+                Medicion.objects.bulk_create(mediciones)
+                # bulk_create no dispara señales: el resumen se actualiza por lote
+                resumen.aplicar([resumen.cambios_de(medicion) for medicion in mediciones])
+                contadores.invalidar(Medicion)
+        guardadas += len(mediciones)
+        if progreso:
+            progreso(leidas, guardadas, time.perf_counter() - inicio)
+
+    segundos = time.perf_counter() - inicio
+    return {
+        'leidas': leidas,
+        'guardadas': guardadas,
+        'errores': errores,
+        'segundos': segundos,
+        'filas_por_segundo': leidas / segundos if segundos else 0,
+    }
+
+
+def _campo_cliente(campo, valor, limpiar=None):
+    field = Cliente._meta.get_field(campo)
+    valor = (valor or '').strip()
+    if limpiar:
+        valor = limpiar(valor)
+    return field.clean(valor or None if field.null else valor, None)
+
+
+def importar_clientes(archivo, tamano_lote=TAMANO_LOTE, simular=False, progreso=None):
+    """
+    Crea o actualiza los clientes de un CSV con columnas nombre, email y
+    direccion (y opcionalmente telefono), identificados por su email.
+
+    Cada fila se valida con las reglas de ClienteForm. Si un email se repite
+    en el archivo, queda la última fila. Con `simular` se valida todo sin
+    guardar nada. En PostgreSQL cada lote se escribe con una sola sentencia;
+    SQLite la divide según su límite de parámetros.
+    """
+    errores = []
+    guardadas = 0
+    leidas = 0
+    inicio = time.perf_counter()
+    lector = leer_csv(archivo, COLUMNAS_CLIENTES)
+    # Una columna ausente del archivo no borra ese dato de los clientes existentes
+    actualizables = [campo for campo in CAMPOS_ACTUALIZABLES if campo in lector.fieldnames]
+    filas = _filas(lector)
+
+    for lote in _lotes(filas, tamano_lote):
+        # Un mismo email dos veces en un INSERT ... ON CONFLICT falla en PostgreSQL
+        clientes = {}
+        for linea, fila in lote:
+            leidas += 1
+            try:
+                cliente = Cliente(
+                    nombre=_campo_cliente('nombre', fila['nombre'], limpiar_nombre),
+                    email=_campo_cliente('email', fila['email']),
+                    direccion=_campo_cliente('direccion', fila['direccion'], limpiar_direccion),
+                    telefono=_campo_cliente('telefono', fila.get('telefono'), limpiar_telefono),
+                )
+            except ValidationError as e:
+                errores.append((linea, (fila['email'] or '').strip(), _mensaje(e)))
+                continue
+            clientes[cliente.email] = cliente
+
+        if clientes and not simular:
+            with transaction.atomic():
+                Cliente.objects.bulk_create(
+                    clientes.values(),
+                    update_conflicts=True,
+                    unique_fields=['email'],
+                    update_fields=actualizables,
+                )
+                contadores.invalidar(Cliente)
+        guardadas += len(clientes)
+        if progreso:
+            progreso(leidas, guardadas, time.perf_counter() - inicio)
+
+    segundos = time.perf_counter() - inicio
+    return {
+        'leidas': leidas,
+        'guardadas': guardadas,
+        'errores': errores,
+        'segundos': segundos,
+        'filas_por_segundo': leidas / segundos if segundos else 0,
+    }
@@ -0,0 +1,138 @@
+"""
+Límite de solicitudes por IP con una ventana deslizante aproximada.
+
+Por cada clave (regla e IP) se guardan solo dos contadores: las solicitudes
+de la ventana fija actual y las de la anterior. La cantidad en los últimos
+`periodo` segundos se estima como
+
+    anterior * (1 - transcurrido / periodo) + actual
+
+lo que cuesta O(1) por solicitud y memoria constante por clave, sin guardar
+las marcas de tiempo de cada solicitud.
+
+Los contadores viven en un almacén intercambiable:
+
+- MemoriaLocal: un diccionario del proceso con un máximo de claves; al
+  superarlo se descarta la usada hace más tiempo (LRU).
+- CacheCompartida: el caché de Django, para que el límite sea uno solo entre
+  todos los workers. Usa add() e incr(), que son atómicos en Redis.
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+PREFIJO = 'limite'
+# Reglas por defecto: (prefijo de la ruta, solicitudes, segundos); gana la primera que coincide
+REGLAS = [('', 100, 60)]
+MAXIMO_CLAVES = 10000
+
+
+class MemoriaLocal:
+    """Contadores en el proceso, con un máximo de claves descartadas por LRU"""
+
+    def __init__(self, maximo_claves=MAXIMO_CLAVES):
+        self.maximo_claves = maximo_claves
+        self._claves = OrderedDict()  # clave -> [ventana, actual, anterior]
+        self._lock = threading.Lock()
+
+    def contar(self, clave, ventana, periodo):
+        """Suma una solicitud a la ventana y devuelve (actual, anterior)"""
+        with self._lock:
+            contadores = self._claves.pop(clave, None)
+            if contadores is None:
+                contadores = [ventana, 0, 0]
+            elif contadores[0] != ventana:
+                # La ventana actual pasa a ser la anterior solo si son consecutivas
+                contadores[2] = contadores[1] if contadores[0] == ventana - 1 else 0
+                contadores[0], contadores[1] = ventana, 0
+            contadores[1] += 1
+            self._claves[clave] = contadores
+            if len(self._claves) > self.maximo_claves:
+                self._claves.popitem(last=False)
+            return contadores[1], contadores[2]
+
+    def __len__(self):
+        return len(self._claves)
+
+
+class CacheCompartida:
+    """Contadores en el caché de Django, compartidos por todos los procesos"""
+
+    def __init__(self, alias='default'):
+        self.cache = caches[alias]
+
+    def contar(self, clave, ventana, periodo):
+        """Suma una solicitud a la ventana y devuelve (actual, anterior)"""
+        actual = f'{PREFIJO}:{clave}:{ventana}'
+        # Cada contador sirve dos ventanas (como actual y como anterior) y luego expira
+        if self.cache.add(actual, 1, timeout=periodo * 2):
+            cantidad = 1
+        else:
+            try:
+                cantidad = self.cache.incr(actual)
+            except ValueError:
+                # Expiró entre add() e incr()
+                self.cache.set(actual, 1, timeout=periodo * 2)
+                cantidad = 1
+        return cantidad, self.cache.get(f'{PREFIJO}:{clave}:{ventana - 1}', 0)
+
+
+ALMACENES = {
+    'memoria': MemoriaLocal,
+    'cache': CacheCompartida,
+}
+
+
+class Limitador:
+    """Aplica la primera regla cuyo prefijo coincide con la ruta"""
+
+    def __init__(self, reglas=None, almacen=None):
+        self.reglas = list(REGLAS if reglas is None else reglas)
+        self.almacen = almacen or MemoriaLocal()
+
+    @classmethod
+    def desde_settings(cls):
+        """Limitador con LIMITE_SOLICITUDES y LIMITE_SOLICITUDES_ALMACEN"""
+        almacen = ALMACENES[getattr(settings, 'LIMITE_SOLICITUDES_ALMACEN', 'memoria')]()
+        return cls(getattr(settings, 'LIMITE_SOLICITUDES', REGLAS), almacen)
+
+    def regla(self, ruta):
+        """(número de regla, solicitudes, segundos) que corresponde a la ruta, o None"""
+        for numero, (prefijo, solicitudes, segundos) in enumerate(self.reglas):
+            if ruta.startswith(prefijo):
+                return numero, solicitudes, segundos
+        return None
+
+    def permitir(self, ip, ruta, ahora=None):
+        """
+        (permitida, segundos de espera) para una solicitud de `ip` a `ruta`.
+
+        Las solicitudes rechazadas también cuentan, así que un cliente que
+        insiste sigue bloqueado hasta que baja su ritmo.
+        """
+        regla = self.regla(ruta)
+        if regla is None:
+            return True, 0
+        numero, solicitudes, periodo = regla
+        ahora = time.time() if ahora is None else ahora
+        ventana, transcurrido = divmod(ahora, periodo)
+        actual, anterior = self.almacen.contar(f'{numero}:{ip}', int(ventana), periodo)
+        estimado = anterior * (1 - transcurrido / periodo) + actual
+        if estimado <= solicitudes:
+            return True, 0
+        # Al reintentar, esa solicitud también cuenta: se espera a que quede espacio para ella
+        return False, max(1, math.ceil(_espera(actual, anterior, transcurrido, periodo, solicitudes - 1)))
+
+
+def _espera(actual, anterior, transcurrido, periodo, solicitudes):
+    """Segundos hasta que el estimado baje al límite si no llegan más solicitudes"""
+    if actual <= solicitudes:
+        # Basta con que se desvanezca parte de la ventana anterior
+        return periodo * (1 - (solicitudes - actual) / anterior) - transcurrido
+    # Hay que esperar a la ventana siguiente y que la actual pese lo suficiente menos
+    return periodo - transcurrido + periodo * (1 - solicitudes / actual)
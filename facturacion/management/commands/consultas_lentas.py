@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand
+
+from facturacion import consultas
+
+ORDENES = {
+    'total': lambda datos: datos[1],
+    'cantidad': lambda datos: datos[0],
+    'promedio': lambda datos: datos[1] / datos[0],
+    'p95': lambda datos: consultas.percentil(datos[2], 0.95),
+}
+
+
+class Command(BaseCommand):
+    help = 'Muestra las huellas de SQL que más tiempo consumen, por vista o en total'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=20, help='Huellas a mostrar')
+        parser.add_argument('--orden', choices=ORDENES, default='total', help='Criterio de orden')
+        parser.add_argument('--vista', help='Solo las consultas de esta vista (nombre de la URL)')
+        parser.add_argument('--por-huella', action='store_true',
+                            help='Sumar cada huella entre todas las vistas')
+        parser.add_argument('--largo', type=int, default=200, help='Caracteres de SQL a mostrar')
+        parser.add_argument('--limpiar', action='store_true', help='Borrar los totales acumulados')
+
+    def handle(self, *args, **options):
+        if options['limpiar']:
+            consultas.limpiar()
+            self.stdout.write(self.style.SUCCESS('✅ Totales de consultas borrados'))
+            return
+
+        totales = consultas.combinadas()
+        if options['vista']:
+            totales = {clave: datos for clave, datos in totales.items() if clave[0] == options['vista']}
+        if options['por_huella']:
+            totales = consultas.por_huella(totales)
+        if not totales:
+            self.stdout.write(self.style.WARNING(
+                'No hay consultas registradas (¿está activo CONSULTAS_LENTAS?)'
+            ))
+            return
+
+        orden = ORDENES[options['orden']]
+        filas = sorted(totales.items(), key=lambda item: orden(item[1]), reverse=True)[:options['top']]
+        tiempo_total = sum(datos[1] for datos in totales.values())
+        self.stdout.write(
+            f'{sum(datos[0] for datos in totales.values())} consultas de {len(totales)} huellas, '
+            f'{tiempo_total * 1000:.1f} ms en total'
+        )
+        for (vista, sql), (cantidad, segundos, buckets) in filas:
+            porcentaje = segundos / tiempo_total * 100 if tiempo_total else 0
+            self.stdout.write(self.style.MIGRATE_HEADING(f'\n{vista}') + (
+                f'  {cantidad} veces, {segundos * 1000:.1f} ms ({porcentaje:.1f}%), '
+                f'promedio {segundos / cantidad * 1000:.2f} ms, '
+                f'p95 {consultas.percentil(buckets, 0.95) * 1000:.2f} ms'
+            ))
+            texto = sql if len(sql) <= options['largo'] else sql[:options['largo']] + '...'
+            self.stdout.write(f'  {texto}')
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from facturacion.correo import encolar_boletas
+from facturacion.facturacion_masiva import rango_periodo
+from facturacion.models import Boleta
+
+
+class Command(BaseCommand):
+    help = 'Encola el envío por correo de todas las boletas emitidas en un período'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--anio', type=int, required=True, help='Año de emisión')
+        parser.add_argument('--mes', type=int, required=True, help='Mes de emisión')
+        parser.add_argument('--estado', choices=[estado for estado, _ in Boleta.ESTADO_CHOICES],
+                            default='pendiente', help='Solo boletas en este estado')
+        parser.add_argument('--reenviar', action='store_true',
+                            help='Incluir boletas que ya tienen un correo en la bandeja de salida')
+
+    def handle(self, *args, **options):
+        boletas = Boleta.objects.filter(
+            fecha_emision__range=rango_periodo(options['anio'], options['mes']),
+            estado=options['estado'],
+        ).order_by('id')
+        if not options['reenviar']:
+            boletas = boletas.filter(correosaliente__isnull=True)
+
+        encolados = encolar_boletas(boletas)
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {encolados} boletas en cola. Ejecute prerenderizar_boletas para generar los PDF "
+            f"en paralelo y enviar_correos para despacharlas."
+        ))
@@ -0,0 +1,55 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from facturacion.correo import MAX_INTENTOS, TAMANO_LOTE, procesar_lote
+
+
+class Command(BaseCommand):
+    help = 'Envía en lotes los correos pendientes de la bandeja de salida'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE, help='Correos por conexión SMTP')
+        parser.add_argument('--max-intentos', type=int, default=MAX_INTENTOS,
+                            help='Intentos antes de marcar un correo como fallido')
+        parser.add_argument('--continuo', action='store_true',
+                            help='Seguir revisando la bandeja en vez de terminar al vaciarla')
+        parser.add_argument('--intervalo', type=float, default=5, help='Segundos de espera con la bandeja vacía')
+
+    def handle(self, *args, **options):
+        totales = {'enviados': 0, 'fallidos': 0, 'reintentos': 0, 'segundos': 0.0}
+        latencias = []
+        try:
+            while True:
+                resultado = procesar_lote(options['lote'], options['max_intentos'])
+                procesados = resultado['enviados'] + resultado['fallidos'] + resultado['reintentos']
+                for clave in totales:
+                    totales[clave] += resultado[clave]
+                latencias.extend(resultado['latencias'])
+
+                if procesados:
+                    self.stdout.write(
+                        f"  {resultado['enviados']} enviados, {resultado['reintentos']} reintentos, "
+                        f"{resultado['fallidos']} fallidos en {resultado['segundos']:.2f}s"
+                    )
+                elif options['continuo']:
+                    time.sleep(options['intervalo'])
+                else:
+                    break
+        except KeyboardInterrupt:
+            pass
+
+        self._resumen(totales, latencias)
+
+    def _resumen(self, totales, latencias):
+        ritmo = totales['enviados'] / totales['segundos'] if totales['segundos'] else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {totales['enviados']} enviados ({ritmo:.1f} correos/s), "
+            f"{totales['reintentos']} reintentos, {totales['fallidos']} fallidos"
+        ))
+        if len(latencias) >= 2:
+            percentiles = statistics.quantiles(latencias, n=20)
+            self.stdout.write(
+                f"   Latencia en cola: p50 {statistics.median(latencias):.1f}s, p95 {percentiles[18]:.1f}s"
+            )
@@ -0,0 +1,55 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from facturacion import exportacion
+
+
+class Command(BaseCommand):
+    help = 'Exporta boletas, mediciones o clientes a CSV o JSON Lines sin cargarlos en memoria'
+
+    def add_arguments(self, parser):
+        parser.add_argument('tipo', choices=exportacion.TIPOS, help='Datos a exportar')
+        parser.add_argument('--formato', choices=exportacion.FORMATOS, default='csv', help='Formato de salida')
+        parser.add_argument('--salida', default='-', help='Archivo de salida (por defecto la salida estándar)')
+        parser.add_argument('--filtro', action='append', default=[], metavar='CAMPO=VALOR',
+                            help='Filtro como en los listados, p. ej. estado=pendiente o desde=2026-01-01 '
+                                 '(se puede repetir)')
+        parser.add_argument('--lote', type=int, default=exportacion.TAMANO_LOTE, help='Filas leídas por consulta')
+
+    def handle(self, *args, **options):
+        parametros = {}
+        for filtro in options['filtro']:
+            campo, separador, valor = filtro.partition('=')
+            if not separador:
+                raise CommandError(f'Filtro inválido "{filtro}": se espera CAMPO=VALOR.')
+            parametros[campo] = valor
+
+        total = 0
+
+        def contar(filas):
+            nonlocal total
+            for fila in filas:
+                total += 1
+                yield fila
+
+        filas = contar(exportacion.filas(options['tipo'], parametros, options['lote']))
+        partes = exportacion.serializar(filas, options['tipo'], options['formato'], options['lote'])
+
+        inicio = time.perf_counter()
+        if options['salida'] == '-':
+            for parte in partes:
+                sys.stdout.write(parte)
+            sys.stdout.flush()
+        else:
+            with open(options['salida'], 'w', encoding='utf-8', newline='') as archivo:
+                for parte in partes:
+                    archivo.write(parte)
+        segundos = time.perf_counter() - inicio
+
+        # El resumen va a stderr para no mezclarse con los datos en la salida estándar
+        self.stderr.write(self.style.SUCCESS(
+            f"✅ {total} filas de {options['tipo']} exportadas en {segundos:.2f}s "
+            f"({total / segundos if segundos else 0:.0f} filas/s)"
+        ))
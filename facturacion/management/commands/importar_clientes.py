@@ -0,0 +1,11 @@
+from facturacion import importacion
+from facturacion.management.commands import importar_mediciones
+
+
+class Command(importar_mediciones.Command):
+    help = 'Crea o actualiza en lote los clientes de un archivo CSV, identificados por su email'
+    registros = 'clientes'
+    columnas = 'nombre, email y direccion (telefono opcional)'
+
+    def importar(self, *args, **kwargs):
+        return importacion.importar_clientes(*args, **kwargs)
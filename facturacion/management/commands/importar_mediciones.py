@@ -0,0 +1,55 @@
+import csv
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from facturacion import importacion
+
+
+class Command(BaseCommand):
+    help = 'Registra en lote las lecturas de medidores de un archivo CSV'
+    registros = 'mediciones'
+    columnas = 'cliente, fecha y lectura_actual'
+
+    def importar(self, *args, **kwargs):
+        return importacion.importar_mediciones(*args, **kwargs)
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help=f'CSV con columnas {self.columnas}')
+        parser.add_argument('--lote', type=int, default=importacion.TAMANO_LOTE,
+                            help='Filas validadas y guardadas por transacción')
+        parser.add_argument('--simular', action='store_true', help='Validar el archivo sin guardar nada')
+        parser.add_argument('--errores', help='Escribir en este CSV el detalle de las filas con errores')
+
+    def handle(self, *args, **options):
+        def progreso(leidas, guardadas, segundos):
+            if leidas % (options['lote'] * 10) == 0:
+                self.stdout.write(f"  {leidas} filas ({leidas / segundos:.0f} filas/s)")
+
+        try:
+            with open(options['archivo'], encoding='utf-8-sig', errors='replace', newline='') as archivo:
+                resultado = self.importar(archivo, options['lote'], options['simular'], progreso)
+        except OSError as e:
+            raise CommandError(f'No se pudo leer el archivo: {e}')
+        except ValidationError as e:
+            raise CommandError(' '.join(e.messages))
+
+        errores = resultado['errores']
+        if options['errores']:
+            with open(options['errores'], 'w', encoding='utf-8', newline='') as archivo:
+                escritor = csv.writer(archivo)
+                escritor.writerow(['linea', 'registro', 'error'])
+                escritor.writerows(errores)
+        else:
+            for linea, registro, mensaje in errores[:20]:
+                self.stdout.write(f"  línea {linea} ({registro}): {mensaje}")
+            if len(errores) > 20:
+                self.stdout.write(f"  ... y {len(errores) - 20} errores más (use --errores para el detalle)")
+
+        accion = 'válidas' if options['simular'] else 'guardadas'
+        estilo = self.style.WARNING if errores else self.style.SUCCESS
+        self.stdout.write(estilo(
+            f"{'⚠️ ' if errores else '✅'} {resultado['guardadas']} de {resultado['leidas']} filas de "
+            f"{self.registros} {accion}, {len(errores)} con errores, en {resultado['segundos']:.2f}s "
+            f"({resultado['filas_por_segundo']:.0f} filas/s)"
+        ))
@@ -0,0 +1,68 @@
+import itertools
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from facturacion import pdf_cache
+from facturacion.facturacion_masiva import rango_periodo
+from facturacion.models import Boleta
+from facturacion.pdf import renderizar_lote
+
+ORDENES = {
+    'direccion': ['cliente__direccion', 'cliente__nombre', 'id'],
+    'cliente': ['cliente__nombre', 'id'],
+    'numero': ['numero_boleta'],
+}
+
+
+class Command(BaseCommand):
+    help = 'Genera un PDF listo para imprenta con todas las boletas de un período'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--anio', type=int, required=True, help='Año de emisión')
+        parser.add_argument('--mes', type=int, required=True, help='Mes de emisión')
+        parser.add_argument('--salida', help='Archivo PDF de salida (por defecto boletas_AAAA_MM.pdf)')
+        parser.add_argument('--orden', choices=ORDENES, default='direccion',
+                            help='Orden de las páginas para el reparto')
+        parser.add_argument('--boletas-por-archivo', type=int, default=0,
+                            help='Dividir en varios archivos de este tamaño (0 = un solo archivo)')
+        parser.add_argument('--lote', type=int, default=500, help='Boletas leídas por consulta')
+
+    def handle(self, *args, **options):
+        desde, hasta = rango_periodo(options['anio'], options['mes'])
+        salida = options['salida'] or f"boletas_{options['anio']}_{options['mes']:02d}.pdf"
+        boletas = Boleta.objects.filter(
+            fecha_emision__range=(desde, hasta)
+        ).select_related('cliente', 'medicion').order_by(*ORDENES[options['orden']])
+
+        datos = (pdf_cache.datos_boleta(boleta) for boleta in boletas.iterator(chunk_size=options['lote']))
+        inicio = time.perf_counter()
+
+        def progreso(cantidad, paginas):
+            if cantidad % 1000 == 0:
+                segundos = time.perf_counter() - inicio
+                self.stdout.write(f"  {paginas} páginas ({paginas / segundos:.1f} páginas/s)")
+
+        por_archivo = options['boletas_por_archivo']
+        if por_archivo:
+            base, extension = os.path.splitext(salida)
+            archivos = []
+            paginas = 0
+            for numero in itertools.count(1):
+                volumen = list(itertools.islice(datos, por_archivo))
+                if not volumen:
+                    break
+                ruta = f"{base}_{numero:03d}{extension}"
+                paginas += renderizar_lote(volumen, ruta)
+                archivos.append(ruta)
+                self.stdout.write(f"  {ruta}: {len(volumen)} boletas")
+        else:
+            paginas = renderizar_lote(datos, salida, progreso)
+            archivos = [salida]
+
+        segundos = time.perf_counter() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {paginas} páginas en {len(archivos)} archivo(s) en {segundos:.2f}s "
+            f"({paginas / segundos if segundos else 0:.1f} páginas/s)"
+        ))
@@ -0,0 +1,111 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from facturacion import pdf_cache
+from facturacion.facturacion_masiva import rango_periodo
+from facturacion.models import Boleta
+from facturacion.pdf import renderizar_boleta
+
+
+class Command(BaseCommand):
+    help = 'Genera por adelantado los PDF de las boletas de un período usando varios procesos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--anio', type=int, help='Año de emisión')
+        parser.add_argument('--mes', type=int, help='Mes de emisión')
+        parser.add_argument('--desde', type=date.fromisoformat, help='Fecha de emisión inicial (AAAA-MM-DD)')
+        parser.add_argument('--hasta', type=date.fromisoformat, help='Fecha de emisión final (AAAA-MM-DD)')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Procesos de renderizado (por defecto, uno por núcleo)')
+        parser.add_argument('--lote', type=int, default=500, help='Boletas leídas por consulta')
+        parser.add_argument('--forzar', action='store_true', help='Volver a generar aunque exista en caché')
+        parser.add_argument('--benchmark', action='store_true',
+                            help='Comparar 1 worker contra N sin guardar resultados')
+        parser.add_argument('--muestra', type=int, default=200, help='Boletas usadas en el benchmark')
+
+    def handle(self, *args, **options):
+        desde, hasta = self._rango(options)
+        boletas = Boleta.objects.filter(
+            fecha_emision__range=(desde, hasta)
+        ).select_related('cliente', 'medicion').order_by('id')
+
+        # Los procesos hijos no usan la base de datos; no heredar conexiones abiertas
+        connections.close_all()
+
+        if options['benchmark']:
+            self._benchmark(boletas, options['workers'], options['muestra'])
+            return
+
+        self.stdout.write(f"🖨️  Generando PDF de boletas emitidas entre {desde} y {hasta} "
+                          f"con {options['workers']} procesos...")
+        generadas = omitidas = 0
+        inicio = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=options['workers']) as executor:
+            for lote in self._lotes(boletas, options['lote']):
+                pendientes = [
+                    (boleta_id, datos) for boleta_id, datos in lote
+                    if options['forzar'] or not pdf_cache.existe(boleta_id, datos)
+                ]
+                omitidas += len(lote) - len(pendientes)
+                contenidos = executor.map(
+                    renderizar_boleta,
+                    [datos for _, datos in pendientes],
+                    chunksize=max(1, len(pendientes) // (options['workers'] * 4)),
+                )
+                for (boleta_id, datos), contenido in zip(pendientes, contenidos):
+                    pdf_cache.guardar(boleta_id, datos, contenido)
+                generadas += len(pendientes)
+
+                segundos = time.perf_counter() - inicio
+                self.stdout.write(f"  {generadas} PDF ({generadas / segundos:.1f} páginas/s)")
+
+        pdf_cache.recortar()
+        segundos = time.perf_counter() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {generadas} PDF generados, {omitidas} ya estaban en caché, en {segundos:.2f}s "
+            f"({generadas / segundos if segundos else 0:.1f} páginas/s)"
+        ))
+
+    def _rango(self, options):
+        if options['anio'] and options['mes']:
+            return rango_periodo(options['anio'], options['mes'])
+        if options['desde'] and options['hasta']:
+            return options['desde'], options['hasta']
+        raise CommandError('Indique --anio y --mes, o --desde y --hasta.')
+
+    def _lotes(self, boletas, tamano):
+        """Datos de las boletas en lotes, paginando por id"""
+        ultimo_id = 0
+        while True:
+            lote = list(boletas.filter(id__gt=ultimo_id)[:tamano])
+            if not lote:
+                return
+            ultimo_id = lote[-1].id
+            yield [(boleta.id, pdf_cache.datos_boleta(boleta)) for boleta in lote]
+
+    def _benchmark(self, boletas, workers, muestra):
+        datos = [pdf_cache.datos_boleta(boleta) for boleta in boletas[:muestra]]
+        if not datos:
+            raise CommandError('No hay boletas en el período para medir.')
+
+        resultados = {}
+        for cantidad in sorted({1, workers}):
+            with ProcessPoolExecutor(max_workers=cantidad) as executor:
+                # Calentar los procesos antes de medir
+                list(executor.map(renderizar_boleta, datos[:cantidad]))
+                inicio = time.perf_counter()
+                list(executor.map(renderizar_boleta, datos, chunksize=max(1, len(datos) // (cantidad * 4))))
+                resultados[cantidad] = len(datos) / (time.perf_counter() - inicio)
+            self.stdout.write(f"  {cantidad} worker(s): {resultados[cantidad]:.1f} páginas/s")
+
+        if workers > 1:
+            aceleracion = resultados[workers] / resultados[1]
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ Aceleración x{aceleracion:.2f} con {workers} workers "
+                f"(eficiencia {aceleracion / workers:.0%})"
+            ))
@@ -0,0 +1,93 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from facturacion import busqueda
+from facturacion.models import Cliente
+
+NOMBRES = ['José', 'María', 'Ángela', 'Sebastián', 'Inés', 'Raúl', 'Verónica', 'Joaquín', 'Lucía', 'Andrés']
+APELLIDOS = ['Pérez', 'González', 'Muñoz', 'Rodríguez', 'Núñez', 'Martínez', 'Álvarez', 'Peña', 'Fernández', 'Díaz']
+CALLES = ['Av. Libertad', 'Los Aromos', 'Pasaje Ñuble', 'Camino Real', 'Calle Océano']
+
+
+def _consultas(cantidad, rng):
+    """Mezcla de palabras completas, prefijos, sin tildes y de dos palabras"""
+    palabras = NOMBRES + APELLIDOS
+    consultas = []
+    for _ in range(cantidad):
+        palabra = rng.choice(palabras)
+        forma = rng.randrange(4)
+        if forma == 0:
+            consultas.append(palabra)
+        elif forma == 1:
+            consultas.append(palabra[:3])
+        elif forma == 2:
+            consultas.append(busqueda.normalizar(palabra))
+        else:
+            consultas.append(f'{rng.choice(NOMBRES)} {rng.choice(APELLIDOS)[:4]}')
+    return consultas
+
+
+class _Deshacer(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Mide la latencia de la búsqueda global y la compara con un presupuesto fijo'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--consultas', type=int, default=200, help='Consultas a ejecutar')
+        parser.add_argument('--presupuesto-ms', type=float, default=50,
+                            help='Latencia máxima aceptada para el p95, en milisegundos')
+        parser.add_argument('--poblar', type=int, default=0,
+                            help='Clientes sintéticos a insertar antes de medir (se deshacen al terminar)')
+        parser.add_argument('--lote', type=int, default=5000, help='Filas por bulk_create al poblar')
+        parser.add_argument('--semilla', type=int, default=1)
+
+    def handle(self, *args, **options):
+        if not busqueda.soportada():
+            raise CommandError('La búsqueda indexada solo está disponible en SQLite y PostgreSQL.')
+        rng = random.Random(options['semilla'])
+        try:
+            with transaction.atomic():
+                if options['poblar']:
+                    self._poblar(options['poblar'], options['lote'], rng)
+                latencias = self._medir(_consultas(options['consultas'], rng))
+                raise _Deshacer
+        except _Deshacer:
+            pass
+
+        p50 = statistics.median(latencias)
+        p95 = statistics.quantiles(latencias, n=20)[-1] if len(latencias) > 1 else latencias[0]
+        self.stdout.write(
+            f'{len(latencias)} consultas sobre {Cliente.objects.count() + options["poblar"]} clientes: '
+            f'p50 {p50:.1f}ms, p95 {p95:.1f}ms, máx {max(latencias):.1f}ms'
+        )
+        if p95 > options['presupuesto_ms']:
+            raise CommandError(f"❌ p95 {p95:.1f}ms supera el presupuesto de {options['presupuesto_ms']:.0f}ms")
+        self.stdout.write(self.style.SUCCESS(f"✅ p95 dentro del presupuesto de {options['presupuesto_ms']:.0f}ms"))
+
+    def _poblar(self, cantidad, tamano_lote, rng):
+        inicio = time.perf_counter()
+        for desde in range(0, cantidad, tamano_lote):
+            Cliente.objects.bulk_create([
+                Cliente(
+                    nombre=f'{rng.choice(NOMBRES)} {rng.choice(APELLIDOS)} {rng.choice(APELLIDOS)}',
+                    email=f'sintetico{i}@busqueda.prueba',
+                    direccion=f'{rng.choice(CALLES)} {rng.randint(1, 9999)}',
+                    telefono=f'+569{rng.randint(10000000, 99999999)}',
+                )
+                for i in range(desde, min(desde + tamano_lote, cantidad))
+            ])
+        self.stdout.write(f'  {cantidad} clientes sintéticos indexados en {time.perf_counter() - inicio:.1f}s')
+
+    def _medir(self, consultas):
+        latencias = []
+        for consulta in consultas:
+            inicio = time.perf_counter()
+            busqueda.buscar(consulta)
+            latencias.append((time.perf_counter() - inicio) * 1000)
+        return latencias
@@ -0,0 +1,61 @@
+import logging
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+
+from facturacion import limites
+from facturacion.middleware import RateLimitMiddleware
+
+
+class Command(BaseCommand):
+    help = 'Mide cuánto agrega el límite de solicitudes a cada request, con cada almacén'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--solicitudes', type=int, default=200_000, help='Solicitudes por almacén')
+        parser.add_argument('--ips', type=int, default=50_000, help='IPs distintas que envían solicitudes')
+        parser.add_argument('--maximo-claves', type=int, default=limites.MAXIMO_CLAVES,
+                            help='Claves que guarda el almacén en memoria')
+        parser.add_argument('--almacen', choices=limites.ALMACENES, action='append',
+                            help='Almacén a medir (por defecto todos)')
+        parser.add_argument('--semilla', type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['semilla'])
+        fabrica = RequestFactory()
+        rutas = ['/', '/clientes/', '/boletas/', '/mediciones/importar/']
+        # Mitad de las solicitudes de unas pocas IPs activas y el resto repartido
+        activas = [f'10.0.0.{i}' for i in range(1, 21)]
+        requests = []
+        for _ in range(options['solicitudes']):
+            if rng.random() < 0.5:
+                ip = rng.choice(activas)
+            else:
+                numero = rng.randrange(options['ips'])
+                ip = f'10.{numero >> 16 & 255}.{numero >> 8 & 255}.{numero & 255}'
+            requests.append(fabrica.get(rng.choice(rutas), REMOTE_ADDR=ip))
+
+        # Sin el aviso de cada rechazo, que mediría el logging y no el límite
+        logging.getLogger('facturacion.middleware').disabled = True
+        for nombre in options['almacen'] or limites.ALMACENES:
+            if nombre == 'memoria':
+                almacen = limites.MemoriaLocal(options['maximo_claves'])
+            else:
+                almacen = limites.CacheCompartida()
+                almacen.cache.clear()
+            middleware = RateLimitMiddleware(lambda request: None)
+            middleware.limitador.almacen = almacen
+
+            rechazadas = 0
+            inicio = time.perf_counter()
+            for request in requests:
+                if middleware.process_request(request) is not None:
+                    rechazadas += 1
+            segundos = time.perf_counter() - inicio
+
+            detalle = f', {len(almacen)} claves en memoria' if nombre == 'memoria' else ''
+            self.stdout.write(
+                f'{nombre}: {segundos / len(requests) * 1e6:.2f} µs por request '
+                f'({len(requests) / segundos:.0f} requests/s), {rechazadas} rechazadas{detalle}'
+            )
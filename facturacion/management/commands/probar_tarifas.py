@@ -0,0 +1,75 @@
+import time
+from datetime import date
+from decimal import Decimal
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from facturacion import tarifas
+
+# Tarifas sintéticas: (vigente_desde, cargo_fijo, [(desde_m3, precio_m3)])
+TARIFAS_PRUEBA = [
+    (date(2024, 1, 1), '1500.00', [('0', '350.00'), ('10', '480.50'), ('20', '720.25'), ('40', '990.99')]),
+    (date(2025, 1, 1), '1750.00', [('0', '380.00'), ('10', '520.00'), ('25', '780.75'), ('50', '1100.10')]),
+    (date(2026, 1, 1), '1890.50', [('0', '410.35'), ('15', '560.00'), ('30', '845.45'), ('60', '1200.00')]),
+]
+
+
+class Command(BaseCommand):
+    help = 'Mide el cálculo vectorizado de montos y lo compara con el cálculo exacto en Decimal'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mediciones', type=int, default=1_000_000, help='Consumos a calcular')
+        parser.add_argument('--verificar', type=int, default=10_000,
+                            help='Consumos comparados uno a uno con el cálculo en Decimal')
+        parser.add_argument('--presupuesto-ms', type=float, default=1000,
+                            help='Tiempo máximo aceptado para el cálculo vectorizado, en milisegundos')
+        parser.add_argument('--base-datos', action='store_true',
+                            help='Usar las tarifas guardadas en vez de las sintéticas')
+        parser.add_argument('--semilla', type=int, default=1)
+
+    def handle(self, *args, **options):
+        tarifario = tarifas.Tarifario.cargar() if options['base_datos'] else tarifas.Tarifario(TARIFAS_PRUEBA)
+        if not tarifario.tarifas:
+            raise CommandError('No hay tarifas registradas.')
+        rng = np.random.default_rng(options['semilla'])
+        cantidad = options['mediciones']
+
+        # Consumos de 0 a 150 m³ con dos decimales y fechas desde la primera tarifa hasta hoy
+        consumos = rng.integers(0, 15_000, cantidad, dtype=np.int64)
+        primera = tarifario.tarifas[0][0].toordinal()
+        fechas = rng.integers(primera, max(date.today().toordinal(), primera) + 1, cantidad, dtype=np.int64)
+
+        inicio = time.perf_counter()
+        centavos = tarifario.montos_centavos(consumos, fechas)
+        milisegundos = (time.perf_counter() - inicio) * 1000
+        self.stdout.write(
+            f'{cantidad} montos con {len(tarifario.tarifas)} tarifas en {milisegundos:.0f}ms '
+            f'({cantidad / milisegundos * 1000:.0f} montos/s)'
+        )
+
+        muestra = rng.choice(cantidad, min(options['verificar'], cantidad), replace=False)
+        inicio = time.perf_counter()
+        distintos = [
+            i for i in muestra
+            if tarifario.monto(Decimal(int(consumos[i])).scaleb(-2), date.fromordinal(int(fechas[i])))
+            != Decimal(int(centavos[i])).scaleb(-2)
+        ]
+        segundos = time.perf_counter() - inicio
+        self.stdout.write(
+            f'  {len(muestra)} montos verificados con Decimal en {segundos:.2f}s '
+            f'({len(muestra) / segundos if segundos else 0:.0f} montos/s)'
+        )
+        if distintos:
+            i = distintos[0]
+            raise CommandError(
+                f'❌ {len(distintos)} montos difieren del cálculo en Decimal; '
+                f'p. ej. {consumos[i] / 100} m³ el {date.fromordinal(int(fechas[i]))}'
+            )
+        if milisegundos > options['presupuesto_ms']:
+            raise CommandError(
+                f"❌ {milisegundos:.0f}ms supera el presupuesto de {options['presupuesto_ms']:.0f}ms"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Montos exactos y dentro del presupuesto de {options['presupuesto_ms']:.0f}ms"
+        ))
@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from facturacion import busqueda
+
+
+class Command(BaseCommand):
+    help = 'Reinstala los triggers del índice de búsqueda y vuelve a indexar todas las filas'
+
+    def handle(self, *args, **options):
+        if not busqueda.soportada():
+            raise CommandError('La búsqueda indexada solo está disponible en SQLite y PostgreSQL.')
+        inicio = time.perf_counter()
+        busqueda.instalar()
+        total = busqueda.reconstruir()
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {total} documentos indexados en {time.perf_counter() - inicio:.2f}s'
+        ))
@@ -0,0 +1,16 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from facturacion import resumen
+
+
+class Command(BaseCommand):
+    help = 'Recalcula el resumen mensual de boletas y consumo desde las tablas originales'
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        meses = resumen.reconstruir()
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Resumen de {meses} meses reconstruido en {time.perf_counter() - inicio:.2f}s'
+        ))
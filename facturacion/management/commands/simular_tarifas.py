@@ -0,0 +1,60 @@
+import csv
+import time
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from facturacion import simulacion
+
+
+class Command(BaseCommand):
+    help = 'Compara lo facturado en los últimos meses con una o más tarifas candidatas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('escenarios', nargs='+', metavar='ESCENARIO',
+                            help='Tarifa candidata: "Nombre; cargo fijo; desde=precio, desde=precio, ..."')
+        parser.add_argument('--meses', type=int, default=simulacion.MESES, help='Meses de historial, incluido el actual')
+        parser.add_argument('--salida', help='CSV con el resultado por cliente de cada escenario')
+        parser.add_argument('--alzas', type=int, default=10, help='Clientes con mayor alza a mostrar')
+
+    def handle(self, *args, **options):
+        try:
+            escenarios = [simulacion.leer_escenario(texto) for texto in options['escenarios']]
+        except ValidationError as e:
+            raise CommandError(' '.join(e.messages))
+
+        desde, hasta = simulacion.periodo(options['meses'])
+        inicio = time.perf_counter()
+        historial = simulacion.Historial.cargar(desde, hasta)
+        self.stdout.write(
+            f'{len(historial)} boletas de {len(historial.clientes)} clientes entre {desde} y {hasta}, '
+            f'leídas en {time.perf_counter() - inicio:.2f}s'
+        )
+
+        resultados = []
+        for nombre, tarifas in escenarios:
+            resultado = historial.simular(nombre, tarifas)
+            resultados.append(resultado)
+            porcentaje = f' ({resultado.porcentaje:+.1f}%)' if resultado.porcentaje is not None else ''
+            self.stdout.write(self.style.MIGRATE_HEADING(f'\n{nombre}') + f' ({resultado.segundos * 1000:.1f}ms)')
+            self.stdout.write(
+                f'  Facturado ${resultado.total_facturado:,.0f}, propuesto ${resultado.total_propuesto:,.0f}: '
+                f'diferencia ${resultado.diferencia:+,.0f}{porcentaje}'
+            )
+            self.stdout.write(
+                f'  {resultado.suben} clientes suben, {resultado.bajan} bajan; '
+                f'diferencia mediana ${resultado.mediana or 0:+,.0f}'
+            )
+            for cliente_id, cliente, facturado, propuesto, diferencia in resultado.mayores_alzas(options['alzas']):
+                self.stdout.write(f'    {cliente} (#{cliente_id}): ${facturado:,.0f} → ${propuesto:,.0f} ({diferencia:+,.0f})')
+
+        if options['salida']:
+            self._guardar(options['salida'], resultados)
+            self.stdout.write(self.style.SUCCESS(f"\n✅ Resultado por cliente guardado en {options['salida']}"))
+
+    def _guardar(self, ruta, resultados):
+        with open(ruta, 'w', encoding='utf-8', newline='') as archivo:
+            escritor = csv.writer(archivo)
+            escritor.writerow(['escenario', 'cliente_id', 'facturado', 'propuesto', 'diferencia'])
+            for resultado in resultados:
+                escritor.writerows([resultado.nombre, *fila] for fila in resultado.filas())
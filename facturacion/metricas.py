@@ -0,0 +1,206 @@
+"""
+Métricas de latencia y consultas por vista, en formato de texto de Prometheus.
+
+Cada hilo acumula en su propio diccionario, sin locks: por vista (nombre de
+la URL resuelta) guarda los histogramas de duración y de cantidad de
+consultas, el tiempo total en la base de datos y las respuestas por código.
+
+Con METRICAS_DIRECTORIO configurado, cada proceso escribe cada
+METRICAS_INTERVALO segundos un archivo JSON con sus acumulados en ese
+directorio, y la exportación suma los de todos los workers. Los archivos de
+workers que ya terminaron se conservan para que los contadores no bajen; el
+directorio se vacía al iniciar el servidor.
+"""
+
+import bisect
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+
+# Límites superiores de los buckets; el último (+Inf) queda implícito
+BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BUCKETS_CONSULTAS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+SIN_RUTA = 'sin_ruta'
+
+_hilo = threading.local()
+_acumulados = []  # un diccionario por hilo; list.append es atómico
+_archivo = None  # (pid, nombre del archivo de este proceso en el directorio)
+_guardado = 0.0
+
+
+def _vacio():
+    return {
+        'duracion': [0] * (len(BUCKETS_SEGUNDOS) + 1),
+        'duracion_suma': 0.0,
+        'consultas': [0] * (len(BUCKETS_CONSULTAS) + 1),
+        'consultas_suma': 0,
+        'bd_segundos': 0.0,
+        'estados': {},
+    }
+
+
+def _propios():
+    """Acumulados del hilo actual, creados la primera vez"""
+    try:
+        return _hilo.vistas
+    except AttributeError:
+        _hilo.vistas = {}
+        _acumulados.append(_hilo.vistas)
+        return _hilo.vistas
+
+
+def registrar(vista, segundos, consultas, bd_segundos, estado):
+    """Suma una solicitud a los acumulados del hilo actual"""
+    vistas = _propios()
+    datos = vistas.get(vista)
+    if datos is None:
+        datos = vistas[vista] = _vacio()
+    datos['duracion'][bisect.bisect_left(BUCKETS_SEGUNDOS, segundos)] += 1
+    datos['duracion_suma'] += segundos
+    datos['consultas'][bisect.bisect_left(BUCKETS_CONSULTAS, consultas)] += 1
+    datos['consultas_suma'] += consultas
+    datos['bd_segundos'] += bd_segundos
+    clase = f'{estado // 100}xx'
+    datos['estados'][clase] = datos['estados'].get(clase, 0) + 1
+    _guardar_si_corresponde()
+
+
+def _sumar(destino, origen):
+    for vista, datos in origen.items():
+        total = destino.setdefault(vista, _vacio())
+        for clave in ('duracion', 'consultas'):
+            total[clave] = [a + b for a, b in zip(total[clave], datos[clave])]
+        for clave in ('duracion_suma', 'consultas_suma', 'bd_segundos'):
+            total[clave] += datos[clave]
+        for clase, cantidad in datos['estados'].items():
+            total['estados'][clase] = total['estados'].get(clase, 0) + cantidad
+    return destino
+
+
+def del_proceso():
+    """Acumulados de todos los hilos de este proceso"""
+    total = {}
+    for vistas in list(_acumulados):
+        # Copia superficial: otro hilo puede agregar una vista mientras se recorre
+        _sumar(total, dict(vistas))
+    return total
+
+
+def nombre_archivo():
+    """Nombre único por proceso; cambia si el proceso se bifurcó (gunicorn --preload)"""
+    global _archivo
+    if _archivo is None or _archivo[0] != os.getpid():
+        _archivo = (os.getpid(), f'{os.getpid()}-{time.time_ns()}.json')
+    return _archivo[1]
+
+
+def _directorio():
+    directorio = getattr(settings, 'METRICAS_DIRECTORIO', None)
+    return Path(directorio) if directorio else None
+
+
+def guardar():
+    """Escribe los acumulados del proceso en el directorio compartido"""
+    global _guardado
+    directorio = _directorio()
+    _guardado = time.monotonic()
+    if directorio is None:
+        return
+    escribir_json(directorio / nombre_archivo(), del_proceso())
+
+
+def escribir_json(ruta, datos):
+    """Escribe `datos` en `ruta` de forma atómica, para que nunca se lea a medias"""
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    descriptor, temporal = tempfile.mkstemp(dir=ruta.parent, suffix='.tmp')
+    with os.fdopen(descriptor, 'w') as archivo:
+        json.dump(datos, archivo)
+    os.replace(temporal, ruta)
+
+
+def leer_json(directorio, omitir=None):
+    """Contenido de los archivos JSON de `directorio`, salvo `omitir`"""
+    if directorio is None or not directorio.is_dir():
+        return
+    for ruta in directorio.glob('*.json'):
+        if ruta.name == omitir:
+            continue
+        try:
+            yield json.loads(ruta.read_text())
+        except (OSError, ValueError):
+            # Otro proceso pudo reemplazar su archivo justo ahora; se omite esta vez
+            continue
+
+
+def _guardar_si_corresponde():
+    if time.monotonic() - _guardado > getattr(settings, 'METRICAS_INTERVALO', 5):
+        guardar()
+
+
+def combinadas():
+    """Acumulados de todos los procesos que escribieron en el directorio, más los de este"""
+    total = del_proceso()
+    for acumulados in leer_json(_directorio(), omitir=nombre_archivo()):
+        _sumar(total, acumulados)
+    return total
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _etiquetas(**valores):
+    return '{' + ','.join(f'{nombre}="{_escapar(valor)}"' for nombre, valor in valores.items()) + '}'
+
+
+def _histograma(lineas, nombre, ayuda, buckets, vistas, clave):
+    lineas += [f'# HELP {nombre} {ayuda}', f'# TYPE {nombre} histogram']
+    for vista, datos in vistas:
+        acumulado = 0
+        for limite, cantidad in zip((*buckets, '+Inf'), datos[clave]):
+            acumulado += cantidad
+            lineas.append(f'{nombre}_bucket{_etiquetas(vista=vista, le=limite)} {acumulado}')
+        lineas.append(f'{nombre}_sum{_etiquetas(vista=vista)} {datos[clave + "_suma"]}')
+        lineas.append(f'{nombre}_count{_etiquetas(vista=vista)} {acumulado}')
+
+
+def exportar(acumulados=None):
+    """Texto en el formato de exposición de Prometheus"""
+    vistas = sorted((acumulados if acumulados is not None else combinadas()).items())
+    lineas = []
+    _histograma(lineas, 'facturacion_vista_duracion_segundos', 'Duración de las solicitudes por vista.',
+                BUCKETS_SEGUNDOS, vistas, 'duracion')
+    _histograma(lineas, 'facturacion_vista_consultas', 'Consultas a la base de datos por solicitud.',
+                BUCKETS_CONSULTAS, vistas, 'consultas')
+    lineas += [
+        '# HELP facturacion_vista_bd_segundos_total Tiempo total en la base de datos por vista.',
+        '# TYPE facturacion_vista_bd_segundos_total counter',
+        *(f'facturacion_vista_bd_segundos_total{_etiquetas(vista=vista)} {datos["bd_segundos"]}'
+          for vista, datos in vistas),
+        '# HELP facturacion_vista_respuestas_total Respuestas por vista y clase de código HTTP.',
+        '# TYPE facturacion_vista_respuestas_total counter',
+        *(f'facturacion_vista_respuestas_total{_etiquetas(vista=vista, codigo=clase)} {cantidad}'
+          for vista, datos in vistas for clase, cantidad in sorted(datos['estados'].items())),
+    ]
+    return '\n'.join(lineas) + '\n'
+
+
+class ConsultasBD:
+    """execute_wrapper que cuenta las consultas y el tiempo que toman"""
+
+    def __init__(self):
+        self.cantidad = 0
+        self.segundos = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.segundos += time.perf_counter() - inicio
+            self.cantidad += 1
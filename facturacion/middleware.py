@@ -2,13 +2,106 @@
 Middleware personalizado para seguridad adicional.
 """
 
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
 from django.http import HttpResponse
 from django.utils.deprecation import MiddlewareMixin
 import logging
+import time
+
+from . import consultas, metricas, repeticiones
+from .limites import Limitador
 
 logger = logging.getLogger(__name__)
 
 
+def ip_cliente(request):
+    """
+    IP de quien hizo la solicitud. Sin proxies confiables es REMOTE_ADDR; con
+    PROXIES_CONFIABLES = n es la que agregó el más lejano de ellos, la n-ésima de
+    X-Forwarded-For contando desde la derecha. Las de más a la izquierda las
+    escribe el cliente y no sirven para identificarlo.
+    """
+    proxies = getattr(settings, 'PROXIES_CONFIABLES', 0)
+    if proxies:
+        reenviadas = [ip.strip() for ip in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if ip.strip()]
+        if len(reenviadas) >= proxies:
+            return reenviadas[-proxies]
+    return request.META.get('REMOTE_ADDR')
+
+
+class MetricasMiddleware:
+    """
+    Middleware que registra la duración, las consultas y el tiempo en la base
+    de datos de cada solicitud, agrupados por el nombre de la URL resuelta.
+    """
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        consultas_bd = metricas.ConsultasBD()
+        conexiones = connections.all()
+        for conexion in conexiones:
+            conexion.execute_wrappers.append(consultas_bd)
+        # Para que el registro de consultas lentas sepa a qué vista corresponde cada una
+        consultas.solicitud_actual(request)
+        inicio = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        except Exception:
+            self._quitar(conexiones, consultas_bd)
+            raise
+        
+        # Las descargas por streaming consultan mientras se envían: se mide hasta el final
+        # (salvo los archivos, para no perder el envío directo del servidor)
+        if response.streaming and not getattr(response, 'file_to_stream', None) and not response.is_async:
+            response.streaming_content = self._al_terminar(
+                response.streaming_content, request, response, conexiones, consultas_bd, inicio
+            )
+        else:
+            self._registrar(request, response, conexiones, consultas_bd, inicio)
+        return response
+    
+    def _al_terminar(self, contenido, request, response, conexiones, consultas_bd, inicio):
+        try:
+            yield from contenido
+        finally:
+            self._registrar(request, response, conexiones, consultas_bd, inicio)
+    
+    def _registrar(self, request, response, conexiones, consultas_bd, inicio):
+        segundos = time.perf_counter() - inicio
+        self._quitar(conexiones, consultas_bd)
+        vista = request.resolver_match.view_name if request.resolver_match else metricas.SIN_RUTA
+        metricas.registrar(vista, segundos, consultas_bd.cantidad, consultas_bd.segundos, response.status_code)
+    
+    def _quitar(self, conexiones, consultas_bd):
+        consultas.solicitud_actual(None)
+        for conexion in conexiones:
+            conexion.execute_wrappers.remove(consultas_bd)
+
+
+class RepeticionesMiddleware:
+    """
+    Middleware de desarrollo que avisa cuando una solicitud repite la misma
+    consulta (N+1), con la plantilla y la línea de código donde ocurre.
+    Solo se usa con CONSULTAS_REPETIDAS activo.
+    """
+    
+    def __init__(self, get_response):
+        if not getattr(settings, 'CONSULTAS_REPETIDAS', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        with repeticiones.detectar() as detector:
+            response = self.get_response(request)
+        vista = request.resolver_match.view_name if request.resolver_match else request.path
+        repeticiones.avisar(vista, detector)
+        return response
+
+
 class SecurityHeadersMiddleware(MiddlewareMixin):
     """
     Middleware para agregar headers de seguridad adicionales.
@@ -39,48 +132,26 @@ class SecurityHeadersMiddleware(MiddlewareMixin):
 
 class RateLimitMiddleware(MiddlewareMixin):
     """
-    Middleware básico para limitar requests por IP.
+    Middleware para limitar requests por IP según las reglas de
+    LIMITE_SOLICITUDES (ver facturacion.limites).
     """
     
     def __init__(self, get_response):
-        self.get_response = get_response
-        self.requests = {}
+        self.limitador = Limitador.desde_settings()
         super().__init__(get_response)
     
     def process_request(self, request):
-        # Obtener IP del cliente
         ip = self.get_client_ip(request)
-        
-        # Limitar a 100 requests por minuto por IP
-        import time
-        current_time = time.time()
-        
-        if ip in self.requests:
-            # Limpiar requests antiguos (más de 1 minuto)
-            self.requests[ip] = [
-                req_time for req_time in self.requests[ip] 
-                if current_time - req_time < 60
-            ]
-            
-            # Verificar límite
-            if len(self.requests[ip]) >= 100:
-                logger.warning(f"Rate limit exceeded for IP: {ip}")
-                return HttpResponse("Rate limit exceeded", status=429)
-        else:
-            self.requests[ip] = []
-        
-        # Agregar request actual
-        self.requests[ip].append(current_time)
-        
+        permitida, espera = self.limitador.permitir(ip, request.path)
+        if not permitida:
+            logger.warning(f"Rate limit exceeded for IP: {ip} on {request.path}")
+            response = HttpResponse("Rate limit exceeded", status=429)
+            response['Retry-After'] = str(espera)
+            return response
         return None
     
     def get_client_ip(self, request):
-        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-        if x_forwarded_for:
-            ip = x_forwarded_for.split(',')[0]
-        else:
-            ip = request.META.get('REMOTE_ADDR')
-        return ip
+        return ip_cliente(request)
 
 
 class LoggingMiddleware(MiddlewareMixin):
@@ -96,9 +167,4 @@ class LoggingMiddleware(MiddlewareMixin):
         return None
     
     def get_client_ip(self, request):
-        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-        if x_forwarded_for:
-            ip = x_forwarded_for.split(',')[0]
-        else:
-            ip = request.META.get('REMOTE_ADDR')
-        return ip
+        return ip_cliente(request)
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('facturacion', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SecuenciaBoleta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('periodo', models.CharField(max_length=6, unique=True, verbose_name='Período (AAAAMM)')),
+                ('ultimo_numero', models.PositiveIntegerField(default=0, verbose_name='Último Número')),
+            ],
+            options={
+                'verbose_name': 'Secuencia de Boletas',
+                'verbose_name_plural': 'Secuencias de Boletas',
+            },
+        ),
+    ]
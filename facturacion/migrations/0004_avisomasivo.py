@@ -0,0 +1,61 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:13
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('facturacion', '0003_correosaliente'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AvisoMasivo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Fecha del Aviso')),
+                ('tipo_aviso', models.CharField(choices=[('corte_programado', 'Corte Programado'), ('mantenimiento', 'Mantenimiento'), ('cambio_tarifa', 'Cambio de Tarifa'), ('informacion_general', 'Información General'), ('recordatorio_pago', 'Recordatorio de Pago')], db_index=True, max_length=30, verbose_name='Tipo de Aviso')),
+                ('titulo', models.CharField(max_length=200, verbose_name='Título')),
+                ('mensaje', models.TextField(verbose_name='Mensaje')),
+            ],
+            options={
+                'verbose_name': 'Aviso Masivo',
+                'verbose_name_plural': 'Avisos Masivos',
+                'ordering': ['-fecha'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DestinatarioAviso',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('enviado', models.BooleanField(default=False, verbose_name='Enviado')),
+                ('fecha_envio', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de Envío')),
+                ('aviso', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='destinatarios', to='facturacion.avisomasivo', verbose_name='Aviso')),
+                ('cliente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='facturacion.cliente', verbose_name='Cliente')),
+            ],
+            options={
+                'verbose_name': 'Destinatario de Aviso',
+                'verbose_name_plural': 'Destinatarios de Avisos',
+            },
+        ),
+        migrations.AddField(
+            model_name='correosaliente',
+            name='destinatario_aviso',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='facturacion.destinatarioaviso', verbose_name='Destinatario de Aviso Masivo'),
+        ),
+        migrations.AddIndex(
+            model_name='destinatarioaviso',
+            index=models.Index(fields=['cliente', 'enviado'], name='facturacion_cliente_1800ad_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='destinatarioaviso',
+            index=models.Index(fields=['aviso', 'enviado'], name='facturacion_aviso_i_815f5f_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='destinatarioaviso',
+            constraint=models.UniqueConstraint(fields=('aviso', 'cliente'), name='destinatario_aviso_unico'),
+        ),
+    ]
@@ -0,0 +1,95 @@
+from django.db import migrations
+
+# Copia congelada del índice tal como se creó en esta migración; los cambios
+# posteriores de facturacion/busqueda.py van en migraciones propias.
+TIPOS = {
+    'cliente': ('facturacion_cliente', ['nombre', 'email', 'direccion', 'telefono']),
+    'boleta': ('facturacion_boleta', ['numero_boleta']),
+    'aviso': ('facturacion_aviso', ['titulo', 'mensaje']),
+    'aviso_masivo': ('facturacion_avisomasivo', ['titulo', 'mensaje']),
+}
+
+
+def _texto_sqlite(prefijo, columnas):
+    return " || ' ' || ".join(f"coalesce({prefijo}.{columna}, '')" for columna in columnas)
+
+
+def _documento_postgres(prefijo, columnas):
+    texto = ', '.join(f'{prefijo}.{columna}' for columna in columnas)
+    return f"to_tsvector('simple', unaccent(concat_ws(' ', {texto})))"
+
+
+def _sql_sqlite(indice, tabla, columnas):
+    insertar = f"INSERT INTO {indice} (rowid, texto) VALUES (NEW.id, {_texto_sqlite('NEW', columnas)});"
+    borrar = f"DELETE FROM {indice} WHERE rowid = OLD.id;"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {indice} USING fts5("
+        f"texto, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')",
+        f"CREATE TRIGGER IF NOT EXISTS {indice}_ai AFTER INSERT ON {tabla} BEGIN {insertar} END",
+        f"CREATE TRIGGER IF NOT EXISTS {indice}_au AFTER UPDATE OF {', '.join(columnas)} "
+        f"ON {tabla} BEGIN {borrar} {insertar} END",
+        f"CREATE TRIGGER IF NOT EXISTS {indice}_ad AFTER DELETE ON {tabla} BEGIN {borrar} END",
+        f"INSERT INTO {indice} (rowid, texto) SELECT T.id, {_texto_sqlite('T', columnas)} FROM {tabla} T",
+    ]
+
+
+def _sql_postgres(indice, tabla, columnas):
+    return [
+        f"CREATE TABLE IF NOT EXISTS {indice} (id bigint PRIMARY KEY, documento tsvector NOT NULL)",
+        f"CREATE INDEX IF NOT EXISTS {indice}_gin ON {indice} USING gin (documento)",
+        f"""
+        CREATE OR REPLACE FUNCTION {indice}() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                DELETE FROM {indice} WHERE id = OLD.id;
+                RETURN OLD;
+            END IF;
+            INSERT INTO {indice} (id, documento) VALUES (NEW.id, {_documento_postgres('NEW', columnas)})
+            ON CONFLICT (id) DO UPDATE SET documento = EXCLUDED.documento;
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+        f"DROP TRIGGER IF EXISTS {indice} ON {tabla}",
+        f"CREATE TRIGGER {indice} AFTER INSERT OR UPDATE OF {', '.join(columnas)} OR DELETE "
+        f"ON {tabla} FOR EACH ROW EXECUTE FUNCTION {indice}()",
+        f"INSERT INTO {indice} (id, documento) SELECT T.id, {_documento_postgres('T', columnas)} FROM {tabla} T",
+    ]
+
+
+def crear_indice(apps, schema_editor):
+    conexion = schema_editor.connection
+    if conexion.vendor not in ('sqlite', 'postgresql'):
+        return
+    generar = _sql_sqlite if conexion.vendor == 'sqlite' else _sql_postgres
+    if conexion.vendor == 'postgresql':
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+    for tipo, (tabla, columnas) in TIPOS.items():
+        for sentencia in generar(f'facturacion_busqueda_{tipo}', tabla, columnas):
+            schema_editor.execute(sentencia)
+
+
+def eliminar_indice(apps, schema_editor):
+    conexion = schema_editor.connection
+    if conexion.vendor not in ('sqlite', 'postgresql'):
+        return
+    for tipo, (tabla, columnas) in TIPOS.items():
+        indice = f'facturacion_busqueda_{tipo}'
+        if conexion.vendor == 'sqlite':
+            for sufijo in ('ai', 'au', 'ad'):
+                schema_editor.execute(f"DROP TRIGGER IF EXISTS {indice}_{sufijo}")
+        else:
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {indice} ON {tabla}")
+            schema_editor.execute(f"DROP FUNCTION IF EXISTS {indice}()")
+        schema_editor.execute(f"DROP TABLE IF EXISTS {indice}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('facturacion', '0004_avisomasivo'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indice, eliminar_indice),
+    ]
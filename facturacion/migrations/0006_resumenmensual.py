@@ -0,0 +1,67 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:26
+
+from collections import defaultdict
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth
+
+
+def poblar_resumen(apps, schema_editor):
+    """Calcula el resumen de los meses existentes con los modelos históricos"""
+    Boleta = apps.get_model('facturacion', 'Boleta')
+    Medicion = apps.get_model('facturacion', 'Medicion')
+    ResumenMensual = apps.get_model('facturacion', 'ResumenMensual')
+    alias = schema_editor.connection.alias
+
+    resumenes = defaultdict(dict)
+    boletas = Boleta.objects.using(alias).order_by().annotate(mes=TruncMonth('fecha_emision')).values('mes').annotate(
+        boletas_pendientes=Count('id', filter=Q(estado='pendiente')),
+        boletas_pagadas=Count('id', filter=Q(estado='pagada')),
+        boletas_vencidas=Count('id', filter=Q(estado='vencida')),
+        boletas_canceladas=Count('id', filter=Q(estado='cancelada')),
+        monto_facturado=Sum('monto_total'),
+        monto_recaudado=Sum('monto_total', filter=Q(estado='pagada')),
+    )
+    mediciones = Medicion.objects.using(alias).order_by().annotate(mes=TruncMonth('fecha')).values('mes').annotate(
+        mediciones=Count('id'),
+        consumo_m3=Sum('consumo_m3'),
+    )
+    for fila in [*boletas, *mediciones]:
+        mes = fila.pop('mes')
+        resumenes[f'{mes.year}{mes.month:02d}'].update({campo: valor or 0 for campo, valor in fila.items()})
+
+    ResumenMensual.objects.using(alias).bulk_create(
+        ResumenMensual(periodo=periodo, **valores) for periodo, valores in sorted(resumenes.items())
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('facturacion', '0005_indice_busqueda'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenMensual',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('periodo', models.CharField(max_length=6, unique=True, verbose_name='Período (AAAAMM)')),
+                ('boletas_pendientes', models.IntegerField(default=0, verbose_name='Boletas Pendientes')),
+                ('boletas_pagadas', models.IntegerField(default=0, verbose_name='Boletas Pagadas')),
+                ('boletas_vencidas', models.IntegerField(default=0, verbose_name='Boletas Vencidas')),
+                ('boletas_canceladas', models.IntegerField(default=0, verbose_name='Boletas Canceladas')),
+                ('monto_facturado', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='Monto Facturado')),
+                ('monto_recaudado', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='Monto Recaudado')),
+                ('mediciones', models.IntegerField(default=0, verbose_name='Mediciones')),
+                ('consumo_m3', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='Consumo (m³)')),
+            ],
+            options={
+                'verbose_name': 'Resumen Mensual',
+                'verbose_name_plural': 'Resúmenes Mensuales',
+                'ordering': ['periodo'],
+            },
+        ),
+        migrations.RunPython(poblar_resumen, migrations.RunPython.noop),
+    ]
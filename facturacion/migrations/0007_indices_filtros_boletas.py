@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('facturacion', '0006_resumenmensual'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='boleta',
+            index=models.Index(fields=['estado', 'fecha_emision', 'id'], name='facturacion_estado_b91ff2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='boleta',
+            index=models.Index(fields=['estado', 'fecha_vencimiento', 'id'], name='facturacion_estado_648e60_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='boleta',
+            index=models.Index(fields=['estado', 'monto_total', 'id'], name='facturacion_estado_5362bf_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='boleta',
+            index=models.Index(fields=['estado', 'numero_boleta'], name='facturacion_estado_1ff81c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='boleta',
+            index=models.Index(fields=['cliente', 'fecha_emision', 'id'], name='facturacion_cliente_1b1739_idx'),
+        ),
+    ]
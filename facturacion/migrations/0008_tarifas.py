@@ -0,0 +1,58 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:40
+
+import datetime
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def crear_tarifa_base(apps, schema_editor):
+    # La tarifa que estaba fija en el código: 500 CLP por m³, sin cargo fijo
+    Tarifa = apps.get_model('facturacion', 'Tarifa')
+    TramoTarifa = apps.get_model('facturacion', 'TramoTarifa')
+    tarifa = Tarifa.objects.create(nombre='Tarifa base', vigente_desde=datetime.date(2000, 1, 1), cargo_fijo=0)
+    TramoTarifa.objects.create(tarifa=tarifa, desde_m3=0, precio_m3=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('facturacion', '0007_indices_filtros_boletas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tarifa',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=100, verbose_name='Nombre')),
+                ('vigente_desde', models.DateField(unique=True, verbose_name='Vigente Desde')),
+                ('cargo_fijo', models.DecimalField(decimal_places=2, default=0, max_digits=10, validators=[django.core.validators.MinValueValidator(0)], verbose_name='Cargo Fijo')),
+            ],
+            options={
+                'verbose_name': 'Tarifa',
+                'verbose_name_plural': 'Tarifas',
+                'ordering': ['-vigente_desde'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TramoTarifa',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('desde_m3', models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(0)], verbose_name='Desde (m³)')),
+                ('precio_m3', models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(0)], verbose_name='Precio por m³')),
+                ('tarifa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tramos', to='facturacion.tarifa', verbose_name='Tarifa')),
+            ],
+            options={
+                'verbose_name': 'Tramo de Tarifa',
+                'verbose_name_plural': 'Tramos de Tarifa',
+                'ordering': ['tarifa', 'desde_m3'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='tramotarifa',
+            constraint=models.UniqueConstraint(fields=('tarifa', 'desde_m3'), name='tramo_tarifa_unico'),
+        ),
+        migrations.RunPython(crear_tarifa_base, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+from django.db import migrations
+from django.db.models import Count
+
+LARGO_EMAIL = 254
+
+
+def deduplicar_emails(apps, schema_editor):
+    """
+    Deja un solo cliente por email antes de hacerlo único.
+
+    Conserva el email en el cliente más antiguo y a los demás les agrega
+    "+duplicado-<id>" antes de la @, sin borrar ni mezclar sus datos, para que
+    se puedan revisar y corregir desde el admin.
+    """
+    Cliente = apps.get_model('facturacion', 'Cliente')
+    clientes = Cliente.objects.using(schema_editor.connection.alias)
+    repetidos = clientes.values('email').annotate(veces=Count('id')).filter(veces__gt=1).values_list('email', flat=True)
+    for email in list(repetidos):
+        usuario, _, dominio = email.rpartition('@')
+        for cliente in clientes.filter(email=email).order_by('id')[1:]:
+            sufijo = f'+duplicado-{cliente.id}@{dominio}'
+            cliente.email = usuario[:LARGO_EMAIL - len(sufijo)] + sufijo
+            cliente.save(update_fields=['email'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('facturacion', '0008_tarifas'),
+    ]
+
+    operations = [
+        migrations.RunPython(deduplicar_emails, migrations.RunPython.noop),
+    ]
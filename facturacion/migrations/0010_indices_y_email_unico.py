@@ -0,0 +1,156 @@
+import django.core.validators
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('facturacion', '0009_deduplicar_emails_clientes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='aviso',
+            name='enviado',
+            field=models.BooleanField(db_index=True, default=False, verbose_name='Enviado'),
+        ),
+        migrations.AlterField(
+            model_name='aviso',
+            name='fecha',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Fecha del Aviso'),
+        ),
+        migrations.AlterField(
+            model_name='aviso',
+            name='fecha_envio',
+            field=models.DateTimeField(blank=True, db_index=True, null=True, verbose_name='Fecha de Envío'),
+        ),
+        migrations.AlterField(
+            model_name='aviso',
+            name='tipo_aviso',
+            field=models.CharField(choices=[('corte_programado', 'Corte Programado'), ('mantenimiento', 'Mantenimiento'), ('cambio_tarifa', 'Cambio de Tarifa'), ('informacion_general', 'Información General'), ('recordatorio_pago', 'Recordatorio de Pago')], db_index=True, max_length=30, verbose_name='Tipo de Aviso'),
+        ),
+        migrations.AlterField(
+            model_name='aviso',
+            name='titulo',
+            field=models.CharField(db_index=True, max_length=200, verbose_name='Título'),
+        ),
+        migrations.AlterField(
+            model_name='boleta',
+            name='estado',
+            field=models.CharField(choices=[('pendiente', 'Pendiente'), ('pagada', 'Pagada'), ('vencida', 'Vencida'), ('cancelada', 'Cancelada')], db_index=True, default='pendiente', max_length=20, verbose_name='Estado'),
+        ),
+        migrations.AlterField(
+            model_name='boleta',
+            name='fecha_emision',
+            field=models.DateField(db_index=True, default=django.utils.timezone.now, verbose_name='Fecha de Emisión'),
+        ),
+        migrations.AlterField(
+            model_name='boleta',
+            name='fecha_registro',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Fecha de Registro'),
+        ),
+        migrations.AlterField(
+            model_name='boleta',
+            name='fecha_vencimiento',
+            field=models.DateField(db_index=True, verbose_name='Fecha de Vencimiento'),
+        ),
+        migrations.AlterField(
+            model_name='boleta',
+            name='monto_total',
+            field=models.DecimalField(db_index=True, decimal_places=2, max_digits=10, verbose_name='Monto Total'),
+        ),
+        migrations.AlterField(
+            model_name='boleta',
+            name='numero_boleta',
+            field=models.CharField(db_index=True, max_length=20, unique=True, verbose_name='Número de Boleta'),
+        ),
+        migrations.AlterField(
+            model_name='cliente',
+            name='activo',
+            field=models.BooleanField(db_index=True, default=True, verbose_name='Cliente Activo'),
+        ),
+        migrations.AlterField(
+            model_name='cliente',
+            name='email',
+            field=models.EmailField(db_index=True, max_length=254, unique=True, validators=[django.core.validators.EmailValidator()], verbose_name='Correo Electrónico'),
+        ),
+        migrations.AlterField(
+            model_name='cliente',
+            name='fecha_registro',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Fecha de Registro'),
+        ),
+        migrations.AlterField(
+            model_name='cliente',
+            name='nombre',
+            field=models.CharField(db_index=True, max_length=200, verbose_name='Nombre Completo'),
+        ),
+        migrations.AlterField(
+            model_name='cliente',
+            name='telefono',
+            field=models.CharField(blank=True, db_index=True, max_length=20, null=True, verbose_name='Teléfono'),
+        ),
+        migrations.AlterField(
+            model_name='medicion',
+            name='consumo_m3',
+            field=models.DecimalField(db_index=True, decimal_places=2, max_digits=10, verbose_name='Consumo (m³)'),
+        ),
+        migrations.AlterField(
+            model_name='medicion',
+            name='fecha',
+            field=models.DateField(db_index=True, verbose_name='Fecha de Medición'),
+        ),
+        migrations.AlterField(
+            model_name='medicion',
+            name='fecha_registro',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Fecha de Registro'),
+        ),
+        migrations.AddIndex(
+            model_name='aviso',
+            index=models.Index(fields=['cliente', 'enviado'], name='facturacion_cliente_77cd3a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='aviso',
+            index=models.Index(fields=['tipo_aviso', 'fecha'], name='facturacion_tipo_av_f72d76_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='aviso',
+            index=models.Index(fields=['enviado', 'fecha'], name='facturacion_enviado_5d990c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='boleta',
+            index=models.Index(fields=['cliente', 'estado'], name='facturacion_cliente_767bc2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='boleta',
+            index=models.Index(fields=['fecha_emision', 'estado'], name='facturacion_fecha_e_38da23_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='boleta',
+            index=models.Index(fields=['numero_boleta'], name='facturacion_numero__1ea398_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='boleta',
+            index=models.Index(fields=['fecha_vencimiento'], name='facturacion_fecha_v_2cd273_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(fields=['activo', 'fecha_registro'], name='facturacion_activo_f95b89_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(fields=['email'], name='facturacion_email_40398f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='medicion',
+            index=models.Index(fields=['cliente', 'fecha'], name='facturacion_cliente_7b29fc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='medicion',
+            index=models.Index(fields=['fecha', 'consumo_m3'], name='facturacion_fecha_cca318_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='medicion',
+            index=models.Index(fields=['fecha_registro'], name='facturacion_fecha_r_c732da_idx'),
+        ),
+    ]
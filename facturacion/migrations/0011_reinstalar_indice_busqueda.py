@@ -0,0 +1,100 @@
+from django.db import migrations
+
+# Copia congelada del índice de búsqueda a esta altura. Vuelve a crear los
+# triggers (en SQLite, 0010 reconstruye tablas indexadas y con ellas se pierden)
+# e indexa el número de boleta también con todos sus sufijos, para buscarla por
+# el correlativo o cualquier parte del número.
+TIPOS = {
+    'cliente': ('facturacion_cliente', ['nombre', 'email', 'direccion', 'telefono']),
+    'boleta': ('facturacion_boleta', ['numero_boleta']),
+    'aviso': ('facturacion_aviso', ['titulo', 'mensaje']),
+    'aviso_masivo': ('facturacion_avisomasivo', ['titulo', 'mensaje']),
+}
+SUFIJOS = {
+    'numero_boleta': 20,
+}
+
+
+def _expresiones(prefijo, columnas, sufijos):
+    expresiones = []
+    for columna in columnas:
+        expresiones.append(f'{prefijo}.{columna}')
+        largo = SUFIJOS.get(columna, 1) if sufijos else 1
+        expresiones.extend(f'substr({prefijo}.{columna}, {inicio})' for inicio in range(2, largo + 1))
+    return expresiones
+
+
+def _sql_sqlite(indice, tabla, columnas, sufijos):
+    def texto(prefijo):
+        return " || ' ' || ".join(
+            f"coalesce({expresion}, '')" for expresion in _expresiones(prefijo, columnas, sufijos)
+        )
+    insertar = f"INSERT INTO {indice} (rowid, texto) VALUES (NEW.id, {texto('NEW')});"
+    borrar = f"DELETE FROM {indice} WHERE rowid = OLD.id;"
+    return [
+        f"DROP TRIGGER IF EXISTS {indice}_ai",
+        f"DROP TRIGGER IF EXISTS {indice}_au",
+        f"DROP TRIGGER IF EXISTS {indice}_ad",
+        f"CREATE TRIGGER {indice}_ai AFTER INSERT ON {tabla} BEGIN {insertar} END",
+        f"CREATE TRIGGER {indice}_au AFTER UPDATE OF {', '.join(columnas)} "
+        f"ON {tabla} BEGIN {borrar} {insertar} END",
+        f"CREATE TRIGGER {indice}_ad AFTER DELETE ON {tabla} BEGIN {borrar} END",
+        f"DELETE FROM {indice}",
+        f"INSERT INTO {indice} (rowid, texto) SELECT T.id, {texto('T')} FROM {tabla} T",
+        f"INSERT INTO {indice} ({indice}) VALUES ('optimize')",
+    ]
+
+
+def _sql_postgres(indice, tabla, columnas, sufijos):
+    def documento(prefijo):
+        texto = ', '.join(_expresiones(prefijo, columnas, sufijos))
+        return f"to_tsvector('simple', unaccent(concat_ws(' ', {texto})))"
+    return [
+        f"""
+        CREATE OR REPLACE FUNCTION {indice}() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                DELETE FROM {indice} WHERE id = OLD.id;
+                RETURN OLD;
+            END IF;
+            INSERT INTO {indice} (id, documento) VALUES (NEW.id, {documento('NEW')})
+            ON CONFLICT (id) DO UPDATE SET documento = EXCLUDED.documento;
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+        f"DROP TRIGGER IF EXISTS {indice} ON {tabla}",
+        f"CREATE TRIGGER {indice} AFTER INSERT OR UPDATE OF {', '.join(columnas)} OR DELETE "
+        f"ON {tabla} FOR EACH ROW EXECUTE FUNCTION {indice}()",
+        f"DELETE FROM {indice}",
+        f"INSERT INTO {indice} (id, documento) SELECT T.id, {documento('T')} FROM {tabla} T",
+    ]
+
+
+def _reinstalar(schema_editor, sufijos):
+    vendor = schema_editor.connection.vendor
+    if vendor not in ('sqlite', 'postgresql'):
+        return
+    generar = _sql_sqlite if vendor == 'sqlite' else _sql_postgres
+    for tipo, (tabla, columnas) in TIPOS.items():
+        for sentencia in generar(f'facturacion_busqueda_{tipo}', tabla, columnas, sufijos):
+            schema_editor.execute(sentencia)
+
+
+def reinstalar_con_sufijos(apps, schema_editor):
+    _reinstalar(schema_editor, sufijos=True)
+
+
+def reinstalar_sin_sufijos(apps, schema_editor):
+    _reinstalar(schema_editor, sufijos=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('facturacion', '0010_indices_y_email_unico'),
+    ]
+
+    operations = [
+        migrations.RunPython(reinstalar_con_sufijos, reinstalar_sin_sufijos),
+    ]
@@ -0,0 +1,91 @@
+from django.db import migrations
+
+# Copia congelada del índice de boletas a esta altura. En vez de todos los
+# sufijos del número (0011) indexa solo el número sin la letra, el correlativo
+# y el correlativo sin ceros, que es lo que se busca en la práctica.
+INDICE = 'facturacion_busqueda_boleta'
+TABLA = 'facturacion_boleta'
+COLUMNA = 'numero_boleta'
+SUFIJOS = [
+    'substr({}, 2)',
+    'substr({}, 8)',
+    "ltrim(substr({}, 8), '0')",
+]
+
+
+def _expresiones(prefijo, limitados):
+    columna = f'{prefijo}.{COLUMNA}'
+    if limitados:
+        sufijos = [sufijo.format(columna) for sufijo in SUFIJOS]
+    else:
+        sufijos = [f'substr({columna}, {inicio})' for inicio in range(2, 21)]
+    return [columna] + sufijos
+
+
+def _sql_sqlite(limitados):
+    def texto(prefijo):
+        return " || ' ' || ".join(
+            f"coalesce({expresion}, '')" for expresion in _expresiones(prefijo, limitados)
+        )
+    insertar = f"INSERT INTO {INDICE} (rowid, texto) VALUES (NEW.id, {texto('NEW')});"
+    borrar = f"DELETE FROM {INDICE} WHERE rowid = OLD.id;"
+    return [
+        f"DROP TRIGGER IF EXISTS {INDICE}_ai",
+        f"DROP TRIGGER IF EXISTS {INDICE}_au",
+        f"CREATE TRIGGER {INDICE}_ai AFTER INSERT ON {TABLA} BEGIN {insertar} END",
+        f"CREATE TRIGGER {INDICE}_au AFTER UPDATE OF {COLUMNA} ON {TABLA} BEGIN {borrar} {insertar} END",
+        f"DELETE FROM {INDICE}",
+        f"INSERT INTO {INDICE} (rowid, texto) SELECT T.id, {texto('T')} FROM {TABLA} T",
+        f"INSERT INTO {INDICE} ({INDICE}) VALUES ('optimize')",
+    ]
+
+
+def _sql_postgres(limitados):
+    def documento(prefijo):
+        texto = ', '.join(_expresiones(prefijo, limitados))
+        return f"to_tsvector('simple', unaccent(concat_ws(' ', {texto})))"
+    return [
+        f"""
+        CREATE OR REPLACE FUNCTION {INDICE}() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                DELETE FROM {INDICE} WHERE id = OLD.id;
+                RETURN OLD;
+            END IF;
+            INSERT INTO {INDICE} (id, documento) VALUES (NEW.id, {documento('NEW')})
+            ON CONFLICT (id) DO UPDATE SET documento = EXCLUDED.documento;
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+        f"DELETE FROM {INDICE}",
+        f"INSERT INTO {INDICE} (id, documento) SELECT T.id, {documento('T')} FROM {TABLA} T",
+    ]
+
+
+def _reinstalar(schema_editor, limitados):
+    vendor = schema_editor.connection.vendor
+    if vendor not in ('sqlite', 'postgresql'):
+        return
+    generar = _sql_sqlite if vendor == 'sqlite' else _sql_postgres
+    for sentencia in generar(limitados):
+        schema_editor.execute(sentencia)
+
+
+def limitar_sufijos(apps, schema_editor):
+    _reinstalar(schema_editor, limitados=True)
+
+
+def todos_los_sufijos(apps, schema_editor):
+    _reinstalar(schema_editor, limitados=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('facturacion', '0011_reinstalar_indice_busqueda'),
+    ]
+
+    operations = [
+        migrations.RunPython(limitar_sufijos, todos_los_sufijos),
+    ]
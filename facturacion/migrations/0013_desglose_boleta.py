@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 21:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('facturacion', '0012_sufijos_boleta_limitados'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='boleta',
+            name='desglose',
+            field=models.JSONField(blank=True, editable=False, null=True, verbose_name='Desglose del Cobro'),
+        ),
+    ]
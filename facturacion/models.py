@@ -1,5 +1,5 @@
-from django.db import models
-from django.core.validators import EmailValidator
+from django.db import models, transaction
+from django.core.validators import EmailValidator, MinValueValidator
 from django.utils import timezone
 
 
@@ -28,6 +28,9 @@ class Cliente(models.Model):
 
 class Medicion(models.Model):
     """Modelo para almacenar mediciones de consumo de agua"""
+    # Campos que alimentan ResumenMensual
+    CAMPOS_RESUMEN = ('fecha', 'consumo_m3')
+
     id = models.AutoField(primary_key=True)
     cliente = models.ForeignKey(Cliente, on_delete=models.CASCADE, verbose_name="Cliente", db_index=True)
     fecha = models.DateField(verbose_name="Fecha de Medición", db_index=True)
@@ -50,10 +53,24 @@ class Medicion(models.Model):
     def __str__(self):
         return f"{self.cliente.nombre} - {self.fecha} - {self.consumo_m3} m³"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        # Valores leídos, para actualizar el resumen mensual por diferencia
+        instancia._resumen_original = {
+            campo: instancia.__dict__[campo] for campo in cls.CAMPOS_RESUMEN if campo in instancia.__dict__
+        }
+        return instancia
+
     @property
     def monto_calculado(self):
-        """Calcula el monto basado en el consumo (500 CLP por m³)"""
-        return self.consumo_m3 * 500
+        """Calcula el monto con la tarifa vigente a la fecha de la medición, o None si no hay"""
+        from django.core.exceptions import ValidationError
+        from .tarifas import tarifario
+        try:
+            return tarifario().monto(self.consumo_m3, self.fecha)
+        except ValidationError:
+            return None
 
 
 class Boleta(models.Model):
@@ -64,6 +81,8 @@ class Boleta(models.Model):
         ('vencida', 'Vencida'),
         ('cancelada', 'Cancelada'),
     ]
+    # Campos que alimentan ResumenMensual
+    CAMPOS_RESUMEN = ('fecha_emision', 'estado', 'monto_total')
 
     id = models.AutoField(primary_key=True)
     cliente = models.ForeignKey(Cliente, on_delete=models.CASCADE, verbose_name="Cliente", db_index=True)
@@ -74,6 +93,9 @@ class Boleta(models.Model):
     estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default='pendiente', verbose_name="Estado", db_index=True)
     numero_boleta = models.CharField(max_length=20, unique=True, verbose_name="Número de Boleta", db_index=True)
     fecha_registro = models.DateTimeField(default=timezone.now, verbose_name="Fecha de Registro", db_index=True)
+    # Tarifa aplicada y líneas del cobro al emitir (tarifas.Tarifario.cobros);
+    # vacío en las boletas emitidas antes de guardarlo
+    desglose = models.JSONField(blank=True, null=True, editable=False, verbose_name="Desglose del Cobro")
 
     class Meta:
         verbose_name = "Boleta"
@@ -84,20 +106,121 @@ class Boleta(models.Model):
             models.Index(fields=['fecha_emision', 'estado']),
             models.Index(fields=['numero_boleta']),
             models.Index(fields=['fecha_vencimiento']),
+            # Filtros de lista_boletas: igualdad primero, luego el rango u orden
+            models.Index(fields=['estado', 'fecha_emision', 'id']),
+            models.Index(fields=['estado', 'fecha_vencimiento', 'id']),
+            models.Index(fields=['estado', 'monto_total', 'id']),
+            models.Index(fields=['estado', 'numero_boleta']),
+            models.Index(fields=['cliente', 'fecha_emision', 'id']),
         ]
 
     def __str__(self):
         return f"Boleta #{self.numero_boleta} - {self.cliente.nombre} - ${self.monto_total}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        # Valores leídos, para actualizar el resumen mensual por diferencia
+        instancia._resumen_original = {
+            campo: instancia.__dict__[campo] for campo in cls.CAMPOS_RESUMEN if campo in instancia.__dict__
+        }
+        return instancia
+
     def save(self, *args, **kwargs):
-        if not self.numero_boleta:
-            # Generar número de boleta automáticamente
-            import datetime
-            year = datetime.datetime.now().year
-            month = datetime.datetime.now().month
-            count = Boleta.objects.filter(fecha_emision__year=year, fecha_emision__month=month).count() + 1
-            self.numero_boleta = f"B{year}{month:02d}{count:04d}"
-        super().save(*args, **kwargs)
+        if self.numero_boleta:
+            return super().save(*args, **kwargs)
+        # Generar número de boleta automáticamente según el mes de emisión, en la
+        # misma transacción que el INSERT para no dejar saltos si este falla
+        import datetime
+        from .numeracion import formatear_numero, reservar_numeros
+        fecha = self.fecha_emision
+        if isinstance(fecha, datetime.datetime):
+            fecha = timezone.localdate(fecha)
+        with transaction.atomic():
+            self.numero_boleta = formatear_numero(fecha, reservar_numeros(fecha))
+            try:
+                super().save(*args, **kwargs)
+            except Exception:
+                self.numero_boleta = ''
+                raise
+
+
+class SecuenciaBoleta(models.Model):
+    """Último correlativo de boleta emitido en cada mes"""
+    periodo = models.CharField(max_length=6, unique=True, verbose_name="Período (AAAAMM)")
+    ultimo_numero = models.PositiveIntegerField(default=0, verbose_name="Último Número")
+
+    class Meta:
+        verbose_name = "Secuencia de Boletas"
+        verbose_name_plural = "Secuencias de Boletas"
+
+    def __str__(self):
+        return f"{self.periodo} - {self.ultimo_numero}"
+
+
+class Tarifa(models.Model):
+    """Cargo fijo y precios por tramo de consumo, vigentes desde una fecha"""
+    nombre = models.CharField(max_length=100, verbose_name="Nombre")
+    vigente_desde = models.DateField(unique=True, verbose_name="Vigente Desde")
+    cargo_fijo = models.DecimalField(max_digits=10, decimal_places=2, default=0,
+                                     validators=[MinValueValidator(0)], verbose_name="Cargo Fijo")
+
+    class Meta:
+        verbose_name = "Tarifa"
+        verbose_name_plural = "Tarifas"
+        ordering = ['-vigente_desde']
+
+    def __str__(self):
+        return f"{self.nombre} (desde {self.vigente_desde:%d/%m/%Y})"
+
+
+class TramoTarifa(models.Model):
+    """Precio por m³ del consumo que supera `desde_m3`, hasta el tramo siguiente"""
+    tarifa = models.ForeignKey(Tarifa, on_delete=models.CASCADE, related_name='tramos', verbose_name="Tarifa")
+    desde_m3 = models.DecimalField(max_digits=10, decimal_places=2, validators=[MinValueValidator(0)],
+                                   verbose_name="Desde (m³)")
+    precio_m3 = models.DecimalField(max_digits=10, decimal_places=2, validators=[MinValueValidator(0)],
+                                    verbose_name="Precio por m³")
+
+    class Meta:
+        verbose_name = "Tramo de Tarifa"
+        verbose_name_plural = "Tramos de Tarifa"
+        ordering = ['tarifa', 'desde_m3']
+        constraints = [
+            models.UniqueConstraint(fields=['tarifa', 'desde_m3'], name='tramo_tarifa_unico'),
+        ]
+
+    def __str__(self):
+        return f"Desde {self.desde_m3} m³: ${self.precio_m3}"
+
+
+class ResumenMensual(models.Model):
+    """Totales de boletas y consumo de un mes, mantenidos de forma incremental"""
+    periodo = models.CharField(max_length=6, unique=True, verbose_name="Período (AAAAMM)")
+    boletas_pendientes = models.IntegerField(default=0, verbose_name="Boletas Pendientes")
+    boletas_pagadas = models.IntegerField(default=0, verbose_name="Boletas Pagadas")
+    boletas_vencidas = models.IntegerField(default=0, verbose_name="Boletas Vencidas")
+    boletas_canceladas = models.IntegerField(default=0, verbose_name="Boletas Canceladas")
+    monto_facturado = models.DecimalField(max_digits=16, decimal_places=2, default=0, verbose_name="Monto Facturado")
+    monto_recaudado = models.DecimalField(max_digits=16, decimal_places=2, default=0, verbose_name="Monto Recaudado")
+    mediciones = models.IntegerField(default=0, verbose_name="Mediciones")
+    consumo_m3 = models.DecimalField(max_digits=16, decimal_places=2, default=0, verbose_name="Consumo (m³)")
+
+    class Meta:
+        verbose_name = "Resumen Mensual"
+        verbose_name_plural = "Resúmenes Mensuales"
+        ordering = ['periodo']
+
+    def __str__(self):
+        return f"{self.periodo} - {self.total_boletas} boletas"
+
+    @property
+    def total_boletas(self):
+        return self.boletas_pendientes + self.boletas_pagadas + self.boletas_vencidas + self.boletas_canceladas
+
+    @property
+    def mes(self):
+        return f"{self.periodo[:4]}-{self.periodo[4:]}"
 
 
 class Aviso(models.Model):
@@ -129,5 +252,102 @@ class Aviso(models.Model):
             models.Index(fields=['enviado', 'fecha']),
         ]
 
+    es_masivo = False
+
     def __str__(self):
         return f"{self.titulo} - {self.cliente.nombre}"
+
+
+class AvisoMasivo(models.Model):
+    """Aviso con un mismo contenido para muchos clientes"""
+    fecha = models.DateTimeField(default=timezone.now, verbose_name="Fecha del Aviso", db_index=True)
+    tipo_aviso = models.CharField(max_length=30, choices=Aviso.TIPO_AVISO_CHOICES, verbose_name="Tipo de Aviso", db_index=True)
+    titulo = models.CharField(max_length=200, verbose_name="Título")
+    mensaje = models.TextField(verbose_name="Mensaje")
+
+    class Meta:
+        verbose_name = "Aviso Masivo"
+        verbose_name_plural = "Avisos Masivos"
+        ordering = ['-fecha']
+
+    def __str__(self):
+        return self.titulo
+
+
+class DestinatarioAviso(models.Model):
+    """Cliente que recibe un aviso masivo"""
+    aviso = models.ForeignKey(AvisoMasivo, on_delete=models.CASCADE, related_name='destinatarios', verbose_name="Aviso")
+    cliente = models.ForeignKey(Cliente, on_delete=models.CASCADE, verbose_name="Cliente")
+    enviado = models.BooleanField(default=False, verbose_name="Enviado")
+    fecha_envio = models.DateTimeField(blank=True, null=True, verbose_name="Fecha de Envío")
+
+    es_masivo = True
+
+    class Meta:
+        verbose_name = "Destinatario de Aviso"
+        verbose_name_plural = "Destinatarios de Avisos"
+        constraints = [
+            models.UniqueConstraint(fields=['aviso', 'cliente'], name='destinatario_aviso_unico'),
+        ]
+        indexes = [
+            models.Index(fields=['cliente', 'enviado']),
+            models.Index(fields=['aviso', 'enviado']),
+        ]
+
+    def __str__(self):
+        return f"{self.aviso.titulo} - {self.cliente.nombre}"
+
+    # Mismos atributos que Aviso para mostrarlos juntos en las plantillas
+    @property
+    def titulo(self):
+        return self.aviso.titulo
+
+    @property
+    def mensaje(self):
+        return self.aviso.mensaje
+
+    @property
+    def fecha(self):
+        return self.aviso.fecha
+
+    @property
+    def tipo_aviso(self):
+        return self.aviso.tipo_aviso
+
+    def get_tipo_aviso_display(self):
+        return self.aviso.get_tipo_aviso_display()
+
+
+class CorreoSaliente(models.Model):
+    """Correo en cola, enviado en lotes por el comando enviar_correos"""
+    ESTADO_CHOICES = [
+        ('pendiente', 'Pendiente'),
+        ('enviando', 'Enviando'),
+        ('enviado', 'Enviado'),
+        ('fallido', 'Fallido'),
+    ]
+
+    destinatario = models.EmailField(verbose_name="Destinatario")
+    asunto = models.CharField(max_length=255, verbose_name="Asunto")
+    mensaje = models.TextField(verbose_name="Mensaje")
+    boleta = models.ForeignKey(Boleta, on_delete=models.CASCADE, blank=True, null=True, verbose_name="Boleta")
+    aviso = models.ForeignKey(Aviso, on_delete=models.CASCADE, blank=True, null=True, verbose_name="Aviso")
+    destinatario_aviso = models.ForeignKey(DestinatarioAviso, on_delete=models.CASCADE, blank=True, null=True,
+                                           verbose_name="Destinatario de Aviso Masivo")
+    estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default='pendiente', verbose_name="Estado")
+    intentos = models.PositiveSmallIntegerField(default=0, verbose_name="Intentos")
+    proximo_intento = models.DateTimeField(default=timezone.now, verbose_name="Próximo Intento")
+    ultimo_error = models.TextField(blank=True, null=True, verbose_name="Último Error")
+    fecha_creacion = models.DateTimeField(default=timezone.now, verbose_name="Fecha de Creación")
+    fecha_envio = models.DateTimeField(blank=True, null=True, verbose_name="Fecha de Envío")
+
+    class Meta:
+        verbose_name = "Correo Saliente"
+        verbose_name_plural = "Correos Salientes"
+        ordering = ['-fecha_creacion']
+        indexes = [
+            models.Index(fields=['estado', 'proximo_intento']),
+        ]
+
+    def __str__(self):
+        return f"{self.asunto} - {self.destinatario} ({self.get_estado_display()})"
@@ -0,0 +1,113 @@
+"""
+Numeración correlativa de boletas por mes de emisión.
+
+Cada mes tiene una fila en SecuenciaBoleta que se incrementa de forma atómica,
+de modo que obtener un número no depende del volumen de boletas emitidas y
+varios workers pueden emitir a la vez sin repetir números.
+"""
+
+from contextlib import contextmanager
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+
+from .models import Boleta, SecuenciaBoleta
+
+
+def periodo_de(fecha):
+    return f"{fecha.year}{fecha.month:02d}"
+
+
+def formatear_numero(fecha, correlativo):
+    return f"B{periodo_de(fecha)}{correlativo:04d}"
+
+
+def reservar_numeros(fecha, cantidad=1):
+    """
+    Reserva `cantidad` correlativos consecutivos del mes de `fecha`.
+
+    Devuelve el primero del bloque; el resto son los siguientes enteros.
+    """
+    periodo = periodo_de(fecha)
+    if connection.vendor == 'sqlite' and not connection.in_atomic_block:
+        with _transaccion_inmediata():
+            return _incrementar(periodo, cantidad)
+    # Sin savepoint propio: si algo falla, la excepción deshace la transacción
+    # de quien llama junto con el número
+    with transaction.atomic(savepoint=False):
+        return _incrementar(periodo, cantidad)
+
+
+def _incrementar(periodo, cantidad):
+    # El UPDATE es la primera sentencia: toma el bloqueo de la fila (PostgreSQL)
+    # o de escritura (SQLite) antes de leer el valor.
+    ultimo = _sumar(periodo, cantidad)
+    if ultimo is None:
+        ultimo = _crear_secuencia(periodo, cantidad)
+    return ultimo - cantidad + 1
+
+
+def _devuelve_filas_actualizadas():
+    if connection.vendor == 'sqlite':
+        return connection.Database.sqlite_version_info >= (3, 35)
+    return connection.vendor == 'postgresql'
+
+
+def _sumar(periodo, cantidad):
+    """Suma `cantidad` a la secuencia del período y devuelve su último número, o None si no existe"""
+    if not _devuelve_filas_actualizadas():
+        secuencia = SecuenciaBoleta.objects.filter(periodo=periodo)
+        if not secuencia.update(ultimo_numero=F('ultimo_numero') + cantidad):
+            return None
+        return secuencia.values_list('ultimo_numero', flat=True).get()
+    q = connection.ops.quote_name
+    # UPDATE ... RETURNING: incrementa y lee en una sola consulta
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {q(SecuenciaBoleta._meta.db_table)} SET {q('ultimo_numero')} = {q('ultimo_numero')} + %s "
+            f"WHERE {q('periodo')} = %s RETURNING {q('ultimo_numero')}",
+            [cantidad, periodo],
+        )
+        fila = cursor.fetchone()
+    return fila[0] if fila else None
+
+
+def _crear_secuencia(periodo, cantidad):
+    """Crea la secuencia del período ya con los `cantidad` números reservados"""
+    secuencia = SecuenciaBoleta(periodo=periodo, ultimo_numero=_ultimo_emitido(periodo) + cantidad)
+    if connection.in_atomic_block:
+        try:
+            with transaction.atomic():
+                secuencia.save(force_insert=True)
+        except IntegrityError:
+            return _sumar(periodo, cantidad)  # Otro worker la creó primero
+    else:
+        # Dentro de BEGIN IMMEDIATE nadie más puede estar escribiendo
+        secuencia.save(force_insert=True)
+    return secuencia.ultimo_numero
+
+
+def _ultimo_emitido(periodo):
+    """Mayor correlativo ya usado en el período (solo al crear la secuencia)"""
+    prefijo = f"B{periodo}"
+    numeros = Boleta.objects.filter(
+        numero_boleta__startswith=prefijo
+    ).order_by().values_list('numero_boleta', flat=True)
+    sufijos = (numero[len(prefijo):] for numero in numeros)
+    return max((int(s) for s in sufijos if s.isdigit()), default=0)
+
+
+@contextmanager
+def _transaccion_inmediata():
+    """Transacción SQLite que toma el bloqueo de escritura al comenzar"""
+    with connection.cursor() as cursor:
+        cursor.execute('BEGIN IMMEDIATE')
+    try:
+        yield
+    except BaseException:
+        with connection.cursor() as cursor:
+            cursor.execute('ROLLBACK')
+        raise
+    else:
+        with connection.cursor() as cursor:
+            cursor.execute('COMMIT')
@@ -0,0 +1,148 @@
+"""
+Paginación por cursor (keyset) para los listados.
+
+En vez de OFFSET, cada página pide las filas que siguen a la última mostrada
+según el orden del listado (WHERE fecha < %s OR (fecha = %s AND id < %s)),
+por lo que una página profunda recorre el índice igual que la primera. El id
+desempata filas con el mismo valor. El cursor viaja en el query string como
+base64 de los valores de la fila límite; un cursor alterado o inválido
+muestra la primera página.
+"""
+
+import base64
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+TAMANO = getattr(settings, 'PAGINACION_TAMANO', 50)
+TAMANO_MAXIMO = getattr(settings, 'PAGINACION_TAMANO_MAXIMO', 200)
+
+
+class Pagina:
+    """Filas de una página y los enlaces a la anterior y la siguiente"""
+
+    def __init__(self, objetos, tamano, url_anterior=None, url_siguiente=None):
+        self.objetos = objetos
+        self.tamano = tamano
+        self.url_anterior = url_anterior
+        self.url_siguiente = url_siguiente
+
+    def __iter__(self):
+        return iter(self.objetos)
+
+    def __len__(self):
+        return len(self.objetos)
+
+    def __bool__(self):
+        return bool(self.objetos)
+
+    @property
+    def tiene_otras(self):
+        return bool(self.url_anterior or self.url_siguiente)
+
+
+def _campos(orden):
+    """'-fecha' -> ('fecha', True)"""
+    return [(campo.lstrip('-'), campo.startswith('-')) for campo in orden]
+
+
+def posteriores(campos, valores):
+    """Condición para las filas que van después de `valores` en el orden dado"""
+    condicion = Q()
+    for i, (campo, descendente) in enumerate(campos):
+        iguales = {nombre: valor for (nombre, _), valor in zip(campos[:i], valores)}
+        operador = 'lt' if descendente else 'gt'
+        condicion |= Q(**iguales, **{f'{campo}__{operador}': valores[i]})
+    # Cota simple sobre el primer campo para que el índice se busque por rango
+    # en vez de recorrerse desde el principio
+    campo, descendente = campos[0]
+    return Q(**{f"{campo}__{'lte' if descendente else 'gte'}": valores[0]}) & condicion
+
+
+def _codificar(direccion, objeto, campos):
+    valores = [getattr(objeto, campo) for campo, _ in campos]
+    datos = json.dumps({'d': direccion, 'v': valores}, default=str)
+    return base64.urlsafe_b64encode(datos.encode()).decode().rstrip('=')
+
+
+def _decodificar(cursor, modelo, campos):
+    """Dirección y valores del cursor, o (None, None) si falta o no es válido"""
+    if not cursor:
+        return None, None
+    try:
+        datos = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        valores = [_valor(modelo._meta.get_field(campo), valor) for (campo, _), valor in zip(campos, datos['v'])]
+        if datos['d'] not in ('siguiente', 'anterior') or len(valores) != len(campos):
+            return None, None
+        return datos['d'], valores
+    except (ValueError, TypeError, KeyError, ValidationError):
+        return None, None
+
+
+def _valor(campo, valor):
+    """Valor del cursor convertido al tipo del campo; el cursor viene del cliente y puede estar alterado"""
+    valor = campo.to_python(valor)
+    if valor is None:
+        raise ValidationError('El cursor no puede tener valores nulos.')
+    # SQLite no declara rangos para los enteros: se limita a 64 bits aquí
+    if isinstance(valor, int) and not -2 ** 63 <= valor < 2 ** 63:
+        raise ValidationError('Entero fuera de rango en el cursor.')
+    # Los validadores del campo rechazan decimales no finitos o con más
+    # dígitos de los que caben, y enteros fuera del rango del motor
+    campo.run_validators(valor)
+    return valor
+
+
+def _tamano(request, tamano):
+    try:
+        tamano = int(request.GET.get('por_pagina', tamano))
+    except ValueError:
+        pass
+    return max(1, min(tamano, TAMANO_MAXIMO))
+
+
+def _url(request, cursor):
+    parametros = request.GET.copy()
+    parametros.pop('cursor', None)
+    if cursor:
+        parametros['cursor'] = cursor
+    return f'?{parametros.urlencode()}'
+
+
+def paginar(request, queryset, orden, tamano=TAMANO):
+    """
+    Página del queryset indicada por el parámetro `cursor` del request.
+
+    `orden` debe terminar en un campo único (normalmente 'id' o '-id') y
+    coincidir con un índice. El tamaño se toma de `por_pagina` si viene.
+    """
+    tamano = _tamano(request, tamano)
+    campos = _campos(orden)
+    direccion, valores = _decodificar(request.GET.get('cursor'), queryset.model, campos)
+
+    if direccion == 'anterior':
+        # Se recorre al revés desde el cursor y se devuelve en el orden normal
+        invertidos = [(campo, not descendente) for campo, descendente in campos]
+        orden_inverso = [('-' if descendente else '') + campo for campo, descendente in invertidos]
+        filas = list(queryset.filter(posteriores(invertidos, valores)).order_by(*orden_inverso)[:tamano + 1])
+        hay_anterior = len(filas) > tamano
+        filas = filas[:tamano][::-1]
+        hay_siguiente = True
+    else:
+        if valores:
+            queryset = queryset.filter(posteriores(campos, valores))
+        filas = list(queryset.order_by(*orden)[:tamano + 1])
+        hay_siguiente = len(filas) > tamano
+        filas = filas[:tamano]
+        hay_anterior = valores is not None
+
+    if not filas:
+        return Pagina(filas, tamano, _url(request, None) if valores else None)
+    return Pagina(
+        filas,
+        tamano,
+        url_anterior=_url(request, _codificar('anterior', filas[0], campos)) if hay_anterior else None,
+        url_siguiente=_url(request, _codificar('siguiente', filas[-1], campos)) if hay_siguiente else None,
+    )
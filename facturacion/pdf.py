@@ -0,0 +1,152 @@
+"""
+Generación del PDF de una boleta con ReportLab.
+
+Trabaja sobre el diccionario que entrega pdf_cache.datos_boleta y no accede a
+la base de datos, por lo que puede ejecutarse en procesos separados. Los
+estilos se construyen una sola vez por proceso.
+"""
+
+from datetime import date
+from decimal import Decimal
+from io import BytesIO
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.pdfgen import canvas
+from reportlab.platypus import Frame, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+ESTILOS = getSampleStyleSheet()
+ESTILO_TITULO = ParagraphStyle(
+    'CustomTitle',
+    parent=ESTILOS['Heading1'],
+    fontSize=18,
+    spaceAfter=30,
+    alignment=1,  # Centrado
+)
+
+_COMANDOS_TABLA = [
+    ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
+    ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+    ('BACKGROUND', (1, 0), (1, -1), colors.beige),
+]
+ESTILO_TABLA = TableStyle(_COMANDOS_TABLA)
+# La última fila es el monto total
+ESTILO_TABLA_CONSUMO = TableStyle(_COMANDOS_TABLA + [
+    ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, -1), (-1, -1), 12),
+])
+ANCHOS_COLUMNA = [2 * inch, 3 * inch]
+
+
+def _fecha(iso):
+    return date.fromisoformat(iso).strftime('%d/%m/%Y')
+
+
+def _pesos(valor):
+    return f"${Decimal(valor):,.2f} CLP"
+
+
+def _filas_tarifa(desglose):
+    if desglose is None:
+        return [['Tarifa:', 'Desglose no registrado']]
+    filas = []
+    for descripcion, m3, precio, subtotal in desglose:
+        if m3 is None:
+            filas.append([f'{descripcion}:', _pesos(subtotal)])
+        else:
+            filas.append([f'{descripcion}:', f"{m3} m³ × ${Decimal(precio):,.2f} = {_pesos(subtotal)}"])
+    return filas
+
+
+def _tabla(filas, estilo=ESTILO_TABLA):
+    tabla = Table(filas, colWidths=ANCHOS_COLUMNA)
+    tabla.setStyle(estilo)
+    return tabla
+
+
+def historia_boleta(datos):
+    """Elementos (flowables) que componen el documento de una boleta"""
+    story = []
+
+    # Título
+    story.append(Paragraph("PRUEBA", ESTILO_TITULO))
+    story.append(Paragraph("Sistema de Facturación", ESTILOS['Heading2']))
+    story.append(Spacer(1, 20))
+
+    # Información de la boleta
+    story.append(_tabla([
+        ['Número de Boleta:', datos['numero_boleta']],
+        ['Fecha de Emisión:', _fecha(datos['fecha_emision'])],
+        ['Fecha de Vencimiento:', _fecha(datos['fecha_vencimiento'])],
+        ['Estado:', datos['estado']],
+    ]))
+    story.append(Spacer(1, 20))
+
+    # Información del cliente
+    story.append(Paragraph("DATOS DEL CLIENTE", ESTILOS['Heading2']))
+    story.append(_tabla([
+        ['Nombre:', datos['cliente_nombre']],
+        ['Dirección:', datos['cliente_direccion']],
+        ['Email:', datos['cliente_email']],
+        ['Teléfono:', datos['cliente_telefono'] or 'No registrado'],
+    ]))
+    story.append(Spacer(1, 20))
+
+    # Detalles de la medición
+    story.append(Paragraph("DETALLES DE CONSUMO", ESTILOS['Heading2']))
+    story.append(_tabla([
+        ['Fecha de Medición:', _fecha(datos['medicion_fecha'])],
+        ['Consumo (m³):', f"{datos['medicion_consumo_m3']} m³"],
+        *_filas_tarifa(datos['tarifa']),
+        ['Monto Total:', _pesos(datos['monto_total'])],
+    ], ESTILO_TABLA_CONSUMO))
+    story.append(Spacer(1, 30))
+
+    # Pie de página
+    story.append(Paragraph("Gracias por su preferencia", ESTILOS['Normal']))
+    story.append(Paragraph("Prueba - Sistema de Facturación", ESTILOS['Normal']))
+    return story
+
+
+def renderizar_boleta(datos):
+    """Contenido en bytes del PDF de una boleta"""
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    doc.build(historia_boleta(datos))
+    return buffer.getvalue()
+
+
+def renderizar_lote(lista_datos, destino, progreso=None):
+    """
+    Escribe en `destino` (ruta o archivo) un solo PDF con todas las boletas.
+
+    Cada boleta se dibuja en su propia página con el mismo diseño que
+    renderizar_boleta, compartiendo estilos y fuentes entre páginas. Los
+    elementos de una página se descartan apenas se dibuja, de modo que solo
+    se retiene el contenido ya comprimido de las páginas.
+    """
+    ancho, alto = letter
+    lienzo = canvas.Canvas(destino, pagesize=letter, pageCompression=1)
+    boletas = paginas = 0
+    for datos in lista_datos:
+        story = historia_boleta(datos)
+        while story:
+            # Mismo marco que SimpleDocTemplate con sus márgenes por defecto
+            marco = Frame(inch, inch, ancho - 2 * inch, alto - 2 * inch)
+            pendientes = len(story)
+            marco.addFromList(story, lienzo)
+            if len(story) == pendientes:
+                raise ValueError(f"La boleta {datos['numero_boleta']} no cabe en una página")
+            lienzo.showPage()
+            paginas += 1
+        boletas += 1
+        if progreso:
+            progreso(boletas, paginas)
+    lienzo.save()
+    return paginas
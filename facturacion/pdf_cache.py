@@ -0,0 +1,152 @@
+"""
+Caché en disco de los PDF de boletas.
+
+Cada archivo se identifica por un hash de los datos que aparecen en el
+documento (incluida la tarifa con que se emitió la boleta), de modo que un
+cambio en la boleta, el cliente o la medición produce otra clave y nunca se
+sirve un PDF desactualizado. El tamaño total se limita eliminando los
+archivos usados hace más tiempo.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import tempfile
+
+from django.conf import settings
+
+from .pdf import renderizar_boleta
+
+# Aumentar cuando cambie el diseño del PDF para descartar lo ya generado
+PLANTILLA_VERSION = 3
+TAMANO_MAXIMO = getattr(settings, 'BOLETA_PDF_CACHE_BYTES', 200 * 1024 * 1024)
+REVISION_CADA = 100
+
+_escrituras = 0
+
+
+def directorio():
+    return os.path.join(settings.MEDIA_ROOT, 'pdfs', 'boletas')
+
+
+def datos_boleta(boleta):
+    """Campos de la boleta, el cliente y la medición que se imprimen en el PDF"""
+    cliente = boleta.cliente
+    medicion = boleta.medicion
+    # El desglose guardado al emitir, no el de las tarifas actuales, para que
+    # cuadre con monto_total aunque las tarifas cambien después
+    desglose = boleta.desglose or {'tarifa': None, 'lineas': None}
+    return {
+        'numero_boleta': boleta.numero_boleta,
+        'fecha_emision': boleta.fecha_emision.isoformat(),
+        'fecha_vencimiento': boleta.fecha_vencimiento.isoformat(),
+        'estado': boleta.get_estado_display(),
+        'monto_total': str(boleta.monto_total),
+        'cliente_nombre': cliente.nombre,
+        'cliente_direccion': cliente.direccion,
+        'cliente_email': cliente.email,
+        'cliente_telefono': cliente.telefono or '',
+        'medicion_fecha': medicion.fecha.isoformat(),
+        'medicion_consumo_m3': str(medicion.consumo_m3),
+        'tarifa_vigente_desde': desglose['tarifa'],
+        'tarifa': desglose['lineas'],
+    }
+
+
+def clave(datos):
+    contenido = json.dumps({'version': PLANTILLA_VERSION, **datos}, sort_keys=True)
+    return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+
+def _carpeta(boleta_id):
+    # Repartir en subcarpetas para que invalidar no recorra todo el caché
+    return os.path.join(directorio(), f"{boleta_id % 256:02x}")
+
+
+def _ruta(boleta_id, datos):
+    return os.path.join(_carpeta(boleta_id), f"{boleta_id}-{clave(datos)}.pdf")
+
+
+def existe(boleta_id, datos):
+    return os.path.exists(_ruta(boleta_id, datos))
+
+
+def leer(boleta_id, datos):
+    """Contenido del PDF en caché, o None si no existe"""
+    ruta = _ruta(boleta_id, datos)
+    try:
+        with open(ruta, 'rb') as archivo:
+            contenido = archivo.read()
+        os.utime(ruta)  # Marca de uso para la expulsión LRU
+    except FileNotFoundError:
+        return None
+    return contenido
+
+
+def guardar(boleta_id, datos, contenido):
+    """Guarda el PDF de forma atómica y reemplaza versiones anteriores de la boleta"""
+    global _escrituras
+
+    invalidar([boleta_id])
+    carpeta = _carpeta(boleta_id)
+    os.makedirs(carpeta, exist_ok=True)
+    descriptor, temporal = tempfile.mkstemp(dir=carpeta, suffix='.tmp')
+    with os.fdopen(descriptor, 'wb') as archivo:
+        archivo.write(contenido)
+    os.replace(temporal, _ruta(boleta_id, datos))
+
+    _escrituras += 1
+    if _escrituras % REVISION_CADA == 0:
+        recortar()
+
+
+def pdf_boleta(boleta):
+    """PDF de la boleta desde el caché, generándolo solo si hace falta"""
+    datos = datos_boleta(boleta)
+    contenido = leer(boleta.id, datos)
+    if contenido is None:
+        contenido = renderizar_boleta(datos)
+        guardar(boleta.id, datos, contenido)
+    return contenido
+
+
+def invalidar(boleta_ids):
+    """Elimina los PDF en caché de las boletas indicadas"""
+    for boleta_id in boleta_ids:
+        for ruta in glob.glob(os.path.join(_carpeta(boleta_id), f"{boleta_id}-*.pdf")):
+            try:
+                os.remove(ruta)
+            except FileNotFoundError:
+                pass
+
+
+def recortar(tamano_maximo=None):
+    """Elimina los PDF menos usados hasta quedar bajo el tamaño máximo"""
+    tamano_maximo = TAMANO_MAXIMO if tamano_maximo is None else tamano_maximo
+    archivos = []
+    total = 0
+    for ruta in glob.glob(os.path.join(directorio(), '*', '*.pdf')):
+        try:
+            estado = os.stat(ruta)
+        except FileNotFoundError:
+            continue
+        archivos.append((estado.st_mtime, estado.st_size, ruta))
+        total += estado.st_size
+
+    if total <= tamano_maximo:
+        return 0
+
+    eliminados = 0
+    # Dejar margen para no recortar en cada escritura
+    objetivo = tamano_maximo * 0.9
+    for _, tamano, ruta in sorted(archivos):
+        if total <= objetivo:
+            break
+        try:
+            os.remove(ruta)
+        except FileNotFoundError:
+            continue
+        total -= tamano
+        eliminados += 1
+    return eliminados
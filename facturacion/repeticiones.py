@@ -0,0 +1,102 @@
+"""
+Detección de consultas repetidas (N+1) dentro de una solicitud.
+
+Un execute_wrapper cuenta las sentencias por huella de SQL (ver
+consultas.huella). Cuando una huella llega a CONSULTAS_REPETIDAS_UMBRAL
+ejecuciones se guarda dónde ocurrió: la línea de la plantilla que se estaba
+renderizando, si la hay, y la última línea de código del proyecto en la pila.
+Suele ser un bucle que lee una relación sin select_related o prefetch_related.
+
+RepeticionesMiddleware lo usa en desarrollo (CONSULTAS_REPETIDAS) y
+tests/test_presupuesto_consultas.py al revisar todas las URLs.
+"""
+
+import logging
+import os
+import re
+import sys
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+from .consultas import huella
+
+logger = logging.getLogger('facturacion.consultas_repetidas')
+
+UMBRAL = 5
+# Control de transacciones: se repite en cualquier vista con varios atomic()
+_CONTROL = re.compile(r'\s*(BEGIN|COMMIT|ROLLBACK|SAVEPOINT|RELEASE)\b', re.IGNORECASE)
+# Los wrappers de consultas y los middleware están en la pila de todas las consultas
+_OMITIDOS = {
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), nombre)
+    for nombre in ('repeticiones.py', 'consultas.py', 'metricas.py', 'middleware.py')
+}
+
+
+def ubicacion(marcos=3):
+    """Plantilla y últimas líneas de código del proyecto desde donde se ejecuta la consulta actual"""
+    base = os.path.abspath(settings.BASE_DIR)
+    plantilla = None
+    codigo = []
+    marco = sys._getframe(1)
+    while marco is not None and len(codigo) < marcos:
+        archivo = os.path.abspath(marco.f_code.co_filename)
+        if plantilla is None and marco.f_code.co_name == 'render_annotated' and archivo.endswith(
+                os.path.join('django', 'template', 'base.py')):
+            # Nodo de la plantilla más interno: trae su origen y su línea
+            nodo = marco.f_locals.get('self')
+            origen = getattr(nodo, 'origin', None)
+            if origen is not None and getattr(nodo, 'token', None) is not None:
+                plantilla = f'plantilla {origen.template_name or origen.name}:{nodo.token.lineno}'
+        elif archivo.startswith(base) and archivo not in _OMITIDOS and 'site-packages' not in archivo:
+            codigo.append(f'{os.path.relpath(archivo, base)}:{marco.f_lineno} en {marco.f_code.co_name}')
+        marco = marco.f_back
+    lugares = ([plantilla] if plantilla else []) + ([' ← '.join(codigo)] if codigo else [])
+    return ', '.join(lugares) or 'ubicación desconocida'
+
+
+class Repeticiones:
+    """execute_wrapper que cuenta las sentencias por huella"""
+
+    def __init__(self, umbral=None):
+        self.umbral = umbral or getattr(settings, 'CONSULTAS_REPETIDAS_UMBRAL', UMBRAL)
+        self.total = 0
+        self.cantidades = {}
+        self.ubicaciones = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        self.total += 1
+        if not _CONTROL.match(sql):
+            clave = huella(sql)
+            cantidad = self.cantidades[clave] = self.cantidades.get(clave, 0) + 1
+            if cantidad == self.umbral:
+                self.ubicaciones[clave] = ubicacion()
+        return execute(sql, params, many, context)
+
+    def repetidas(self):
+        """[(huella, veces, ubicación)] de las que alcanzaron el umbral, la más repetida primero"""
+        return sorted(
+            ((sql, self.cantidades[sql], lugar) for sql, lugar in self.ubicaciones.items()),
+            key=lambda fila: -fila[1],
+        )
+
+
+@contextmanager
+def detectar(umbral=None):
+    """Cuenta las consultas de todas las conexiones mientras dura el bloque"""
+    detector = Repeticiones(umbral)
+    conexiones = connections.all()
+    for conexion in conexiones:
+        conexion.execute_wrappers.append(detector)
+    try:
+        yield detector
+    finally:
+        for conexion in conexiones:
+            conexion.execute_wrappers.remove(detector)
+
+
+def avisar(vista, detector):
+    """Escribe un aviso por cada huella repetida en el logger de consultas repetidas"""
+    for sql, veces, lugar in detector.repetidas():
+        logger.warning('%s: %d consultas iguales (posible N+1) en %s\n  %s', vista, veces, lugar, sql)
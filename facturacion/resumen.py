@@ -0,0 +1,195 @@
+"""
+Resumen mensual de boletas y consumo.
+
+ResumenMensual se mantiene por diferencias: cada vez que se guarda o elimina
+una Boleta o Medicion se resta su aporte anterior y se suma el nuevo con un
+UPDATE ... SET campo = campo + delta. Las escrituras masivas que no disparan
+señales (bulk_create) deben llamar a `aplicar` explícitamente; `reconstruir`
+recalcula todo desde las tablas originales. Dentro de `acumulando()` los
+cambios se juntan y se aplican una sola vez al salir, para los borrados en
+cascada que disparan una señal por fila.
+"""
+
+import datetime
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import Boleta, Medicion, ResumenMensual
+from .numeracion import periodo_de
+
+CAMPO_ESTADO = {
+    'pendiente': 'boletas_pendientes',
+    'pagada': 'boletas_pagadas',
+    'vencida': 'boletas_vencidas',
+    'cancelada': 'boletas_canceladas',
+}
+
+_hilo = threading.local()
+
+
+def _fecha(valor):
+    if isinstance(valor, datetime.datetime):
+        return timezone.localdate(valor)
+    return valor
+
+
+def cambios_boleta(valores, signo=1):
+    """Aporte de una boleta al resumen de su mes de emisión"""
+    monto = Decimal(valores['monto_total'] or 0) * signo
+    cambios = {CAMPO_ESTADO[valores['estado']]: signo, 'monto_facturado': monto}
+    if valores['estado'] == 'pagada':
+        cambios['monto_recaudado'] = monto
+    return periodo_de(_fecha(valores['fecha_emision'])), cambios
+
+
+def cambios_medicion(valores, signo=1):
+    """Aporte de una medición al resumen de su mes"""
+    return periodo_de(_fecha(valores['fecha'])), {
+        'mediciones': signo,
+        'consumo_m3': Decimal(valores['consumo_m3'] or 0) * signo,
+    }
+
+
+CAMBIOS = {
+    Boleta: cambios_boleta,
+    Medicion: cambios_medicion,
+}
+
+
+def aplicar(cambios):
+    """Suma al resumen una lista de (periodo, {campo: delta})"""
+    pendientes = getattr(_hilo, 'pendientes', None)
+    if pendientes is not None:
+        pendientes.extend(cambios)
+        return
+    por_periodo = defaultdict(lambda: defaultdict(int))
+    for periodo, deltas in cambios:
+        for campo, delta in deltas.items():
+            por_periodo[periodo][campo] += delta
+
+    # Sin savepoint propio: si algo falla, la excepción deshace la transacción
+    # de quien llama junto con la escritura que originó el cambio
+    with transaction.atomic(savepoint=False):
+        for periodo, deltas in sorted(por_periodo.items()):
+            deltas = {campo: delta for campo, delta in deltas.items() if delta}
+            if not deltas:
+                continue
+            fila = ResumenMensual.objects.filter(periodo=periodo)
+            incrementos = {campo: F(campo) + delta for campo, delta in deltas.items()}
+            if fila.update(**incrementos):
+                continue
+            try:
+                with transaction.atomic():
+                    ResumenMensual.objects.create(periodo=periodo, **deltas)
+            except IntegrityError:
+                fila.update(**incrementos)  # Otro proceso creó el mes primero
+
+
+@contextmanager
+def acumulando():
+    """Junta los cambios que se apliquen dentro del bloque y los aplica juntos al salir"""
+    if getattr(_hilo, 'pendientes', None) is not None:
+        yield
+        return
+    _hilo.pendientes = pendientes = []
+    try:
+        yield
+    finally:
+        _hilo.pendientes = None
+    aplicar(pendientes)
+
+
+def _valores(instancia):
+    return {campo: getattr(instancia, campo) for campo in instancia.CAMPOS_RESUMEN}
+
+
+def cambios_de(instancia, signo=1):
+    """Aporte al resumen de una Boleta o Medicion con sus valores actuales"""
+    return CAMBIOS[type(instancia)](_valores(instancia), signo)
+
+
+def _originales(instancia):
+    """Valores con que la instancia está guardada, o None si es nueva"""
+    originales = getattr(instancia, '_resumen_original', {})
+    if len(originales) == len(instancia.CAMPOS_RESUMEN):
+        return originales
+    if instancia.pk is None:
+        return None
+    # Instancia cargada con .only() o construida a mano: se consulta la fila
+    return type(instancia)._base_manager.filter(pk=instancia.pk).values(*instancia.CAMPOS_RESUMEN).first()
+
+
+def antes_de_guardar(instancia):
+    instancia._resumen_anterior = _originales(instancia)
+
+
+def despues_de_guardar(instancia):
+    calcular = CAMBIOS[type(instancia)]
+    actuales = _valores(instancia)
+    cambios = [calcular(actuales)]
+    anteriores = instancia.__dict__.pop('_resumen_anterior', None)
+    if anteriores:
+        cambios.append(calcular(anteriores, -1))
+    aplicar(cambios)
+    instancia._resumen_original = actuales
+
+
+def despues_de_eliminar(instancia):
+    valores = getattr(instancia, '_resumen_original', {})
+    if len(valores) != len(instancia.CAMPOS_RESUMEN):
+        valores = _valores(instancia)
+    aplicar([CAMBIOS[type(instancia)](valores, -1)])
+
+
+def reconstruir():
+    """Recalcula el resumen de todos los meses; devuelve la cantidad de meses"""
+    resumenes = defaultdict(dict)
+    boletas = Boleta.objects.order_by().annotate(mes=TruncMonth('fecha_emision')).values('mes').annotate(
+        boletas_pendientes=Count('id', filter=Q(estado='pendiente')),
+        boletas_pagadas=Count('id', filter=Q(estado='pagada')),
+        boletas_vencidas=Count('id', filter=Q(estado='vencida')),
+        boletas_canceladas=Count('id', filter=Q(estado='cancelada')),
+        monto_facturado=Sum('monto_total'),
+        monto_recaudado=Sum('monto_total', filter=Q(estado='pagada')),
+    )
+    mediciones = Medicion.objects.order_by().annotate(mes=TruncMonth('fecha')).values('mes').annotate(
+        mediciones=Count('id'),
+        consumo_m3=Sum('consumo_m3'),
+    )
+    for fila in [*boletas, *mediciones]:
+        mes = fila.pop('mes')
+        resumenes[periodo_de(mes)].update({campo: valor or 0 for campo, valor in fila.items()})
+
+    with transaction.atomic():
+        ResumenMensual.objects.all().delete()
+        ResumenMensual.objects.bulk_create(
+            ResumenMensual(periodo=periodo, **valores) for periodo, valores in sorted(resumenes.items())
+        )
+    return len(resumenes)
+
+
+def totales():
+    """Totales históricos sumando los meses del resumen"""
+    totales = ResumenMensual.objects.aggregate(
+        boletas_pendientes=Sum('boletas_pendientes'),
+        boletas_pagadas=Sum('boletas_pagadas'),
+        boletas_vencidas=Sum('boletas_vencidas'),
+        boletas_canceladas=Sum('boletas_canceladas'),
+        monto_facturado=Sum('monto_facturado'),
+        monto_recaudado=Sum('monto_recaudado'),
+        mediciones=Sum('mediciones'),
+        consumo_m3=Sum('consumo_m3'),
+    )
+    return {campo: valor or 0 for campo, valor in totales.items()}
+
+
+def ultimos_meses(desde):
+    """Resumen de los meses a partir de la fecha `desde`"""
+    return ResumenMensual.objects.filter(periodo__gte=periodo_de(desde))
@@ -0,0 +1,66 @@
+"""
+Señales de la aplicación de facturación.
+"""
+
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import consultas, contadores, pdf_cache, resumen, tarifas
+from .models import Aviso, Boleta, Cliente, Medicion, Tarifa, TramoTarifa
+
+
+@receiver([post_save, post_delete], sender=Boleta)
+def invalidar_pdf_boleta(sender, instance, **kwargs):
+    pdf_cache.invalidar([instance.id])
+
+
+@receiver(post_save, sender=Cliente)
+def invalidar_pdf_cliente(sender, instance, created, **kwargs):
+    if not created:
+        pdf_cache.invalidar(Boleta.objects.filter(cliente_id=instance.id).values_list('id', flat=True))
+
+
+@receiver(post_save, sender=Medicion)
+def invalidar_pdf_medicion(sender, instance, created, **kwargs):
+    if not created:
+        pdf_cache.invalidar(Boleta.objects.filter(medicion_id=instance.id).values_list('id', flat=True))
+
+
+@receiver(pre_save, sender=Boleta)
+@receiver(pre_save, sender=Medicion)
+def recordar_resumen(sender, instance, **kwargs):
+    resumen.antes_de_guardar(instance)
+
+
+@receiver(post_save, sender=Boleta)
+@receiver(post_save, sender=Medicion)
+def actualizar_resumen(sender, instance, **kwargs):
+    resumen.despues_de_guardar(instance)
+
+
+@receiver(post_delete, sender=Boleta)
+@receiver(post_delete, sender=Medicion)
+def descontar_resumen(sender, instance, **kwargs):
+    resumen.despues_de_eliminar(instance)
+
+
+@receiver([post_save, post_delete], sender=Cliente)
+@receiver([post_save, post_delete], sender=Boleta)
+@receiver([post_save, post_delete], sender=Aviso)
+@receiver([post_save, post_delete], sender=Medicion)
+def invalidar_contadores(sender, instance, **kwargs):
+    contadores.invalidar(sender)
+
+
+@receiver([post_save, post_delete], sender=Tarifa)
+@receiver([post_save, post_delete], sender=TramoTarifa)
+def invalidar_tarifario(sender, instance, **kwargs):
+    transaction.on_commit(tarifas.invalidar)
+
+
+@receiver(connection_created)
+def medir_consultas(sender, connection, **kwargs):
+    if consultas.activo():
+        consultas.instalar(connection)
@@ -0,0 +1,194 @@
+"""
+Simulación del impacto de un cambio de tarifa sobre la facturación pasada.
+
+El historial de boletas de un período (cliente, fecha y consumo de la
+medición, monto facturado) se lee una sola vez en arreglos de NumPy y se
+guarda en memoria. Cada escenario es una tarifa candidata que se aplica a
+todos los consumos con Tarifario.montos_centavos; los montos se suman por
+cliente con np.bincount y se comparan con lo que se facturó. Así comparar
+varios escenarios toma milisegundos aunque el historial tenga millones de
+boletas.
+"""
+
+import time
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+import numpy as np
+from django.core.exceptions import ValidationError
+from django.db.models import F, IntegerField
+from django.db.models.functions import Cast, Round
+from django.utils import timezone
+
+from .models import Boleta, Cliente
+from .tarifas import CENTAVO, Tarifario
+
+MESES = 12
+# Cada cuánto se vuelve a leer el historial en un proceso, en segundos
+VIGENCIA_CACHE = 5 * 60
+TAMANO_LOTE = 20000
+
+
+def periodo(meses=MESES, hoy=None):
+    """Desde el primer día de hace `meses` meses (contando el actual) hasta hoy"""
+    hoy = hoy or timezone.localdate()
+    inicio = hoy.year * 12 + hoy.month - meses
+    return date(inicio // 12, inicio % 12 + 1, 1), hoy
+
+
+def leer_escenario(texto):
+    """
+    (nombre, Tarifario) de una línea "Nombre; cargo fijo; desde=precio, ...",
+    por ejemplo "Propuesta 2027; 1500; 0=400, 10=600, 30=900".
+    """
+    partes = [parte.strip() for parte in texto.split(';')]
+    if len(partes) != 3 or not partes[0]:
+        raise ValidationError(f'"{texto}": se espera "Nombre; cargo fijo; desde=precio, desde=precio, ...".')
+    nombre, cargo, tramos = partes
+    try:
+        cargo = Decimal(cargo or '0')
+        tramos = [
+            tuple(Decimal(valor.strip()) for valor in tramo.split('='))
+            for tramo in tramos.split(',') if tramo.strip()
+        ]
+    except InvalidOperation:
+        raise ValidationError(f'"{nombre}": los montos deben ser números con punto decimal.')
+    if any(len(tramo) != 2 for tramo in tramos):
+        raise ValidationError(f'"{nombre}": cada tramo se escribe como desde=precio.')
+    # Los montos se calculan en centavos y los consumos en centésimas de m³
+    if any(not valor.is_finite() or valor.normalize().as_tuple().exponent < -2
+           for valor in [cargo, *(valor for tramo in tramos for valor in tramo)]):
+        raise ValidationError(f'"{nombre}": los montos y consumos admiten hasta 2 decimales.')
+    if not tramos or min(desde for desde, _ in tramos) != 0:
+        raise ValidationError(f'"{nombre}": el primer tramo debe partir en 0 m³.')
+    if len({desde for desde, _ in tramos}) != len(tramos):
+        raise ValidationError(f'"{nombre}": hay dos tramos que parten en el mismo consumo.')
+    if cargo < 0 or any(desde < 0 or precio < 0 for desde, precio in tramos):
+        raise ValidationError(f'"{nombre}": los montos no pueden ser negativos.')
+    return nombre, Tarifario([(date.min, cargo, tramos)])
+
+
+def describir(nombre, tarifa):
+    """Línea de escenario equivalente a una tarifa (vigente_desde, cargo, tramos)"""
+    _, cargo, tramos = tarifa
+    numero = '{:f}'.format
+    tramos = ', '.join(f'{numero(desde.normalize())}={numero(precio.normalize())}' for desde, precio in tramos)
+    return f'{nombre}; {numero(cargo.normalize())}; {tramos}'
+
+
+class Historial:
+    """Boletas de un período en arreglos por columna, agrupables por cliente"""
+
+    def __init__(self, clientes, fechas, consumos, facturado, desde=None, hasta=None):
+        self.desde = desde
+        self.hasta = hasta
+        self.fechas = np.asarray(fechas, dtype=np.int64)  # date.toordinal()
+        self.consumos = np.asarray(consumos, dtype=np.int64)  # centésimas de m³
+        self.facturado = np.asarray(facturado, dtype=np.int64)  # centavos
+        # ids de los clientes ordenados y posición de cada boleta entre ellos
+        self.clientes, self._posiciones = np.unique(np.asarray(clientes, dtype=np.int64), return_inverse=True)
+        self.facturado_por_cliente = self.por_cliente(self.facturado)
+
+    @classmethod
+    def cargar(cls, desde, hasta):
+        """Historial de las boletas emitidas entre `desde` y `hasta`"""
+        filas = Boleta.objects.filter(fecha_emision__range=(desde, hasta)).values_list(
+            'cliente_id',
+            'medicion__fecha',
+            Cast(Round(F('medicion__consumo_m3') * 100), IntegerField()),
+            Cast(Round(F('monto_total') * 100), IntegerField()),
+        ).iterator(chunk_size=TAMANO_LOTE)
+        datos = np.fromiter(filas, dtype=[
+            ('cliente', np.int64), ('fecha', 'datetime64[D]'), ('consumo', np.int64), ('facturado', np.int64),
+        ])
+        # datetime64[D] cuenta días desde 1970-01-01; se pasa a ordinales de date
+        fechas = datos['fecha'].astype(np.int64) + date(1970, 1, 1).toordinal()
+        return cls(datos['cliente'], fechas, datos['consumo'], datos['facturado'], desde, hasta)
+
+    def __len__(self):
+        return len(self.consumos)
+
+    def por_cliente(self, centavos):
+        """Suma de montos (uno por boleta) para cada cliente de self.clientes"""
+        # Las sumas en float64 son exactas hasta 2**53 centavos
+        return np.bincount(self._posiciones, weights=centavos, minlength=len(self.clientes)).round().astype(np.int64)
+
+    def simular(self, nombre, tarifario):
+        """Resultado de facturar todo el historial con `tarifario`"""
+        inicio = time.perf_counter()
+        propuesto = self.por_cliente(tarifario.montos_centavos(self.consumos, self.fechas))
+        resultado = Resultado(nombre, self.clientes, self.facturado_por_cliente, propuesto)
+        resultado.segundos = time.perf_counter() - inicio
+        return resultado
+
+
+class Resultado:
+    """Montos facturados y propuestos por cliente de un escenario, en centavos"""
+
+    def __init__(self, nombre, clientes, facturado, propuesto):
+        self.nombre = nombre
+        self.clientes = clientes
+        self.facturado = facturado
+        self.propuesto = propuesto
+        self.diferencias = propuesto - facturado
+        self.segundos = 0.0
+
+    @property
+    def total_facturado(self):
+        return Decimal(int(self.facturado.sum())).scaleb(-2)
+
+    @property
+    def total_propuesto(self):
+        return Decimal(int(self.propuesto.sum())).scaleb(-2)
+
+    @property
+    def diferencia(self):
+        return self.total_propuesto - self.total_facturado
+
+    @property
+    def porcentaje(self):
+        return self.diferencia / self.total_facturado * 100 if self.total_facturado else None
+
+    @property
+    def suben(self):
+        return int((self.diferencias > 0).sum())
+
+    @property
+    def bajan(self):
+        return int((self.diferencias < 0).sum())
+
+    @property
+    def mediana(self):
+        """Diferencia mediana por cliente"""
+        if not len(self.clientes):
+            return None
+        return Decimal(float(np.median(self.diferencias))).scaleb(-2).quantize(CENTAVO)
+
+    def filas(self, indices=slice(None)):
+        """(cliente_id, facturado, propuesto, diferencia) de cada cliente, en pesos"""
+        columnas = (self.clientes, self.facturado, self.propuesto, self.diferencias)
+        for cliente_id, *montos in zip(*(columna[indices].tolist() for columna in columnas)):
+            yield cliente_id, *(Decimal(monto).scaleb(-2) for monto in montos)
+
+    def mayores_alzas(self, cantidad=20):
+        """[(cliente_id, nombre, facturado, propuesto, diferencia)] de los mayores aumentos"""
+        indices = np.argsort(-self.diferencias, kind='stable')[:cantidad]
+        indices = indices[self.diferencias[indices] > 0]
+        nombres = dict(Cliente.objects.filter(id__in=self.clientes[indices].tolist()).values_list('id', 'nombre'))
+        return [(cliente_id, nombres.get(cliente_id, ''), *montos) for cliente_id, *montos in self.filas(indices)]
+
+
+_historial = None
+_cargado = 0.0
+
+
+def historial(desde, hasta, actualizar=False):
+    """Historial del período guardado en el proceso, releído cada VIGENCIA_CACHE segundos"""
+    global _historial, _cargado
+    vencido = time.monotonic() - _cargado > VIGENCIA_CACHE
+    if actualizar or vencido or _historial is None or (_historial.desde, _historial.hasta) != (desde, hasta):
+        # Se libera el anterior antes de leer el nuevo para no tener ambos en memoria
+        _historial = None
+        _historial = Historial.cargar(desde, hasta)
+        _cargado = time.monotonic()
+    return _historial
@@ -0,0 +1,207 @@
+"""
+Cálculo del monto de las mediciones según las tarifas vigentes.
+
+Una Tarifa rige desde su fecha `vigente_desde` hasta la siguiente, y cobra un
+cargo fijo más un precio por m³ en cada tramo de consumo: el tramo que parte
+en `desde_m3` cobra el consumo que lo supera hasta el inicio del tramo
+siguiente. El total se redondea a centavos, mitad hacia arriba.
+
+`Tarifario.monto` calcula una medición con Decimal. `Tarifario.montos` calcula
+muchas a la vez con NumPy sobre enteros (centésimas de m³ y centavos), lo que
+da exactamente los mismos resultados porque todos los valores tienen dos
+decimales y el producto cabe sin pérdida en un entero de 64 bits.
+
+Al emitir, la boleta guarda además el desglose (`Tarifario.cobros`), de modo
+que su PDF muestra la tarifa con que se cobró aunque después cambie.
+"""
+
+import time
+from decimal import ROUND_HALF_UP, Decimal
+
+import numpy as np
+from django.core.exceptions import ValidationError
+
+from .models import Tarifa
+
+CENTAVO = Decimal('0.01')
+# Cada cuánto se vuelven a leer las tarifas en un proceso, en segundos; los
+# cambios hechos en el mismo proceso se ven de inmediato por las señales
+VIGENCIA_CACHE = 60
+# Ancho de "sin límite" para el último tramo, en centésimas de m³
+SIN_LIMITE = 2 ** 40
+# Tope para las sumas en enteros; sobre él se usa el cálculo con Decimal
+MAXIMO_ENTERO = 2 ** 62
+
+
+def _centesimas(valor):
+    return int(Decimal(valor).scaleb(2))
+
+
+def _m3(valor):
+    return f'{valor.normalize():f}'
+
+
+class Tarifario:
+    """Tarifas ordenadas por fecha de vigencia, listas para calcular montos"""
+
+    def __init__(self, tarifas):
+        # tarifas: [(vigente_desde, cargo_fijo, [(desde_m3, precio_m3), ...])]
+        self.tarifas = sorted(
+            (fecha, Decimal(cargo), sorted((Decimal(desde), Decimal(precio)) for desde, precio in tramos))
+            for fecha, cargo, tramos in tarifas
+        )
+        cantidad = len(self.tarifas)
+        columnas = max((len(tramos) for _, _, tramos in self.tarifas), default=0) or 1
+
+        self._fechas = np.array([fecha.toordinal() for fecha, _, _ in self.tarifas], dtype=np.int64)
+        self._cargos = np.array([_centesimas(cargo) for _, cargo, _ in self.tarifas], dtype=np.int64)
+        # Tramos faltantes: parten "en el infinito" y no cobran nada
+        self._desde = np.full((cantidad, columnas), SIN_LIMITE, dtype=np.int64)
+        self._ancho = np.zeros((cantidad, columnas), dtype=np.int64)
+        self._precio = np.zeros((cantidad, columnas), dtype=np.int64)
+        for i, (_, _, tramos) in enumerate(self.tarifas):
+            limites = [_centesimas(desde) for desde, _ in tramos] + [SIN_LIMITE]
+            for j, (_, precio) in enumerate(tramos):
+                self._desde[i, j] = limites[j]
+                self._ancho[i, j] = limites[j + 1] - limites[j]
+                self._precio[i, j] = _centesimas(precio)
+
+    @classmethod
+    def cargar(cls):
+        """Tarifario con las tarifas guardadas en la base de datos"""
+        return cls(
+            (tarifa.vigente_desde, tarifa.cargo_fijo, [(t.desde_m3, t.precio_m3) for t in tarifa.tramos.all()])
+            for tarifa in Tarifa.objects.prefetch_related('tramos')
+        )
+
+    def _indices(self, ordinales):
+        indices = np.searchsorted(self._fechas, ordinales, side='right') - 1
+        if len(indices) and indices.min() < 0:
+            raise ValidationError('No hay una tarifa vigente para la fecha de la medición.')
+        return indices
+
+    def vigente(self, fecha):
+        """(vigente_desde, cargo_fijo, tramos) de la tarifa que rige en `fecha`"""
+        return self.tarifas[self._indices(np.array([fecha.toordinal()]))[0]]
+
+    def desglose(self, consumo, fecha):
+        """Cargo fijo y cobro de cada tramo usado: [(descripción, m³, precio, subtotal)]"""
+        return self._desglose(self.vigente(fecha), consumo)
+
+    @staticmethod
+    def _desglose(tarifa, consumo):
+        _, cargo, tramos = tarifa
+        consumo = Decimal(consumo)
+        lineas = [('Cargo fijo', None, None, cargo)] if cargo else []
+        for i, (desde, precio) in enumerate(tramos):
+            hasta = tramos[i + 1][0] if i + 1 < len(tramos) else None
+            if consumo <= desde:
+                break
+            usado = (min(consumo, hasta) if hasta is not None else consumo) - desde
+            descripcion = f'{_m3(desde)} a {_m3(hasta)} m³' if hasta is not None else f'Sobre {_m3(desde)} m³'
+            lineas.append((descripcion, usado, precio, usado * precio))
+        return lineas
+
+    def cobros(self, consumos, fechas):
+        """
+        Tarifa aplicada y desglose de cada consumo, en texto para guardarlos
+        en Boleta.desglose: {'tarifa': vigente_desde, 'lineas': [[...]]}.
+        """
+        consumos = list(consumos)
+        indices = self._indices(np.array([fecha.toordinal() for fecha in fechas], dtype=np.int64))
+        # Los consumos se repiten mucho dentro de un período
+        calculados = {}
+        resultado = []
+        for indice, consumo in zip(indices.tolist(), consumos):
+            clave = (indice, Decimal(consumo))
+            if clave not in calculados:
+                tarifa = self.tarifas[indice]
+                calculados[clave] = {
+                    'tarifa': tarifa[0].isoformat(),
+                    'lineas': [
+                        [descripcion, *(None if valor is None else str(valor) for valor in (m3, precio, subtotal))]
+                        for descripcion, m3, precio, subtotal in self._desglose(tarifa, consumo)
+                    ],
+                }
+            resultado.append(calculados[clave])
+        return resultado
+
+    def monto(self, consumo, fecha):
+        """Monto de un consumo en `fecha`, con Decimal"""
+        total = sum((subtotal for *_, subtotal in self.desglose(consumo, fecha)), Decimal(0))
+        return total.quantize(CENTAVO, rounding=ROUND_HALF_UP)
+
+    def montos_centavos(self, consumos, fechas):
+        """
+        Montos en centavos (int64) para arreglos de consumos en centésimas de
+        m³ y fechas como ordinales (date.toordinal()).
+        """
+        consumos = np.asarray(consumos, dtype=np.int64)
+        indices = self._indices(np.asarray(fechas, dtype=np.int64))
+        # Todo en diezmilésimas de peso: centésimas de m³ por centavos
+        total = self._cargos[indices] * 100
+        for j in range(self._desde.shape[1]):
+            usado = np.clip(consumos - self._desde[indices, j], 0, self._ancho[indices, j])
+            total += usado * self._precio[indices, j]
+        # Redondeo a centavos, mitad hacia arriba (los totales nunca son negativos)
+        return (total + 50) // 100
+
+    def _cabe_en_enteros(self, consumos):
+        if not len(consumos):
+            return True
+        mayor = int(np.abs(consumos).max()) * int(self._precio.max(initial=0)) * self._precio.shape[1]
+        return mayor + int(self._cargos.max(initial=0)) * 100 < MAXIMO_ENTERO
+
+    def montos(self, consumos, fechas):
+        """Montos en Decimal de listas de consumos (Decimal) y fechas, calculados en lote"""
+        consumos = list(consumos)
+        fechas = list(fechas)
+        centesimas = np.array([_centesimas(consumo) for consumo in consumos], dtype=np.int64)
+        if not self._cabe_en_enteros(centesimas):
+            return [self.monto(consumo, fecha) for consumo, fecha in zip(consumos, fechas)]
+        centavos = self.montos_centavos(centesimas, [fecha.toordinal() for fecha in fechas])
+        return [Decimal(int(valor)).scaleb(-2) for valor in centavos]
+
+
+_tarifario = None
+_cargado = 0.0
+
+
+def tarifario(actualizar=False):
+    """Tarifario del proceso, releído de la base de datos cada VIGENCIA_CACHE segundos"""
+    global _tarifario, _cargado
+    if actualizar or _tarifario is None or time.monotonic() - _cargado > VIGENCIA_CACHE:
+        _tarifario = Tarifario.cargar()
+        _cargado = time.monotonic()
+    return _tarifario
+
+
+def invalidar():
+    """Descarta el tarifario del proceso para que se lea de nuevo"""
+    global _tarifario
+    _tarifario = None
+
+
+def tarifa_vigente(fecha):
+    """Cargo fijo y tramos que rigen en `fecha`, para la estimación en pantalla"""
+    try:
+        _, cargo, tramos = tarifario().vigente(fecha)
+    except ValidationError:
+        return None
+    return {
+        'cargo_fijo': float(cargo),
+        'tramos': [[float(desde), float(precio)] for desde, precio in tramos],
+    }
+
+
+def cobrar_medicion(medicion):
+    """Monto y desglose de una medición con las tarifas recién leídas, para emitir su boleta"""
+    precios = tarifario(actualizar=True)
+    monto = precios.monto(medicion.consumo_m3, medicion.fecha)
+    return monto, precios.cobros([medicion.consumo_m3], [medicion.fecha])[0]
+
+
+def montos_mediciones(mediciones, tarifas=None):
+    """Montos de varias mediciones en un solo cálculo vectorizado"""
+    tarifas = tarifas or tarifario(actualizar=True)
+    return tarifas.montos([m.consumo_m3 for m in mediciones], [m.fecha for m in mediciones])
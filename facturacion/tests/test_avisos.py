@@ -0,0 +1,34 @@
+from django.core import mail
+from django.test import TestCase
+
+from facturacion.avisos import encolar_aviso_masivo, registrar_aviso_masivo
+from facturacion.correo import procesar_lote
+from facturacion.models import Cliente, CorreoSaliente, DestinatarioAviso
+
+
+class AvisoMasivoTests(TestCase):
+    def setUp(self):
+        Cliente.objects.bulk_create([
+            Cliente(nombre=f'Cliente {i}', direccion='Calle 1', email=f'c{i}@prueba.cl') for i in range(30)
+        ])
+        self.aviso, _ = registrar_aviso_masivo(
+            'mantenimiento', 'Corte programado', 'Sin agua el martes.', Cliente.objects.all()
+        )
+
+    def test_encolar_no_copia_el_contenido(self):
+        # Un solo INSERT ... SELECT, sin importar la cantidad de destinatarios
+        with self.assertNumQueries(1):
+            self.assertEqual(encolar_aviso_masivo(self.aviso), 30)
+        self.assertFalse(CorreoSaliente.objects.exclude(mensaje='').exists())
+        self.assertEqual(encolar_aviso_masivo(self.aviso), 0)
+
+    def test_el_worker_arma_el_texto_al_enviar(self):
+        encolar_aviso_masivo(self.aviso)
+        resultado = procesar_lote(tamano=100)
+
+        self.assertEqual(resultado['enviados'], 30)
+        correo = next(m for m in mail.outbox if m.to == ['c7@prueba.cl'])
+        self.assertEqual(correo.subject, 'Corte programado - Prueba')
+        self.assertIn('Cliente 7', correo.body)
+        self.assertIn('Sin agua el martes.', correo.body)
+        self.assertFalse(DestinatarioAviso.objects.filter(enviado=False).exists())
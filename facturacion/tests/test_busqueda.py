@@ -0,0 +1,50 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase
+
+from facturacion import busqueda
+from facturacion.models import Boleta, Cliente, Medicion
+
+
+class BusquedaTests(TestCase):
+    def test_boleta_por_parte_del_numero(self):
+        cliente = Cliente.objects.create(nombre='Ana Rojas', direccion='Calle 1', email='ana@prueba.cl')
+        medicion = Medicion.objects.create(cliente=cliente, fecha=date(2025, 9, 5), consumo_m3=Decimal('10'))
+        boleta = Boleta.objects.create(
+            cliente=cliente, medicion=medicion, fecha_emision=date(2025, 9, 5),
+            fecha_vencimiento=date(2025, 9, 5) + timedelta(days=30), monto_total=Decimal('5000'),
+            numero_boleta='B2025090042',
+        )
+        for texto in ('B2025090042', '2025090042', '202509', '0042', '42'):
+            self.assertEqual(busqueda.buscar_ids(texto, 'boleta'), [boleta.id], texto)
+        self.assertEqual(busqueda.buscar_ids('0043', 'boleta'), [])
+
+        boleta.numero_boleta = 'B2025090043'
+        boleta.save()
+        self.assertEqual(busqueda.buscar_ids('0043', 'boleta'), [boleta.id])
+        self.assertEqual(busqueda.buscar_ids('0042', 'boleta'), [])
+
+    def test_ordena_por_relevancia(self):
+        # La más relevante es la más antigua, detrás de coincidencias más recientes
+        relevante = Cliente.objects.create(nombre='Pérez Pérez Pérez', direccion='Calle 1', email='a@prueba.cl')
+        Cliente.objects.bulk_create([
+            Cliente(nombre=f'Cliente Perez {i}', direccion='Calle 2', email=f'c{i}@prueba.cl')
+            for i in range(500)
+        ])
+        ids = busqueda.buscar_ids('perez', 'cliente', limite=3)
+        self.assertEqual(ids[0], relevante.id)
+        # A igual relevancia, las más recientes primero
+        self.assertGreater(ids[1], ids[2])
+
+    def test_relevancia_solo_entre_candidatos(self):
+        antigua = Cliente.objects.create(nombre='Pérez Pérez Pérez', direccion='Calle 1', email='a@prueba.cl')
+        Cliente.objects.bulk_create([
+            Cliente(nombre=f'Cliente Perez {i}', direccion='Calle 2', email=f'c{i}@prueba.cl')
+            for i in range(20)
+        ])
+        recientes = list(Cliente.objects.order_by('-id').values_list('id', flat=True)[:3])
+        with mock.patch.object(busqueda, 'CANDIDATOS', 10):
+            self.assertEqual(busqueda.buscar_ids('perez', 'cliente', limite=3), recientes)
+        self.assertEqual(busqueda.buscar_ids('perez', 'cliente', limite=1), [antigua.id])
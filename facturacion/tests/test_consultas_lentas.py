@@ -0,0 +1,24 @@
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from facturacion import consultas
+from facturacion.models import Cliente
+
+
+class RegistroConsultaLentaTests(TestCase):
+    def _registro(self):
+        sql = f'SELECT id FROM {Cliente._meta.db_table} WHERE email = %s'
+        with self.assertLogs('facturacion.consultas_lentas', 'WARNING') as registro:
+            consultas._escribir_lenta(connection, sql, ['ana.rojas@prueba.cl'], 0.2, 'detalle_cliente')
+        return registro.output[0]
+
+    def test_no_escribe_los_parametros(self):
+        texto = self._registro()
+        self.assertIn('200.0 ms en detalle_cliente', texto)
+        self.assertIn('Huella:', texto)
+        self.assertIn('Plan:', texto)
+        self.assertNotIn('ana.rojas', texto)
+
+    @override_settings(CONSULTAS_LENTAS_PARAMETROS=True)
+    def test_parametros_si_se_piden(self):
+        self.assertIn("Parámetros: ['ana.rojas@prueba.cl']", self._registro())
@@ -0,0 +1,71 @@
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from facturacion import contadores
+from facturacion.models import Aviso, Boleta, Cliente, Medicion
+
+
+class ContadoresTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.cliente = Cliente.objects.create(nombre='Ana Rojas', direccion='Calle 1', email='ana@prueba.cl')
+        self.medicion = Medicion.objects.create(cliente=self.cliente, fecha=date(2025, 9, 5), consumo_m3=Decimal('10'))
+
+    def _crear_cliente(self, numero):
+        return Cliente.objects.create(nombre='Luis Soto', direccion='Calle 2', email=f'luis{numero}@prueba.cl')
+
+    def test_invalida_al_confirmar(self):
+        self.assertEqual(contadores.obtener()['clientes'], {'activos': 1})
+        with self.captureOnCommitCallbacks() as callbacks:
+            self._crear_cliente(1)
+        # Antes de confirmar se siguen viendo las cifras anteriores
+        self.assertEqual(contadores.obtener()['clientes'], {'activos': 1})
+        for callback in callbacks:
+            callback()
+        self.assertEqual(contadores.obtener()['clientes'], {'activos': 2})
+
+    def test_no_guarda_cifras_de_antes_de_invalidar(self):
+        contar = contadores._conteos
+
+        def contar_y_confirmar_otra_transaccion():
+            # Otra solicitud confirma un cambio entre el conteo y el guardado
+            conteos = contar()
+            with self.captureOnCommitCallbacks(execute=True):
+                self._crear_cliente(1)
+            return conteos
+
+        with mock.patch.object(contadores, '_conteos', contar_y_confirmar_otra_transaccion):
+            self.assertEqual(contadores.obtener()['clientes'], {'activos': 1})
+        self.assertEqual(contadores.obtener()['clientes'], {'activos': 2})
+
+    def test_dependencias(self):
+        crear = {
+            Cliente: lambda: self._crear_cliente(1),
+            Boleta: lambda: Boleta.objects.create(
+                cliente=self.cliente, medicion=self.medicion, fecha_emision=date(2025, 9, 30),
+                fecha_vencimiento=date(2025, 10, 30), monto_total=Decimal('5000'),
+            ),
+            Aviso: lambda: Aviso.objects.create(
+                cliente=self.cliente, tipo_aviso='corte_programado', titulo='Corte', mensaje='Mañana',
+            ),
+            Medicion: lambda: Medicion.objects.create(
+                cliente=self.cliente, fecha=date(2025, 10, 5), consumo_m3=Decimal('12'),
+            ),
+        }
+        self.assertEqual(crear.keys(), contadores.DEPENDENCIAS.keys())
+        for modelo, grupos in contadores.DEPENDENCIAS.items():
+            with self.subTest(modelo=modelo.__name__):
+                contadores.obtener()
+                antes = contadores._claves()
+                with self.captureOnCommitCallbacks(execute=True):
+                    crear[modelo]()
+                despues = contadores._claves()
+                cambiados = {grupo for grupo in contadores.GRUPOS if antes[grupo] != despues[grupo]}
+                self.assertEqual(cambiados, set(grupos))
+                # Las cifras de los grupos no afectados siguen en el caché
+                for grupo in set(contadores.GRUPOS) - cambiados:
+                    self.assertIsNotNone(cache.get(despues[grupo]), grupo)
@@ -0,0 +1,106 @@
+import smtplib
+from datetime import datetime, timedelta, timezone as tz
+from unittest import mock
+
+from django.core import mail
+from django.core.mail.backends import locmem
+from django.test import TestCase, override_settings
+
+from facturacion import correo
+from facturacion.models import CorreoSaliente
+
+AHORA = datetime(2025, 9, 1, 12, 0, tzinfo=tz.utc)
+
+
+class BackendConFallas(locmem.EmailBackend):
+    """locmem, salvo que los destinatarios de @falla.prueba hacen fallar el envío"""
+
+    def send_messages(self, messages):
+        for message in messages:
+            if any(destinatario.endswith('@falla.prueba') for destinatario in message.to):
+                raise smtplib.SMTPRecipientsRefused({message.to[0]: (550, b'Buzon inexistente')})
+        return super().send_messages(messages)
+
+
+@override_settings(EMAIL_BACKEND='facturacion.tests.test_correo.BackendConFallas')
+class ProcesarLoteTests(TestCase):
+    def setUp(self):
+        self.ahora = AHORA
+        reloj = mock.patch.object(correo.timezone, 'now', side_effect=lambda: self.ahora)
+        reloj.start()
+        self.addCleanup(reloj.stop)
+
+    def _encolar(self, destinatario):
+        return CorreoSaliente.objects.create(
+            destinatario=destinatario, asunto='Aviso', mensaje='Corte programado.', proximo_intento=self.ahora,
+        )
+
+    def test_envia_y_reintenta_solo_los_que_fallan(self):
+        bueno = self._encolar('ana@prueba.cl')
+        malo = self._encolar('luis@falla.prueba')
+
+        resultado = correo.procesar_lote()
+
+        self.assertEqual((resultado['enviados'], resultado['reintentos'], resultado['fallidos']), (1, 1, 0))
+        self.assertEqual([m.to for m in mail.outbox], [['ana@prueba.cl']])
+        bueno.refresh_from_db()
+        malo.refresh_from_db()
+        self.assertEqual((bueno.estado, bueno.fecha_envio), ('enviado', AHORA))
+        self.assertEqual((malo.estado, malo.intentos), ('pendiente', 1))
+        self.assertIn('Buzon inexistente', malo.ultimo_error)
+
+    def test_espera_exponencial_hasta_fallido(self):
+        malo = self._encolar('luis@falla.prueba')
+        for intento in range(1, correo.MAX_INTENTOS):
+            self.assertEqual(correo.procesar_lote()['reintentos'], 1)
+            malo.refresh_from_db()
+            self.assertEqual((malo.estado, malo.intentos), ('pendiente', intento))
+            self.assertEqual(malo.proximo_intento - self.ahora, timedelta(seconds=60 * 2 ** (intento - 1)))
+
+            # Antes de la espera no se vuelve a intentar
+            self.ahora = malo.proximo_intento - timedelta(seconds=1)
+            self.assertEqual(correo.procesar_lote()['reintentos'], 0)
+            self.ahora = malo.proximo_intento
+
+        resultado = correo.procesar_lote()
+        self.assertEqual((resultado['reintentos'], resultado['fallidos']), (0, 1))
+        malo.refresh_from_db()
+        self.assertEqual((malo.estado, malo.intentos), ('fallido', correo.MAX_INTENTOS))
+
+        # Un fallido no se vuelve a tomar
+        self.ahora += timedelta(days=1)
+        self.assertEqual(correo.procesar_lote()['fallidos'], 0)
+
+    def test_espera_maxima(self):
+        self.assertEqual(correo._espera(1), timedelta(seconds=correo.ESPERA_BASE))
+        self.assertEqual(correo._espera(30), timedelta(seconds=correo.ESPERA_MAXIMA))
+
+    def test_max_intentos(self):
+        malo = self._encolar('luis@falla.prueba')
+        self.assertEqual(correo.procesar_lote(max_intentos=1)['fallidos'], 1)
+        malo.refresh_from_db()
+        self.assertEqual((malo.estado, malo.intentos), ('fallido', 1))
+
+    def test_retoma_la_reserva_de_un_worker_caido(self):
+        pendiente = self._encolar('ana@prueba.cl')
+        # Un worker reserva el lote y se cae antes de enviarlo
+        self.assertEqual([c.id for c in correo._reservar_lote(10)], [pendiente.id])
+        pendiente.refresh_from_db()
+        self.assertEqual((pendiente.estado, pendiente.proximo_intento), ('enviando', AHORA + correo.RESERVA))
+
+        # Mientras la reserva esté vigente nadie más lo toma
+        self.ahora = AHORA + correo.RESERVA - timedelta(seconds=1)
+        self.assertEqual(correo._reservar_lote(10), [])
+
+        self.ahora = AHORA + correo.RESERVA
+        self.assertEqual(correo.procesar_lote()['enviados'], 1)
+        self.assertEqual(len(mail.outbox), 1)
+        pendiente.refresh_from_db()
+        self.assertEqual(pendiente.estado, 'enviado')
+
+    def test_lote_por_orden_de_proximo_intento(self):
+        tardio = self._encolar('tardio@prueba.cl')
+        temprano = self._encolar('temprano@prueba.cl')
+        CorreoSaliente.objects.filter(id=temprano.id).update(proximo_intento=AHORA - timedelta(hours=1))
+        self.assertEqual([c.id for c in correo._reservar_lote(1)], [temprano.id])
+        self.assertEqual([c.id for c in correo._reservar_lote(1)], [tardio.id])
@@ -0,0 +1,76 @@
+import csv
+import io
+import json
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+from django.urls import reverse
+
+from facturacion import exportacion
+from facturacion.models import Boleta, Cliente, Medicion
+
+
+class ExportacionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.ana = Cliente.objects.create(nombre='Ana Muñoz', direccion='Calle "Uno", 1', email='ana@prueba.cl')
+        cls.luis = Cliente.objects.create(nombre='Luis Peña', direccion='Calle 2', email='luis@prueba.cl',
+                                          telefono='+56911111111')
+        for cliente in (cls.ana, cls.luis):
+            for mes, estado in ((8, 'pagada'), (9, 'pendiente')):
+                medicion = Medicion.objects.create(
+                    cliente=cliente, fecha=date(2025, mes, 5), consumo_m3=Decimal('10.50'),
+                    lectura_anterior=Decimal('100'), lectura_actual=Decimal('110.50'),
+                )
+                Boleta.objects.create(
+                    cliente=cliente, medicion=medicion, fecha_emision=date(2025, mes, 6),
+                    fecha_vencimiento=date(2025, mes + 1, 6), monto_total=Decimal('5250.00'), estado=estado,
+                )
+
+    def _csv(self, tipo, parametros=None, **opciones):
+        texto = ''.join(exportacion.exportar(tipo, 'csv', parametros, **opciones))
+        self.assertTrue(texto.startswith('\ufeff'))
+        return list(csv.reader(io.StringIO(texto[1:])))
+
+    def _jsonl(self, tipo, parametros=None):
+        texto = ''.join(exportacion.exportar(tipo, 'jsonl', parametros))
+        return [json.loads(linea) for linea in texto.splitlines()]
+
+    def test_csv_de_boletas_filtradas(self):
+        filas = self._csv('boletas', {'estado': 'pagada'})
+        self.assertEqual(filas[0], exportacion.encabezados('boletas'))
+        boletas = Boleta.objects.filter(estado='pagada').order_by('id')
+        self.assertEqual(filas[1:], [
+            [str(b.id), b.numero_boleta, str(b.cliente_id), b.cliente.nombre, b.cliente.email,
+             '2025-08-06', '2025-09-06', '10.50', '5250.00', 'pagada']
+            for b in boletas
+        ])
+
+    def test_jsonl_de_mediciones_filtradas(self):
+        filas = self._jsonl('mediciones', {'cliente': self.ana.id, 'desde': '2025-09-01'})
+        medicion = Medicion.objects.get(cliente=self.ana, fecha=date(2025, 9, 5))
+        self.assertEqual(filas, [{
+            'id': medicion.id, 'cliente_id': self.ana.id, 'cliente': 'Ana Muñoz', 'fecha': '2025-09-05',
+            'lectura_anterior': '100.00', 'lectura_actual': '110.50', 'consumo_m3': '10.50', 'observaciones': None,
+        }])
+
+    def test_filtros_invalidos_se_ignoran(self):
+        self.assertEqual(len(self._jsonl('mediciones', {'cliente': 'x', 'desde': 'ayer'})), 4)
+
+    def test_csv_de_clientes_escapa_y_no_depende_del_lote(self):
+        filas = self._csv('clientes')
+        self.assertEqual([fila[1:5] for fila in filas[1:]], [
+            ['Ana Muñoz', 'ana@prueba.cl', '', 'Calle "Uno", 1'],
+            ['Luis Peña', 'luis@prueba.cl', '+56911111111', 'Calle 2'],
+        ])
+        self.assertEqual(self._csv('clientes', tamano_lote=1), filas)
+
+    def test_vista(self):
+        response = self.client.get(reverse('exportar_boletas'), {'formato': 'jsonl', 'estado': 'pendiente'})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        filas = [json.loads(linea) for linea in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(filas, self._jsonl('boletas', {'estado': 'pendiente'}))
+        self.assertEqual({fila['estado'] for fila in filas}, {'pendiente'})
+
+        self.assertEqual(self.client.get(reverse('exportar_boletas'), {'formato': 'xml'}).status_code, 404)
@@ -0,0 +1,128 @@
+import io
+from datetime import date
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+
+from facturacion import exportacion, importacion
+from facturacion.models import Cliente, Medicion
+
+
+def _archivo(*lineas):
+    return io.StringIO('\n'.join(lineas) + '\n', newline='')
+
+
+class ImportarMedicionesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.ana = Cliente.objects.create(nombre='Ana Rojas', direccion='Calle 1', email='ana@prueba.cl')
+        cls.luis = Cliente.objects.create(nombre='Luis Soto', direccion='Calle 2', email='luis@prueba.cl')
+        Medicion.objects.create(cliente=cls.ana, fecha=date(2025, 8, 5), consumo_m3=Decimal('10'),
+                                lectura_anterior=Decimal('90'), lectura_actual=Decimal('100'))
+
+    def test_filas_con_error_informan_su_linea(self):
+        archivo = _archivo(
+            'cliente;fecha;lectura_anterior;lectura_actual;observaciones',
+            f'{self.ana.id};05/09/2025;;112,5;"Medidor',  # líneas 2 y 3: una sola fila
+            'cambiado"',
+            'nadie@prueba.cl;2025-09-05;;120;',  # 4
+            'luis@prueba.cl;2025-09-31;0;10;',  # 5
+            'luis@prueba.cl;2025-09-05;;10;',  # 6
+            'ana@prueba.cl;2025-09-01;;130;',  # 7: anterior a la del 05/09 de la línea 2
+            'ana@prueba.cl;2025-10-05;;100;',  # 8: retrocede
+            'ana@prueba.cl;2025-10-05;;;',  # 9
+            'luis@prueba.cl;2025-09-05;50;60;',  # 10
+            'luis@prueba.cl;2025-10-05;;75;',  # 11: sigue a la línea 10
+        )
+        resultado = importacion.importar_mediciones(archivo, tamano_lote=3)
+
+        self.assertEqual((resultado['leidas'], resultado['guardadas']), (9, 3))
+        self.assertEqual([(linea, cliente) for linea, cliente, _ in resultado['errores']], [
+            (4, 'nadie@prueba.cl'),
+            (5, 'luis@prueba.cl'),
+            (6, 'luis@prueba.cl'),
+            (7, 'ana@prueba.cl'),
+            (8, 'ana@prueba.cl'),
+            (9, 'ana@prueba.cl'),
+        ])
+        mensajes = [mensaje for *_, mensaje in resultado['errores']]
+        self.assertIn('No existe un cliente', mensajes[0])
+        self.assertIn('lectura_anterior', mensajes[2])
+        self.assertIn('posterior a la última medición del cliente (05/09/2025)', mensajes[3])
+        self.assertIn('no puede ser menor', mensajes[4])
+        self.assertEqual(mensajes[5], 'Falta la lectura actual.')
+
+        self.assertEqual(
+            list(Medicion.objects.filter(fecha__gte=date(2025, 9, 1)).order_by('cliente_id', 'fecha').values_list(
+                'cliente_id', 'fecha', 'lectura_anterior', 'lectura_actual', 'consumo_m3', 'observaciones')),
+            [
+                (self.ana.id, date(2025, 9, 5), Decimal('100'), Decimal('112.5'), Decimal('12.5'), 'Medidor\ncambiado'),
+                (self.luis.id, date(2025, 9, 5), Decimal('50'), Decimal('60'), Decimal('10'), None),
+                (self.luis.id, date(2025, 10, 5), Decimal('60'), Decimal('75'), Decimal('15'), None),
+            ],
+        )
+
+    def test_comillas_dobladas(self):
+        archivo = _archivo(
+            'cliente;fecha;lectura_actual;observaciones',
+            f'{self.ana.id};2025-09-05;110;"Dice ""medidor roto""; revisar"',
+        )
+        self.assertEqual(importacion.importar_mediciones(archivo)['errores'], [])
+        self.assertEqual(Medicion.objects.get(fecha=date(2025, 9, 5)).observaciones, 'Dice "medidor roto"; revisar')
+
+    def test_simular_no_guarda(self):
+        archivo = _archivo('cliente,fecha,lectura_actual', f'{self.ana.id},2025-09-05,110')
+        resultado = importacion.importar_mediciones(archivo, simular=True)
+        self.assertEqual((resultado['guardadas'], resultado['errores']), (1, []))
+        self.assertEqual(Medicion.objects.count(), 1)
+
+    def test_columnas_faltantes(self):
+        with self.assertRaisesMessage(ValidationError, 'Faltan columnas en el archivo: lectura_actual'):
+            importacion.importar_mediciones(_archivo('cliente,fecha', f'{self.ana.id},2025-09-05'))
+
+
+class ImportarClientesTests(TestCase):
+    def setUp(self):
+        self.ana = Cliente.objects.create(nombre='Ana Rojas', direccion='Calle Uno 100', email='ana@prueba.cl',
+                                          telefono='+56911111111')
+
+    def _datos(self):
+        return list(Cliente.objects.order_by('email').values_list('id', 'nombre', 'email', 'direccion', 'telefono'))
+
+    def test_reimportar_sin_columna_telefono_no_lo_borra(self):
+        archivo = _archivo(
+            'nombre,email,direccion',
+            'Ana Rojas,ana@prueba.cl,Calle Vieja 900',
+            'Luis Soto,luis@prueba.cl,Calle Dos 200',
+            'Ana María Rojas,ana@prueba.cl,Calle Nueva 10',  # el email repetido: queda esta fila
+            'Pedro 2,pedro@prueba.cl,Calle Tres 300',
+            'Marta Díaz,no-es-un-email,Calle Cuatro 400',
+        )
+        resultado = importacion.importar_clientes(archivo)
+
+        self.assertEqual((resultado['leidas'], resultado['guardadas']), (5, 2))
+        self.assertEqual([(linea, email) for linea, email, _ in resultado['errores']], [
+            (5, 'pedro@prueba.cl'),
+            (6, 'no-es-un-email'),
+        ])
+        luis = Cliente.objects.get(email='luis@prueba.cl')
+        self.assertEqual(self._datos(), [
+            (self.ana.id, 'Ana María Rojas', 'ana@prueba.cl', 'Calle Nueva 10', '+56911111111'),
+            (luis.id, 'Luis Soto', 'luis@prueba.cl', 'Calle Dos 200', None),
+        ])
+
+    def test_columna_telefono_vacia_si_lo_actualiza(self):
+        archivo = _archivo('nombre,email,direccion,telefono', 'Ana Rojas,ana@prueba.cl,Calle Uno 100,')
+        self.assertEqual(importacion.importar_clientes(archivo)['errores'], [])
+        self.ana.refresh_from_db()
+        self.assertIsNone(self.ana.telefono)
+
+    def test_reimportar_la_exportacion_no_cambia_nada(self):
+        Cliente.objects.create(nombre='Luis Peña', direccion='Calle "Dos", 200', email='luis@prueba.cl')
+        antes = self._datos()
+        texto = ''.join(exportacion.exportar('clientes', 'csv'))
+        # La vista lee los archivos como utf-8-sig, sin el BOM
+        resultado = importacion.importar_clientes(io.StringIO(texto.lstrip('\ufeff'), newline=''))
+        self.assertEqual((resultado['guardadas'], resultado['errores']), (2, []))
+        self.assertEqual(self._datos(), antes)
@@ -0,0 +1,107 @@
+import itertools
+import re
+from datetime import date, timedelta
+from unittest import skipUnless
+
+from django.db import connection, transaction
+from django.test import TestCase
+
+from facturacion.forms import FiltroBoletasForm
+from facturacion.models import Boleta
+from facturacion.paginacion import TAMANO, posteriores
+
+HOY = date.today()
+FILTROS = {
+    'estado': {'estado': 'pendiente'},
+    'cliente': {'cliente': '1'},
+    'emision': {'emision_desde': HOY - timedelta(days=90), 'emision_hasta': HOY},
+    'vencimiento': {'vencimiento_desde': HOY, 'vencimiento_hasta': HOY + timedelta(days=30)},
+}
+TABLA = Boleta._meta.db_table
+
+# (filtro, orden) que se dejan sin índice a propósito: una combinación que incluye
+# alguno de estos filtros con ese orden puede ordenar el resultado aparte
+ORDENAR_APARTE = {
+    # Las boletas de un cliente son pocas; ordenarlas cuesta menos que un índice por orden
+    ('cliente', 'vencimiento'),
+    ('cliente', 'vencimiento_desc'),
+    ('cliente', 'monto'),
+    ('cliente', 'numero'),
+    # Un rango sobre una fecha y el orden por otra columna no caben en el mismo índice
+    ('emision', 'vencimiento'),
+    ('emision', 'vencimiento_desc'),
+    ('emision', 'monto'),
+    ('emision', 'numero'),
+    ('vencimiento', 'emision'),
+    ('vencimiento', 'emision_asc'),
+    ('vencimiento', 'monto'),
+    ('vencimiento', 'numero'),
+}
+
+
+def _valores_cursor(orden):
+    ejemplo = {'fecha_emision': HOY, 'fecha_vencimiento': HOY, 'monto_total': 10000,
+               'numero_boleta': 'B2025010001', 'id': 1000}
+    return [ejemplo[campo.lstrip('-')] for campo in orden]
+
+
+def _explicar(queryset):
+    if connection.vendor == 'sqlite':
+        return queryset.explain()
+    # Con pocas filas PostgreSQL prefiere Seq Scan aunque exista el índice;
+    # se desactiva para comprobar que el índice es utilizable
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        return queryset.explain()
+
+
+def _problema(plan, filtrado, puede_ordenar):
+    """Motivo por el que el plan no usa un índice adecuado, o None si lo usa"""
+    if connection.vendor == 'sqlite':
+        if re.search(rf'\bSCAN {TABLA}\b(?! USING)', plan):
+            return 'recorre la tabla completa'
+        if 'TEMP B-TREE FOR ORDER BY' in plan:
+            # Recorrer el índice del orden y cortar en el LIMIT es válido; recorrerlo
+            # y además ordenar aparte significa que ningún índice sirvió
+            if filtrado and re.search(rf'\bSCAN {TABLA} USING (COVERING )?INDEX\b', plan):
+                return 'recorre un índice completo en vez de buscar por rango'
+            if not puede_ordenar:
+                return 'ordena el resultado aparte'
+        return None
+    if re.search(rf'Seq Scan on {TABLA}\b', plan):
+        return 'recorre la tabla completa'
+    if 'Sort Key' in plan and not puede_ordenar:
+        return 'ordena el resultado aparte'
+    return None
+
+
+@skipUnless(connection.vendor in ('sqlite', 'postgresql'), 'Solo se interpretan los planes de SQLite y PostgreSQL')
+class IndicesListaBoletasTests(TestCase):
+    """Cada combinación de filtros y orden de lista_boletas usa un índice, salvo ORDENAR_APARTE"""
+
+    def test_planes(self):
+        fallas = []
+        for cantidad in range(len(FILTROS) + 1):
+            for nombres in itertools.combinations(FILTROS, cantidad):
+                for clave_orden, orden in FiltroBoletasForm.ORDENES.items():
+                    datos = {'orden': clave_orden}
+                    for nombre in nombres:
+                        datos.update(FILTROS[nombre])
+                    base = FiltroBoletasForm(datos).filtrar(Boleta.objects.select_related('cliente'))
+                    paginas = {
+                        'primera': base.order_by(*orden)[:TAMANO + 1],
+                        'con cursor': base.filter(posteriores(
+                            [(c.lstrip('-'), c.startswith('-')) for c in orden], _valores_cursor(orden)
+                        )).order_by(*orden)[:TAMANO + 1],
+                    }
+                    puede_ordenar = any((nombre, clave_orden) in ORDENAR_APARTE for nombre in nombres)
+                    for pagina, queryset in paginas.items():
+                        plan = _explicar(queryset)
+                        motivo = _problema(plan, bool(nombres) or pagina == 'con cursor', puede_ordenar)
+                        if motivo:
+                            fallas.append(
+                                f"filtros={'+'.join(nombres) or 'ninguno'} orden={clave_orden} "
+                                f"página={pagina}: {motivo}\n    {plan.replace(chr(10), chr(10) + '    ')}"
+                            )
+        self.assertEqual(fallas, [], '\n' + '\n'.join(fallas))
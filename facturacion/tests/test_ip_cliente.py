@@ -0,0 +1,25 @@
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from facturacion.middleware import ip_cliente
+
+
+class IpClienteTests(SimpleTestCase):
+    def _solicitud(self, reenviadas=None):
+        extra = {'HTTP_X_FORWARDED_FOR': reenviadas} if reenviadas else {}
+        return RequestFactory().get('/', REMOTE_ADDR='10.0.0.2', **extra)
+
+    @override_settings(PROXIES_CONFIABLES=0)
+    def test_sin_proxies_ignora_x_forwarded_for(self):
+        self.assertEqual(ip_cliente(self._solicitud('1.1.1.1')), '10.0.0.2')
+
+    @override_settings(PROXIES_CONFIABLES=1)
+    def test_toma_la_que_agrego_el_proxy(self):
+        # La primera la escribió el cliente para hacerse pasar por otra IP
+        self.assertEqual(ip_cliente(self._solicitud('1.1.1.1, 203.0.113.7')), '203.0.113.7')
+        self.assertEqual(ip_cliente(self._solicitud('203.0.113.7')), '203.0.113.7')
+
+    @override_settings(PROXIES_CONFIABLES=2)
+    def test_varios_proxies(self):
+        self.assertEqual(ip_cliente(self._solicitud('1.1.1.1, 203.0.113.7, 10.0.0.1')), '203.0.113.7')
+        # Menos direcciones que proxies: no pasó por todos
+        self.assertEqual(ip_cliente(self._solicitud('203.0.113.7')), '10.0.0.2')
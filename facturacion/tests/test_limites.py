@@ -0,0 +1,75 @@
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from facturacion.limites import CacheCompartida, Limitador, MemoriaLocal
+
+REGLAS = [('/api/', 10, 60)]
+ALMACENES = {'memoria': MemoriaLocal, 'cache': CacheCompartida}
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                                       'LOCATION': 'pruebas-limites'}})
+class LimitadorTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def _permitir(self, limitador, ahora, veces=1, ip='1.1.1.1'):
+        return [limitador.permitir(ip, '/api/boletas', ahora) for _ in range(veces)]
+
+    def test_ventana_deslizante(self):
+        for nombre, almacen in ALMACENES.items():
+            with self.subTest(almacen=nombre):
+                cache.clear()
+                limitador = Limitador(REGLAS, almacen())
+                self.assertEqual(self._permitir(limitador, 30, 10), [(True, 0)] * 10)
+                # A mitad de la ventana siguiente la anterior pesa la mitad: 5 + 5
+                self.assertEqual(self._permitir(limitador, 90, 5), [(True, 0)] * 5)
+                permitida, espera = limitador.permitir('1.1.1.1', '/api/boletas', 90)
+                self.assertFalse(permitida)
+                # 10 × (1 - 42/60) + 6 ya contadas + 1 reintento = 10
+                self.assertEqual(espera, 12)
+                self.assertEqual(self._permitir(limitador, 90 + espera), [(True, 0)])
+                # Otra IP y las rutas sin regla no se ven afectadas
+                self.assertEqual(self._permitir(limitador, 90, ip='2.2.2.2'), [(True, 0)])
+                self.assertEqual(limitador.permitir('1.1.1.1', '/clientes/', 90), (True, 0))
+
+    def test_espera_hasta_la_ventana_siguiente(self):
+        for nombre, almacen in ALMACENES.items():
+            with self.subTest(almacen=nombre):
+                cache.clear()
+                limitador = Limitador(REGLAS, almacen())
+                self._permitir(limitador, 30, 10)
+                permitida, espera = limitador.permitir('1.1.1.1', '/api/boletas', 30)
+                # 11 en la ventana: hace falta que pesen 9 en la siguiente, 60 × 2/11 s después
+                self.assertEqual((permitida, espera), (False, 41))
+                self.assertFalse(limitador.permitir('1.1.1.1', '/api/boletas', 30 + espera - 1)[0])
+
+                cache.clear()
+                limitador = Limitador(REGLAS, almacen())
+                self._permitir(limitador, 30, 11)
+                self.assertTrue(limitador.permitir('1.1.1.1', '/api/boletas', 30 + 41)[0])
+
+    def test_ventanas_no_consecutivas(self):
+        limitador = Limitador(REGLAS, MemoriaLocal())
+        self._permitir(limitador, 30, 10)
+        # Dos ventanas después, la anterior ya no cuenta
+        self.assertEqual(self._permitir(limitador, 150, 10), [(True, 0)] * 10)
+
+    def test_lru_de_memoria_local(self):
+        memoria = MemoriaLocal(maximo_claves=2)
+        self.assertEqual(memoria.contar('a', 0, 60), (1, 0))
+        self.assertEqual(memoria.contar('b', 0, 60), (1, 0))
+        self.assertEqual(memoria.contar('a', 0, 60), (2, 0))
+        # 'b' es la usada hace más tiempo
+        memoria.contar('c', 0, 60)
+        self.assertEqual(len(memoria), 2)
+        self.assertEqual(memoria.contar('a', 0, 60), (3, 0))
+        self.assertEqual(memoria.contar('b', 0, 60), (1, 0))
+        self.assertEqual(len(memoria), 2)
+
+    def test_cache_compartida_entre_workers(self):
+        workers = [Limitador(REGLAS, CacheCompartida()) for _ in range(2)]
+        resultados = [workers[i % 2].permitir('1.1.1.1', '/api/boletas', 30)[0] for i in range(11)]
+        self.assertEqual(resultados, [True] * 10 + [False])
+        # La ventana siguiente ve la anterior desde cualquiera de ellos
+        self.assertEqual(CacheCompartida().contar('0:1.1.1.1', 1, 60), (1, 11))
@@ -0,0 +1,74 @@
+import threading
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from django.db import IntegrityError, connection
+from django.test import TestCase, TransactionTestCase
+
+from facturacion.facturacion_masiva import facturar_periodo
+from facturacion.models import Boleta, Cliente, Medicion, SecuenciaBoleta
+from facturacion.numeracion import periodo_de, reservar_numeros
+
+FECHA = date(2025, 9, 30)
+
+
+class ReservaConcurrenteTests(TransactionTestCase):
+    """Varios hilos reservando a la vez no repiten ni saltan números"""
+
+    HILOS = 8
+    RESERVAS = 25
+
+    def _reservar_en_hilos(self, bloque):
+        numeros = []
+        errores = []
+        candado = threading.Lock()
+
+        def trabajar():
+            try:
+                propios = []
+                for _ in range(self.RESERVAS):
+                    primero = reservar_numeros(FECHA, bloque)
+                    propios.extend(range(primero, primero + bloque))
+                with candado:
+                    numeros.extend(propios)
+            except Exception as e:
+                errores.append(e)
+            finally:
+                connection.close()
+
+        hilos = [threading.Thread(target=trabajar) for _ in range(self.HILOS)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        self.assertEqual(errores, [])
+        return numeros
+
+    def test_reservas_de_a_uno(self):
+        numeros = self._reservar_en_hilos(1)
+        self.assertEqual(sorted(numeros), list(range(1, self.HILOS * self.RESERVAS + 1)))
+
+    def test_reservas_en_bloque(self):
+        numeros = self._reservar_en_hilos(5)
+        self.assertEqual(sorted(numeros), list(range(1, self.HILOS * self.RESERVAS * 5 + 1)))
+        self.assertEqual(SecuenciaBoleta.objects.get(periodo=periodo_de(FECHA)).ultimo_numero, len(numeros))
+
+
+class FacturarPeriodoTests(TestCase):
+    def setUp(self):
+        for i in range(3):
+            cliente = Cliente.objects.create(nombre=f'Cliente {i}', direccion='Calle 1', email=f'c{i}@prueba.cl')
+            Medicion.objects.create(cliente=cliente, fecha=date(2025, 9, 5), consumo_m3=Decimal('12.50'))
+
+    def test_lote_fallido_no_consume_numeros(self):
+        with mock.patch.object(Boleta.objects, 'bulk_create', side_effect=IntegrityError('medición ya facturada')):
+            with self.assertRaises(IntegrityError):
+                facturar_periodo(2025, 9, fecha_emision=FECHA)
+        self.assertFalse(SecuenciaBoleta.objects.filter(periodo='202509', ultimo_numero__gt=0).exists())
+
+        self.assertEqual(facturar_periodo(2025, 9, fecha_emision=FECHA)['creadas'], 3)
+        self.assertEqual(
+            sorted(Boleta.objects.values_list('numero_boleta', flat=True)),
+            ['B2025090001', 'B2025090002', 'B2025090003'],
+        )
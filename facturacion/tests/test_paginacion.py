@@ -0,0 +1,104 @@
+import base64
+import json
+from datetime import date, timedelta
+from decimal import Decimal
+from urllib.parse import parse_qs, urlparse
+
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+
+from facturacion.models import Boleta, Cliente, Medicion
+from facturacion.paginacion import paginar
+
+NOMBRES = ['Ana Rojas', 'Ana Rojas', 'Ana Rojas', 'Bea Soto', 'Bea Soto', 'Carla Díaz', 'Carla Díaz']
+
+
+def _cursor(datos):
+    return base64.urlsafe_b64encode(json.dumps(datos).encode()).decode().rstrip('=')
+
+
+class PaginarTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # Los nombres se repiten: el id desempata
+        for i, nombre in enumerate(NOMBRES[::-1]):
+            Cliente.objects.create(nombre=nombre, direccion='Calle 1', email=f'c{i}@prueba.cl')
+        cliente = Cliente.objects.first()
+        for i in range(5):
+            medicion = Medicion.objects.create(cliente=cliente, fecha=date(2025, 9, 5), consumo_m3=Decimal('10'))
+            Boleta.objects.create(
+                cliente=cliente, medicion=medicion, fecha_emision=date(2025, 9, 5),
+                fecha_vencimiento=date(2025, 10, 5), monto_total=Decimal('5000') if i < 3 else Decimal('7000'),
+            )
+
+    def _pagina(self, queryset, orden, cursor=None):
+        parametros = {'cursor': cursor} if cursor else {}
+        return paginar(RequestFactory().get('/', parametros), queryset, orden, tamano=2)
+
+    def _cursor_de(self, url):
+        return parse_qs(urlparse(url).query)['cursor'][0]
+
+    def _recorrer(self, queryset, orden):
+        """ids de todas las páginas hacia adelante y luego de vuelta hacia atrás"""
+        paginas = [self._pagina(queryset, orden)]
+        self.assertIsNone(paginas[0].url_anterior)
+        while paginas[-1].url_siguiente:
+            paginas.append(self._pagina(queryset, orden, self._cursor_de(paginas[-1].url_siguiente)))
+        adelante = [[objeto.id for objeto in pagina] for pagina in paginas]
+
+        atras = [adelante[-1]]
+        pagina = paginas[-1]
+        while pagina.url_anterior:
+            pagina = self._pagina(queryset, orden, self._cursor_de(pagina.url_anterior))
+            atras.insert(0, [objeto.id for objeto in pagina])
+        return adelante, atras
+
+    def test_recorre_con_empates(self):
+        casos = [
+            (Cliente.objects.all(), ['nombre', 'id']),
+            (Medicion.objects.all(), ['-fecha', '-id']),
+            (Boleta.objects.all(), ['-monto_total', '-id']),
+        ]
+        for queryset, orden in casos:
+            with self.subTest(orden=orden):
+                adelante, atras = self._recorrer(queryset, orden)
+                esperado = list(queryset.order_by(*orden).values_list('id', flat=True))
+                self.assertEqual(sum(adelante, []), esperado)
+                self.assertTrue(all(len(ids) == 2 for ids in adelante[:-1]))
+                self.assertEqual(atras, adelante)
+
+    def test_cursor_invalido_muestra_la_primera_pagina(self):
+        casos = [
+            (Cliente.objects.all(), ['nombre', 'id'], [
+                'no es base64!', 'ñ', _cursor('texto'), _cursor([1, 2]), _cursor({'d': 'siguiente'}),
+                _cursor({'d': 'otra', 'v': ['Ana Rojas', 1]}),
+                _cursor({'d': 'siguiente', 'v': ['Ana Rojas']}),
+                _cursor({'d': 'siguiente', 'v': 5}),
+                _cursor({'d': 'siguiente', 'v': [None, 1]}),
+                _cursor({'d': 'siguiente', 'v': ['Ana Rojas', 'uno']}),
+                _cursor({'d': 'anterior', 'v': ['Ana Rojas', 10 ** 30]}),
+            ]),
+            (Medicion.objects.all(), ['-fecha', '-id'], [
+                _cursor({'d': 'siguiente', 'v': ['2025-13-45', 1]}),
+                _cursor({'d': 'anterior', 'v': [{'a': 1}, 1]}),
+            ]),
+            (Boleta.objects.all(), ['-monto_total', '-id'], [
+                _cursor({'d': 'siguiente', 'v': ['NaN', 1]}),
+                _cursor({'d': 'siguiente', 'v': ['Infinity', 1]}),
+                _cursor({'d': 'siguiente', 'v': ['1e999999', 1]}),
+            ]),
+        ]
+        for queryset, orden, cursores in casos:
+            primera = [objeto.id for objeto in self._pagina(queryset, orden)]
+            for cursor in cursores:
+                with self.subTest(orden=orden, cursor=cursor):
+                    pagina = self._pagina(queryset, orden, cursor)
+                    self.assertEqual([objeto.id for objeto in pagina], primera)
+                    self.assertIsNone(pagina.url_anterior)
+
+    def test_vista_con_cursor_invalido(self):
+        cursor = _cursor({'d': 'siguiente', 'v': [None, 10 ** 30]})
+        for nombre in ('lista_clientes', 'lista_mediciones', 'lista_boletas', 'lista_avisos'):
+            with self.subTest(nombre):
+                response = self.client.get(reverse(nombre), {'cursor': cursor})
+                self.assertEqual(response.status_code, 200)
@@ -0,0 +1,292 @@
+import random
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from urllib.parse import urlencode
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from facturacion import repeticiones, resumen
+from facturacion.models import Aviso, AvisoMasivo, Boleta, Cliente, DestinatarioAviso, Medicion, SecuenciaBoleta
+from facturacion.numeracion import formatear_numero, periodo_de
+from facturacion.urls import urlpatterns
+
+CLIENTES = 1000
+MESES = 12
+FILAS_CSV = 50
+
+# Máximo de consultas por solicitud GET a cada URL de facturacion/urls.py que
+# solo lee, incluidas las de la sesión y el usuario, con la caché vacía. No debe
+# depender del tamaño de los datos.
+PRESUPUESTOS = {
+    'home': 4,
+    'lista_clientes': 1,
+    'importar_clientes': 0,
+    'exportar_clientes': 1,
+    'crear_cliente': 0,
+    'autocompletar_clientes': 2,
+    'detalle_cliente': 5,
+    'editar_cliente': 1,
+    'eliminar_cliente': 1,
+    'mediciones_cliente': 1,
+    'lista_mediciones': 1,
+    'importar_mediciones': 0,
+    'exportar_mediciones': 1,
+    'crear_medicion': 0,
+    'editar_medicion': 2,
+    'eliminar_medicion': 1,
+    'lista_boletas': 1,
+    'descargar_zip_boletas': 1,
+    'exportar_boletas': 1,
+    'generar_boleta': 0,
+    'generar_pdf_boleta': 1,
+    'cambiar_estado_boleta': 1,
+    'eliminar_boleta': 1,
+    'lista_avisos': 2,
+    'crear_aviso': 0,
+    'crear_aviso_masivo': 0,
+    'editar_aviso': 2,
+    'eliminar_aviso': 1,
+    'buscar': 5,
+    'reportes': 4,
+    'simulador_tarifas': 2,
+    'metricas': 2,
+}
+
+# Lo mismo para las solicitudes que modifican datos: POST salvo las de
+# MODIFICAN_CON_GET, que cambian datos con un GET y por eso no van en PRESUPUESTOS
+PRESUPUESTOS_ESCRITURA = {
+    'importar_clientes': 3,
+    'crear_medicion': 9,
+    'importar_mediciones': 10,
+    # Cliente, medición, tarifas (2) y la transacción de Boleta.save: savepoint,
+    # número (UPDATE ... RETURNING), INSERT, resumen y release. La primera
+    # boleta del mes además busca el último número y crea la secuencia (+4).
+    'generar_boleta': 13,
+    'cambiar_estado_boleta': 4,
+    'eliminar_cliente': 30,
+    'eliminar_medicion': 8,
+    'eliminar_boleta': 6,
+    'eliminar_aviso': 3,
+    'crear_aviso_masivo': 4,
+    'toggle_cliente_activo': 3,
+    'enviar_boleta_email': 2,
+    'enviar_aviso_email': 2,
+    'enviar_aviso_masivo': 2,
+}
+# generar_boleta cuando la secuencia del mes ya existe, el caso habitual
+PRESUPUESTO_GENERAR_BOLETA_CON_SECUENCIA = 9
+MODIFICAN_CON_GET = {'toggle_cliente_activo', 'enviar_boleta_email', 'enviar_aviso_email', 'enviar_aviso_masivo'}
+
+# Vistas que repiten una consulta a propósito, sin contar como N+1
+REPETICIONES_PERMITIDAS = {
+    # Descuenta del resumen un UPDATE por cada mes con boletas o mediciones del cliente
+    'eliminar_cliente',
+}
+
+NOMBRES = ['José', 'María', 'Ángela', 'Sebastián', 'Inés', 'Raúl', 'Verónica', 'Joaquín', 'Lucía', 'Andrés']
+APELLIDOS = ['Pérez', 'González', 'Muñoz', 'Rodríguez', 'Núñez', 'Martínez', 'Álvarez', 'Peña', 'Fernández', 'Díaz']
+
+
+def _poblar(cantidad, meses, rng):
+    """Base de tamaño realista; devuelve los ids que usan las URLs"""
+    Cliente.objects.bulk_create([
+        Cliente(
+            nombre=f'{rng.choice(NOMBRES)} {rng.choice(APELLIDOS)} {rng.choice(APELLIDOS)}',
+            email=f'cliente{i}@presupuesto.prueba',
+            direccion=f'Calle {rng.randint(1, 999)} #{rng.randint(1, 9999)}',
+            telefono=f'+569{rng.randint(10000000, 99999999)}',
+        )
+        for i in range(cantidad)
+    ], batch_size=1000)
+    clientes = list(Cliente.objects.values_list('id', flat=True))
+
+    hoy = date.today().replace(day=1)
+    fechas = [(hoy - timedelta(days=31 * mes)).replace(day=5) for mes in range(meses)]
+    Medicion.objects.bulk_create([
+        Medicion(cliente_id=cliente_id, fecha=fecha, consumo_m3=Decimal(rng.randint(300, 4500)) / 100)
+        for cliente_id in clientes for fecha in fechas
+    ], batch_size=1000)
+
+    # Boletas para todas las mediciones salvo las del mes actual, que quedan sin facturar
+    correlativos = {}
+    boletas = []
+    for medicion in Medicion.objects.filter(fecha__lt=hoy).order_by('id').iterator():
+        correlativos[medicion.fecha] = correlativos.get(medicion.fecha, 0) + 1
+        boletas.append(Boleta(
+            cliente_id=medicion.cliente_id,
+            medicion=medicion,
+            fecha_emision=medicion.fecha,
+            fecha_vencimiento=medicion.fecha + timedelta(days=30),
+            monto_total=medicion.consumo_m3 * 500,
+            estado=rng.choice(['pendiente', 'pagada', 'pagada', 'vencida']),
+            numero_boleta=formatear_numero(medicion.fecha, correlativos[medicion.fecha]),
+        ))
+    Boleta.objects.bulk_create(boletas, batch_size=1000)
+
+    Aviso.objects.bulk_create([
+        Aviso(cliente_id=cliente_id, tipo_aviso='recordatorio_pago', titulo=f'Recordatorio {n + 1}',
+              mensaje='Su boleta vence pronto.', enviado=n > 0)
+        for cliente_id in clientes for n in range(2)
+    ], batch_size=1000)
+    for n in range(3):
+        aviso = AvisoMasivo.objects.create(tipo_aviso='mantenimiento', titulo=f'Mantenimiento {n + 1}',
+                                           mensaje='Corte de agua programado.')
+        DestinatarioAviso.objects.bulk_create([
+            DestinatarioAviso(aviso=aviso, cliente_id=cliente_id) for cliente_id in clientes
+        ], batch_size=1000)
+    resumen.reconstruir()
+
+    cliente_id = clientes[0]
+    return {
+        'usuario': User.objects.create_superuser('presupuesto', 'presupuesto@presupuesto.prueba', 'presupuesto'),
+        'hoy': date.today(),
+        'cliente_id': cliente_id,
+        'medicion_id': Medicion.objects.filter(cliente_id=cliente_id).values_list('id', flat=True).first(),
+        'medicion_sin_boleta_id': Medicion.objects.filter(cliente_id=cliente_id, fecha__gte=hoy).values_list(
+            'id', flat=True).first(),
+        'boleta_id': Boleta.objects.filter(cliente_id=cliente_id).values_list('id', flat=True).first(),
+        'aviso_id': Aviso.objects.filter(cliente_id=cliente_id).values_list('id', flat=True).first(),
+        'aviso_masivo_id': AvisoMasivo.objects.values_list('id', flat=True).first(),
+    }
+
+
+def _parametros(datos):
+    """Parámetros GET de cada URL; las vistas que no aparecen se piden sin ellos"""
+    return {
+        'autocompletar_clientes': {'q': 'Mar'},
+        'descargar_zip_boletas': {'cliente': datos['cliente_id']},
+        'lista_boletas': {'estado': 'pendiente'},
+        'buscar': {'q': 'Pérez'},
+        'simulador_tarifas': {'escenarios': 'Propuesta; 1500; 0=400, 10=600, 30=900', 'meses': 12},
+    }
+
+
+def _csv(nombre, lineas):
+    return SimpleUploadedFile(nombre, '\n'.join(lineas).encode(), content_type='text/csv')
+
+
+def _formularios(datos):
+    """Datos POST de las escrituras"""
+    futuro = datos['hoy'] + timedelta(days=60)
+    return {
+        'importar_clientes': {'archivo': _csv('clientes.csv', ['nombre,email,direccion', *(
+            f'{NOMBRES[i % 10]} {APELLIDOS[i // 10]},importado{i}@presupuesto.prueba,Calle Nueva {i}'
+            for i in range(FILAS_CSV)
+        )])},
+        'crear_medicion': {'cliente': datos['cliente_id'], 'fecha': futuro, 'lectura_anterior': 100,
+                           'lectura_actual': 125},
+        'importar_mediciones': {'archivo': _csv('mediciones.csv', ['cliente,fecha,lectura_anterior,lectura_actual', *(
+            f'cliente{i}@presupuesto.prueba,{futuro:%Y-%m-%d},100,{120 + i}' for i in range(FILAS_CSV)
+        )])},
+        'generar_boleta': {'cliente': datos['cliente_id'], 'medicion': datos['medicion_sin_boleta_id'],
+                           'fecha_vencimiento': futuro},
+        'cambiar_estado_boleta': {'estado': 'pagada'},
+        'crear_aviso_masivo': {'tipo_aviso': 'mantenimiento', 'titulo': 'Corte programado',
+                               'mensaje': 'Sin agua el martes.', 'solo_activos': 'on'},
+    }
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                        'LOCATION': 'presupuesto-consultas'}},
+    LIMITE_SOLICITUDES=[],
+    CONSULTAS_REPETIDAS=False,
+    CONSULTAS_LENTAS=False,
+    METRICAS_DIRECTORIO=None,
+)
+class PresupuestoConsultasTests(TestCase):
+    """Cada URL se mantiene dentro de su presupuesto de consultas y sin N+1"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls._media = tempfile.TemporaryDirectory()
+        cls._media_settings = override_settings(MEDIA_ROOT=cls._media.name)
+        cls._media_settings.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls._media_settings.disable()
+        cls._media.cleanup()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.datos = _poblar(CLIENTES, MESES, random.Random(1))
+
+    def setUp(self):
+        self.client.force_login(self.datos['usuario'])
+
+    def _url(self, nombre, **argumentos):
+        patron = next(patron for patron in urlpatterns if patron.name == nombre)
+        argumentos = {clave: argumentos.get(clave, self.datos.get(clave)) for clave in patron.pattern.converters}
+        return reverse(nombre, kwargs=argumentos)
+
+    def _medir(self, metodo, url, datos=None):
+        """Pide la URL y deshace lo que haya escrito; devuelve la respuesta y el detector"""
+        cache.clear()
+        with transaction.atomic():
+            with repeticiones.detectar() as detector:
+                response = getattr(self.client, metodo)(url, datos or {})
+                if response.streaming:
+                    # Las descargas consultan mientras se envían
+                    b''.join(response.streaming_content)
+            transaction.set_rollback(True)
+        return response, detector
+
+    def _revisar(self, nombre, presupuesto, response, detector):
+        self.assertLess(response.status_code, 400)
+        if nombre not in REPETICIONES_PERMITIDAS:
+            self.assertEqual(detector.repetidas(), [], f'{nombre} repite consultas (posible N+1)')
+        self.assertLessEqual(detector.total, presupuesto, f'{nombre} hizo {detector.total} consultas')
+
+    def test_todas_las_urls_tienen_presupuesto(self):
+        for patron in urlpatterns:
+            with self.subTest(patron.name):
+                self.assertTrue(patron.name in PRESUPUESTOS or patron.name in PRESUPUESTOS_ESCRITURA)
+                self.assertFalse(patron.name in MODIFICAN_CON_GET and patron.name in PRESUPUESTOS)
+
+    def test_lecturas(self):
+        parametros = _parametros(self.datos)
+        for nombre, presupuesto in PRESUPUESTOS.items():
+            with self.subTest(nombre):
+                url = self._url(nombre)
+                if nombre in parametros:
+                    url += '?' + urlencode(parametros[nombre])
+                self._revisar(nombre, presupuesto, *self._medir('get', url))
+
+    def test_escrituras(self):
+        formularios = _formularios(self.datos)
+        for nombre, presupuesto in PRESUPUESTOS_ESCRITURA.items():
+            with self.subTest(nombre):
+                metodo = 'get' if nombre in MODIFICAN_CON_GET else 'post'
+                response, detector = self._medir(metodo, self._url(nombre), formularios.get(nombre))
+                if nombre.startswith('importar_'):
+                    self.assertEqual(response.context['resultado']['guardadas'], FILAS_CSV)
+                else:
+                    self.assertEqual(response.status_code, 302, f'{nombre} no redirigió: ¿formulario inválido?')
+                self._revisar(nombre, presupuesto, response, detector)
+
+    def test_generar_boleta_con_secuencia_del_mes(self):
+        SecuenciaBoleta.objects.create(periodo=periodo_de(timezone.localdate()), ultimo_numero=0)
+        formulario = _formularios(self.datos)['generar_boleta']
+        response, detector = self._medir('post', self._url('generar_boleta'), formulario)
+        self.assertEqual(response.status_code, 302)
+        self._revisar('generar_boleta', PRESUPUESTO_GENERAR_BOLETA_CON_SECUENCIA, response, detector)
+
+    def test_envio_masivo_no_depende_de_los_destinatarios(self):
+        pequeno = AvisoMasivo.objects.create(tipo_aviso='mantenimiento', titulo='Pequeño', mensaje='Corte.')
+        DestinatarioAviso.objects.bulk_create([
+            DestinatarioAviso(aviso=pequeno, cliente_id=cliente_id)
+            for cliente_id in Cliente.objects.values_list('id', flat=True)[:5]
+        ])
+        _, grande = self._medir('get', self._url('enviar_aviso_masivo'))
+        _, chico = self._medir('get', self._url('enviar_aviso_masivo', aviso_masivo_id=pequeno.id))
+        self.assertEqual(grande.total, chico.total)
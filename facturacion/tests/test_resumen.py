@@ -0,0 +1,44 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+
+from facturacion import resumen
+from facturacion.models import Boleta, Cliente, Medicion, ResumenMensual
+
+MESES = 6
+
+
+class AcumulandoTests(TestCase):
+    def setUp(self):
+        self.otro = Cliente.objects.create(nombre='Otro', direccion='Calle 2', email='otro@prueba.cl')
+        self.cliente = Cliente.objects.create(nombre='Ana', direccion='Calle 1', email='ana@prueba.cl')
+        for dueno in (self.otro, self.cliente):
+            for mes in range(1, MESES + 1):
+                medicion = Medicion.objects.create(cliente=dueno, fecha=date(2025, mes, 5), consumo_m3=Decimal('10.5'))
+                Boleta.objects.create(cliente=dueno, medicion=medicion, fecha_emision=medicion.fecha,
+                                      fecha_vencimiento=medicion.fecha + timedelta(days=30),
+                                      monto_total=Decimal('5250'), estado='pagada' if mes % 2 else 'pendiente')
+
+    def _resumen(self):
+        return list(ResumenMensual.objects.order_by('periodo').values_list(
+            'periodo', 'boletas_pendientes', 'boletas_pagadas', 'monto_facturado', 'monto_recaudado',
+            'mediciones', 'consumo_m3',
+        ))
+
+    def test_aplica_una_vez_por_mes_al_salir(self):
+        boletas = [resumen.cambios_de(boleta, -1) for boleta in self.cliente.boleta_set.all()]
+        mediciones = [resumen.cambios_de(medicion, -1) for medicion in self.cliente.medicion_set.all()]
+        # Un UPDATE por mes, en la transacción de quien llama
+        with self.assertNumQueries(MESES):
+            with resumen.acumulando():
+                resumen.aplicar(boletas)
+                resumen.aplicar(mediciones)
+
+    def test_borrado_en_cascada(self):
+        with resumen.acumulando():
+            self.cliente.delete()
+        despues = self._resumen()
+        resumen.reconstruir()
+        self.assertEqual(despues, self._resumen())
+        self.assertEqual(despues[0][1:], (0, 1, Decimal('5250'), Decimal('5250'), 1, Decimal('10.5')))
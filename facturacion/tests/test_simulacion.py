@@ -0,0 +1,30 @@
+from datetime import date, datetime, timezone as tz
+from unittest import mock
+
+from django.core.exceptions import ValidationError
+from django.test import SimpleTestCase, override_settings
+
+from facturacion.simulacion import leer_escenario, periodo
+
+
+class LeerEscenarioTests(SimpleTestCase):
+    def test_acepta_hasta_dos_decimales(self):
+        nombre, _ = leer_escenario('Propuesta; 1500.50; 0=400, 10.25=600.10, 30=900.000')
+        self.assertEqual(nombre, 'Propuesta')
+
+    def test_rechaza_mas_de_dos_decimales(self):
+        for texto in ('A; 1500.505; 0=400', 'A; 1500; 0=400.001', 'A; 1500; 0=400, 10.125=600',
+                      'A; 1500; 0=Infinity'):
+            with self.assertRaisesMessage(ValidationError, 'hasta 2 decimales'):
+                leer_escenario(texto)
+
+
+class PeriodoTests(SimpleTestCase):
+    @override_settings(USE_TZ=True, TIME_ZONE='America/Santiago')
+    def test_usa_la_fecha_local(self):
+        # 02:00 UTC del 1 de octubre todavía es 30 de septiembre en Santiago
+        with mock.patch('django.utils.timezone.now', return_value=datetime(2025, 10, 1, 2, 0, tzinfo=tz.utc)):
+            self.assertEqual(periodo(3), (date(2025, 7, 1), date(2025, 9, 30)))
+
+    def test_cruza_el_anio(self):
+        self.assertEqual(periodo(12, hoy=date(2025, 1, 15)), (date(2024, 2, 1), date(2025, 1, 15)))
@@ -0,0 +1,113 @@
+import random
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from facturacion import pdf_cache, tarifas
+from facturacion.facturacion_masiva import facturar_periodo
+from facturacion.models import Boleta, Cliente, Medicion, Tarifa
+from facturacion.pdf import renderizar_boleta
+from facturacion.tarifas import Tarifario
+
+TARIFARIO = Tarifario([
+    (date(2025, 1, 1), '1500', [('0', '400'), ('10', '600'), ('30', '900.50')]),
+    (date(2025, 7, 1), '0', [('0', '500')]),
+])
+
+
+class TarifarioTests(SimpleTestCase):
+    def test_montos_igual_a_monto(self):
+        azar = random.Random(20)
+        consumos = [Decimal(azar.randint(0, 10000)).scaleb(-2) for _ in range(2000)]
+        consumos += [Decimal('10'), Decimal('10.01'), Decimal('30'), Decimal('30.01')]
+        fechas = [date(2025, azar.randint(1, 12), azar.randint(1, 28)) for _ in consumos]
+        self.assertEqual(
+            TARIFARIO.montos(consumos, fechas),
+            [TARIFARIO.monto(consumo, fecha) for consumo, fecha in zip(consumos, fechas)],
+        )
+
+    def test_limites_de_tramo(self):
+        junio = date(2025, 6, 30)
+        casos = {
+            '0': '1500.00',
+            '10': '5500.00',  # 1500 + 10 × 400
+            '10.01': '5506.00',  # + 0,01 × 600
+            '30': '17500.00',  # 5500 + 20 × 600
+            '30.01': '17509.01',  # + 0,01 × 900,50 = 9,005, mitad hacia arriba
+        }
+        for consumo, esperado in casos.items():
+            with self.subTest(consumo=consumo):
+                self.assertEqual(TARIFARIO.monto(Decimal(consumo), junio), Decimal(esperado))
+                self.assertEqual(TARIFARIO.montos([Decimal(consumo)], [junio]), [Decimal(esperado)])
+        # La tarifa nueva rige desde su primer día
+        self.assertEqual(TARIFARIO.monto(Decimal('10'), date(2025, 7, 1)), Decimal('5000.00'))
+
+    def test_cobros_guardan_tarifa_y_lineas(self):
+        cobro, = TARIFARIO.cobros([Decimal('12.5')], [date(2025, 3, 1)])
+        self.assertEqual(cobro, {
+            'tarifa': '2025-01-01',
+            'lineas': [
+                ['Cargo fijo', None, None, '1500'],
+                ['0 a 10 m³', '10', '400', '4000'],
+                ['10 a 30 m³', '2.5', '600', '1500.0'],
+            ],
+        })
+
+    def test_sin_tarifa_para_la_fecha(self):
+        anterior = date(2024, 12, 31)
+        with self.assertRaisesMessage(ValidationError, 'No hay una tarifa vigente'):
+            TARIFARIO.monto(Decimal('5'), anterior)
+        with self.assertRaisesMessage(ValidationError, 'No hay una tarifa vigente'):
+            TARIFARIO.montos([Decimal('5'), Decimal('5')], [date(2025, 1, 1), anterior])
+        with self.assertRaisesMessage(ValidationError, 'No hay una tarifa vigente'):
+            TARIFARIO.cobros([Decimal('5')], [anterior])
+
+
+class TarifasGuardadasTests(TestCase):
+    # La migración 0008 crea la tarifa base: 500 por m³ desde el 1/1/2000
+
+    def setUp(self):
+        tarifas.invalidar()
+        self.cliente = Cliente.objects.create(nombre='Ana Rojas', direccion='Calle 1', email='ana@prueba.cl')
+
+    def test_monto_calculado_sin_tarifa(self):
+        medicion = Medicion.objects.create(cliente=self.cliente, fecha=date(1999, 12, 31), consumo_m3=Decimal('5'))
+        self.assertIsNone(medicion.monto_calculado)
+
+        admin = User.objects.create_superuser('admin', 'admin@prueba.cl', 'clave')
+        self.client.force_login(admin)
+        response = self.client.get(reverse('admin:facturacion_medicion_changelist'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_pdf_usa_el_desglose_de_la_emision(self):
+        Medicion.objects.create(cliente=self.cliente, fecha=date(2025, 9, 5), consumo_m3=Decimal('12.5'))
+        facturar_periodo(2025, 9, fecha_emision=date(2025, 9, 30))
+        boleta = Boleta.objects.get()
+        antes = pdf_cache.datos_boleta(boleta)
+        self.assertEqual(antes['tarifa_vigente_desde'], '2000-01-01')
+        self.assertEqual(antes['tarifa'], [['Sobre 0 m³', '12.50', '500.00', '6250.0000']])
+        self.assertEqual(sum(Decimal(linea[3]) for linea in antes['tarifa']), boleta.monto_total)
+
+        # Una tarifa nueva para la misma fecha no cambia la boleta ya emitida
+        Tarifa.objects.create(nombre='Nueva', vigente_desde=date(2025, 1, 1), cargo_fijo=1000)
+        tarifas.invalidar()
+        boleta.refresh_from_db()
+        self.assertEqual(pdf_cache.datos_boleta(boleta), antes)
+
+        # La tarifa forma parte de la clave del caché
+        otra = dict(antes, tarifa_vigente_desde='2025-01-01')
+        self.assertNotEqual(pdf_cache.clave(otra), pdf_cache.clave(antes))
+
+    def test_boleta_sin_desglose(self):
+        medicion = Medicion.objects.create(cliente=self.cliente, fecha=date(2025, 9, 5), consumo_m3=Decimal('10'))
+        boleta = Boleta.objects.create(
+            cliente=self.cliente, medicion=medicion, fecha_emision=date(2025, 9, 5),
+            fecha_vencimiento=date(2025, 10, 5), monto_total=Decimal('5000'),
+        )
+        datos = pdf_cache.datos_boleta(boleta)
+        self.assertIsNone(datos['tarifa'])
+        self.assertTrue(renderizar_boleta(datos).startswith(b'%PDF'))
@@ -7,20 +7,28 @@ urlpatterns = [
     
     # Gestión de clientes
     path('clientes/', views.lista_clientes, name='lista_clientes'),
+    path('clientes/importar/', views.importar_clientes, name='importar_clientes'),
+    path('clientes/exportar/', views.exportar_clientes, name='exportar_clientes'),
     path('clientes/crear/', views.crear_cliente, name='crear_cliente'),
+    path('clientes/autocompletar/', views.autocompletar_clientes, name='autocompletar_clientes'),
     path('clientes/<int:cliente_id>/', views.detalle_cliente, name='detalle_cliente'),
     path('clientes/<int:cliente_id>/editar/', views.editar_cliente, name='editar_cliente'),
     path('clientes/<int:cliente_id>/eliminar/', views.eliminar_cliente, name='eliminar_cliente'),
     path('clientes/<int:cliente_id>/toggle-activo/', views.toggle_cliente_activo, name='toggle_cliente_activo'),
+    path('clientes/<int:cliente_id>/mediciones/', views.mediciones_cliente, name='mediciones_cliente'),
     
     # Gestión de mediciones
     path('mediciones/', views.lista_mediciones, name='lista_mediciones'),
+    path('mediciones/importar/', views.importar_mediciones, name='importar_mediciones'),
+    path('mediciones/exportar/', views.exportar_mediciones, name='exportar_mediciones'),
     path('mediciones/crear/', views.crear_medicion, name='crear_medicion'),
     path('mediciones/<int:medicion_id>/editar/', views.editar_medicion, name='editar_medicion'),
     path('mediciones/<int:medicion_id>/eliminar/', views.eliminar_medicion, name='eliminar_medicion'),
     
     # Gestión de boletas
     path('boletas/', views.lista_boletas, name='lista_boletas'),
+    path('boletas/zip/', views.descargar_zip_boletas, name='descargar_zip_boletas'),
+    path('boletas/exportar/', views.exportar_boletas, name='exportar_boletas'),
     path('boletas/generar/', views.generar_boleta, name='generar_boleta'),
     path('boletas/<int:boleta_id>/pdf/', views.generar_pdf_boleta, name='generar_pdf_boleta'),
     path('boletas/<int:boleta_id>/enviar/', views.enviar_boleta_email, name='enviar_boleta_email'),
@@ -30,6 +38,8 @@ urlpatterns = [
     # Gestión de avisos
     path('avisos/', views.lista_avisos, name='lista_avisos'),
     path('avisos/crear/', views.crear_aviso, name='crear_aviso'),
+    path('avisos/masivo/crear/', views.crear_aviso_masivo, name='crear_aviso_masivo'),
+    path('avisos/masivo/<int:aviso_masivo_id>/enviar/', views.enviar_aviso_masivo, name='enviar_aviso_masivo'),
     path('avisos/<int:aviso_id>/editar/', views.editar_aviso, name='editar_aviso'),
     path('avisos/<int:aviso_id>/eliminar/', views.eliminar_aviso, name='eliminar_aviso'),
     path('avisos/<int:aviso_id>/enviar/', views.enviar_aviso_email, name='enviar_aviso_email'),
@@ -37,4 +47,6 @@ urlpatterns = [
     # Búsqueda y reportes
     path('buscar/', views.buscar, name='buscar'),
     path('reportes/', views.reportes, name='reportes'),
+    path('reportes/tarifas/', views.simulador_tarifas, name='simulador_tarifas'),
+    path('metrics', views.metricas_prometheus, name='metricas'),
 ]
@@ -1,37 +1,50 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
-from django.http import HttpResponse, Http404
-from django.core.mail import send_mail
+from django.http import HttpResponse, Http404, JsonResponse, StreamingHttpResponse
 from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.template.loader import render_to_string
 from django.utils import timezone
+from django.db.models import Count, Q
+from django.db import transaction
+from django.db.models.functions import Substr
 from datetime import datetime, timedelta
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib import colors
-from io import BytesIO
+import hmac
+import io
 import os
 
-from .models import Cliente, Medicion, Boleta, Aviso
-from .forms import ClienteForm, MedicionForm, BoletaForm, AvisoForm
+from .models import Cliente, Medicion, Boleta, Aviso, AvisoMasivo
+from .forms import (
+    ClienteForm, MedicionForm, BoletaForm, AvisoForm, AvisoMasivoForm, FiltroBoletasForm, ImportarCSVForm,
+    SimuladorTarifasForm,
+    etiqueta_medicion, mediciones_sin_facturar,
+)
+from . import busqueda, contadores, exportacion, importacion, metricas, pdf_cache, resumen, simulacion
+from .tarifas import tarifa_vigente, tarifario
+from .descargas import zip_boletas
+from .correo import encolar_aviso, encolar_boleta
+from .avisos import avisos_de_cliente, encolar_aviso_masivo, registrar_aviso_masivo
+from .paginacion import paginar
 
 
 def home(request):
     """Página principal del sistema"""
+    cifras = contadores.obtener()
     context = {
-        'total_clientes': Cliente.objects.filter(activo=True).count(),
-        'boletas_pendientes': Boleta.objects.filter(estado='pendiente').count(),
-        'aviso_pendientes': Aviso.objects.filter(enviado=False).count(),
-        'ultimas_mediciones': Medicion.objects.select_related('cliente').order_by('-fecha')[:5],
+        'total_clientes': cifras['clientes']['activos'],
+        'boletas_pendientes': cifras['boletas']['pendiente'],
+        'aviso_pendientes': cifras['avisos']['pendientes'],
+        'ultimas_mediciones': cifras['mediciones'],
     }
     return render(request, 'facturacion/home.html', context)
 
 
 def lista_clientes(request):
     """Lista todos los clientes"""
-    clientes = Cliente.objects.all().order_by('nombre')
+    clientes = Cliente.objects.only(
+        'id', 'nombre', 'email', 'telefono', 'fecha_registro', 'activo'
+    ).annotate(direccion_resumen=Substr('direccion', 1, 51))
+    clientes = paginar(request, clientes, ['nombre', 'id'])
     return render(request, 'facturacion/lista_clientes.html', {'clientes': clientes})
 
 
@@ -54,7 +67,7 @@ def detalle_cliente(request, cliente_id):
     cliente = get_object_or_404(Cliente, id=cliente_id)
     mediciones = Medicion.objects.filter(cliente=cliente).order_by('-fecha')[:10]
     boletas = Boleta.objects.filter(cliente=cliente).order_by('-fecha_emision')[:10]
-    avisos = Aviso.objects.filter(cliente=cliente).order_by('-fecha')[:5]
+    avisos = avisos_de_cliente(cliente, 5)
     
     context = {
         'cliente': cliente,
@@ -65,6 +78,24 @@ def detalle_cliente(request, cliente_id):
     return render(request, 'facturacion/detalle_cliente.html', context)
 
 
+def autocompletar_clientes(request):
+    """Clientes que coinciden con lo escrito, para los selectores de cliente"""
+    clientes = busqueda.clientes_por_prefijo(request.GET.get('q', ''))
+    return JsonResponse({
+        'resultados': [{'id': cliente.id, 'texto': str(cliente)} for cliente in clientes]
+    })
+
+
+def mediciones_cliente(request, cliente_id):
+    """Mediciones sin boleta del cliente, para el selector de generar boleta"""
+    return JsonResponse({
+        'resultados': [
+            {'id': medicion.id, 'texto': etiqueta_medicion(medicion)}
+            for medicion in mediciones_sin_facturar(cliente_id)
+        ]
+    })
+
+
 def crear_medicion(request):
     """Crear nueva medición"""
     if request.method == 'POST':
@@ -72,11 +103,51 @@ def crear_medicion(request):
         if form.is_valid():
             medicion = form.save()
             messages.success(request, f'Medición registrada. Consumo: {medicion.consumo_m3} m³')
-            return redirect('detalle_cliente', cliente_id=medicion.cliente.id)
+            return redirect('detalle_cliente', cliente_id=medicion.cliente_id)
     else:
         form = MedicionForm()
     
-    return render(request, 'facturacion/crear_medicion.html', {'form': form})
+    return render(request, 'facturacion/crear_medicion.html', {
+        'form': form,
+        'tarifa': tarifa_vigente(timezone.localdate()),
+    })
+
+
+def _importar(request, importar, plantilla, registros):
+    resultado = None
+    if request.method == 'POST':
+        form = ImportarCSVForm(request.POST, request.FILES)
+        if form.is_valid():
+            # Los bytes inválidos se reemplazan y quedan como error de su fila
+            archivo = io.TextIOWrapper(form.cleaned_data['archivo'].file, encoding='utf-8-sig',
+                                       errors='replace', newline='')
+            try:
+                resultado = importar(archivo, simular=form.cleaned_data['simular'])
+            except ValidationError as e:
+                form.add_error('archivo', e)
+            else:
+                if form.cleaned_data['simular']:
+                    messages.info(request, f"Validación: {resultado['guardadas']} de {resultado['leidas']} filas son válidas.")
+                else:
+                    messages.success(request, f"Se guardaron {resultado['guardadas']} de {resultado['leidas']} {registros}.")
+    else:
+        form = ImportarCSVForm()
+
+    return render(request, plantilla, {
+        'form': form,
+        'resultado': resultado,
+        'errores': resultado['errores'][:importacion.ERRORES_MOSTRADOS] if resultado else [],
+    })
+
+
+def importar_mediciones(request):
+    """Importar mediciones desde un archivo CSV"""
+    return _importar(request, importacion.importar_mediciones, 'facturacion/importar_mediciones.html', 'mediciones')
+
+
+def importar_clientes(request):
+    """Crear o actualizar clientes desde un archivo CSV"""
+    return _importar(request, importacion.importar_clientes, 'facturacion/importar_clientes.html', 'clientes')
 
 
 def generar_boleta(request):
@@ -84,11 +155,9 @@ def generar_boleta(request):
     if request.method == 'POST':
         form = BoletaForm(request.POST)
         if form.is_valid():
-            boleta = form.save(commit=False)
-            boleta.monto_total = boleta.medicion.monto_calculado
-            boleta.save()
+            boleta = form.save()
             messages.success(request, f'Boleta #{boleta.numero_boleta} generada exitosamente.')
-            return redirect('detalle_cliente', cliente_id=boleta.cliente.id)
+            return redirect('detalle_cliente', cliente_id=boleta.cliente_id)
     else:
         form = BoletaForm()
     
@@ -97,153 +166,55 @@ def generar_boleta(request):
 
 def generar_pdf_boleta(request, boleta_id):
     """Generar PDF de boleta"""
-    boleta = get_object_or_404(Boleta, id=boleta_id)
-    
-    # Crear buffer para el PDF
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
-    story = []
-    
-    # Estilos
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=18,
-        spaceAfter=30,
-        alignment=1,  # Centrado
-    )
-    
-    # Título
-    story.append(Paragraph("PRUEBA", title_style))
-    story.append(Paragraph("Sistema de Facturación", styles['Heading2']))
-    story.append(Spacer(1, 20))
+    boleta = get_object_or_404(Boleta.objects.select_related('cliente', 'medicion'), id=boleta_id)
     
-    # Información de la boleta
-    boleta_data = [
-        ['Número de Boleta:', boleta.numero_boleta],
-        ['Fecha de Emisión:', boleta.fecha_emision.strftime('%d/%m/%Y')],
-        ['Fecha de Vencimiento:', boleta.fecha_vencimiento.strftime('%d/%m/%Y')],
-        ['Estado:', boleta.get_estado_display()],
-    ]
-    
-    boleta_table = Table(boleta_data, colWidths=[2*inch, 3*inch])
-    boleta_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-        ('BACKGROUND', (1, 0), (1, -1), colors.beige),
-    ]))
-    
-    story.append(boleta_table)
-    story.append(Spacer(1, 20))
-    
-    # Información del cliente
-    story.append(Paragraph("DATOS DEL CLIENTE", styles['Heading2']))
-    cliente_data = [
-        ['Nombre:', boleta.cliente.nombre],
-        ['Dirección:', boleta.cliente.direccion],
-        ['Email:', boleta.cliente.email],
-        ['Teléfono:', boleta.cliente.telefono or 'No registrado'],
-    ]
-    
-    cliente_table = Table(cliente_data, colWidths=[2*inch, 3*inch])
-    cliente_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-        ('BACKGROUND', (1, 0), (1, -1), colors.beige),
-    ]))
-    
-    story.append(cliente_table)
-    story.append(Spacer(1, 20))
-    
-    # Detalles de la medición
-    story.append(Paragraph("DETALLES DE CONSUMO", styles['Heading2']))
-    medicion_data = [
-        ['Fecha de Medición:', boleta.medicion.fecha.strftime('%d/%m/%Y')],
-        ['Consumo (m³):', f"{boleta.medicion.consumo_m3} m³"],
-        ['Tarifa por m³:', '$500 CLP'],
-        ['Monto Total:', f"${boleta.monto_total:,.2f} CLP"],
-    ]
-    
-    medicion_table = Table(medicion_data, colWidths=[2*inch, 3*inch])
-    medicion_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-        ('BACKGROUND', (1, 0), (1, -1), colors.beige),
-        ('FONTNAME', (3, 3), (3, 3), 'Helvetica-Bold'),
-        ('FONTSIZE', (3, 3), (3, 3), 12),
-    ]))
-    
-    story.append(medicion_table)
-    story.append(Spacer(1, 30))
-    
-    # Pie de página
-    story.append(Paragraph("Gracias por su preferencia", styles['Normal']))
-    story.append(Paragraph("Prueba - Sistema de Facturación", styles['Normal']))
-    
-    # Construir PDF
-    doc.build(story)
-    buffer.seek(0)
-    
-    # Respuesta HTTP
-    response = HttpResponse(buffer.getvalue(), content_type='application/pdf')
+    # Se sirve desde el caché si el documento ya fue generado con estos datos
+    response = HttpResponse(pdf_cache.pdf_boleta(boleta), content_type='application/pdf')
     response['Content-Disposition'] = f'attachment; filename="boleta_{boleta.numero_boleta}.pdf"'
     return response
 
 
-def enviar_boleta_email(request, boleta_id):
-    """Enviar boleta por correo electrónico"""
-    boleta = get_object_or_404(Boleta, id=boleta_id)
+def descargar_zip_boletas(request):
+    """Descargar en un ZIP los PDF de las boletas filtradas"""
+    filtro = FiltroBoletasForm(request.GET)
+    boletas = filtro.filtrar(Boleta.objects.select_related('cliente', 'medicion')).order_by('id')
     
-    try:
-        # Generar PDF
-        buffer = BytesIO()
-        # ... (código de generación de PDF similar al anterior)
-        
-        # Enviar email
-        subject = f'Boleta de Agua - {boleta.numero_boleta}'
-        message = f'''
-        Estimado/a {boleta.cliente.nombre},
-        
-        Adjunto encontrará su boleta de agua correspondiente al período.
-        
-        Detalles:
-        - Número de Boleta: {boleta.numero_boleta}
-        - Fecha de Emisión: {boleta.fecha_emision}
-        - Fecha de Vencimiento: {boleta.fecha_vencimiento}
-        - Monto: ${boleta.monto_total:,.2f} CLP
-        
-        Gracias por su preferencia.
-        
-        Prueba
-        '''
-        
-        send_mail(
-            subject,
-            message,
-            settings.EMAIL_HOST_USER,
-            [boleta.cliente.email],
-            fail_silently=False,
-        )
-        
-        messages.success(request, f'Boleta enviada exitosamente a {boleta.cliente.email}')
-        
-    except Exception as e:
-        messages.error(request, f'Error al enviar el correo: {str(e)}')
-    
-    return redirect('detalle_cliente', cliente_id=boleta.cliente.id)
+    response = StreamingHttpResponse(zip_boletas(boletas), content_type='application/zip')
+    response['Content-Disposition'] = 'attachment; filename="boletas.zip"'
+    return response
+
+
+def _exportar(request, tipo):
+    formato = request.GET.get('formato', 'csv')
+    if formato not in exportacion.FORMATOS:
+        raise Http404('Formato de exportación no disponible')
+    content_type, extension, _ = exportacion.FORMATOS[formato]
+    response = StreamingHttpResponse(exportacion.exportar(tipo, formato, request.GET), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{tipo}_{timezone.localdate():%Y%m%d}.{extension}"'
+    return response
+
+
+def exportar_boletas(request):
+    """Exportar las boletas filtradas a CSV o JSONL"""
+    return _exportar(request, 'boletas')
+
+
+def exportar_mediciones(request):
+    """Exportar las mediciones filtradas a CSV o JSONL"""
+    return _exportar(request, 'mediciones')
+
+
+def exportar_clientes(request):
+    """Exportar los clientes a CSV o JSONL"""
+    return _exportar(request, 'clientes')
+
+
+def enviar_boleta_email(request, boleta_id):
+    """Encolar el envío de la boleta por correo electrónico"""
+    boleta = get_object_or_404(Boleta.objects.select_related('cliente'), id=boleta_id)
+    encolar_boleta(boleta)
+    messages.success(request, f'Boleta en cola para envío a {boleta.cliente.email}')
+    return redirect('detalle_cliente', cliente_id=boleta.cliente_id)
 
 
 def crear_aviso(request):
@@ -253,7 +224,7 @@ def crear_aviso(request):
         if form.is_valid():
             aviso = form.save()
             messages.success(request, 'Aviso creado exitosamente.')
-            return redirect('detalle_cliente', cliente_id=aviso.cliente.id)
+            return redirect('detalle_cliente', cliente_id=aviso.cliente_id)
     else:
         form = AvisoForm()
     
@@ -261,55 +232,66 @@ def crear_aviso(request):
 
 
 def enviar_aviso_email(request, aviso_id):
-    """Enviar aviso por correo electrónico"""
-    aviso = get_object_or_404(Aviso, id=aviso_id)
-    
-    try:
-        subject = f'{aviso.titulo} - Prueba'
-        message = f'''
-        Estimado/a {aviso.cliente.nombre},
-        
-        {aviso.mensaje}
-        
-        Tipo de Aviso: {aviso.get_tipo_aviso_display()}
-        Fecha: {aviso.fecha.strftime('%d/%m/%Y %H:%M')}
-        
-        Gracias por su atención.
-        
-        Prueba
-        '''
-        
-        send_mail(
-            subject,
-            message,
-            settings.EMAIL_HOST_USER,
-            [aviso.cliente.email],
-            fail_silently=False,
-        )
-        
-        # Marcar como enviado
-        aviso.enviado = True
-        aviso.fecha_envio = timezone.now()
-        aviso.save()
-        
-        messages.success(request, f'Aviso enviado exitosamente a {aviso.cliente.email}')
-        
-    except Exception as e:
-        messages.error(request, f'Error al enviar el aviso: {str(e)}')
-    
-    return redirect('detalle_cliente', cliente_id=aviso.cliente.id)
+    """Encolar el envío del aviso por correo electrónico"""
+    aviso = get_object_or_404(Aviso.objects.select_related('cliente'), id=aviso_id)
+    encolar_aviso(aviso)
+    messages.success(request, f'Aviso en cola para envío a {aviso.cliente.email}')
+    return redirect('detalle_cliente', cliente_id=aviso.cliente_id)
 
 
 def lista_boletas(request):
     """Lista todas las boletas"""
-    boletas = Boleta.objects.select_related('cliente').order_by('-fecha_emision')
-    return render(request, 'facturacion/lista_boletas.html', {'boletas': boletas})
+    boletas = Boleta.objects.select_related('cliente').only(
+        'id', 'numero_boleta', 'cliente_id', 'cliente__nombre', 'fecha_emision',
+        'fecha_vencimiento', 'monto_total', 'estado',
+    )
+    filtro = FiltroBoletasForm(request.GET)
+    boletas = paginar(request, filtro.filtrar(boletas), filtro.orden_elegido())
+    return render(request, 'facturacion/lista_boletas.html', {'boletas': boletas, 'filtro': filtro})
 
 
 def lista_avisos(request):
     """Lista todos los avisos"""
-    avisos = Aviso.objects.select_related('cliente').order_by('-fecha')
-    return render(request, 'facturacion/lista_avisos.html', {'avisos': avisos})
+    avisos = Aviso.objects.select_related('cliente').only(
+        'id', 'cliente_id', 'cliente__nombre', 'tipo_aviso', 'titulo', 'fecha', 'enviado', 'fecha_envio',
+    ).annotate(mensaje_resumen=Substr('mensaje', 1, 51))
+    avisos = paginar(request, avisos, ['-fecha', '-id'])
+    avisos_masivos = AvisoMasivo.objects.defer('mensaje').annotate(
+        mensaje_resumen=Substr('mensaje', 1, 51),
+        total_destinatarios=Count('destinatarios'),
+        destinatarios_enviados=Count('destinatarios', filter=Q(destinatarios__enviado=True)),
+    ).order_by('-fecha')[:20]
+    return render(request, 'facturacion/lista_avisos.html', {
+        'avisos': avisos,
+        'avisos_masivos': avisos_masivos,
+    })
+
+
+def crear_aviso_masivo(request):
+    """Crear un aviso para todos los clientes que cumplan un filtro"""
+    if request.method == 'POST':
+        form = AvisoMasivoForm(request.POST)
+        if form.is_valid():
+            aviso, cantidad = registrar_aviso_masivo(
+                form.cleaned_data['tipo_aviso'],
+                form.cleaned_data['titulo'],
+                form.cleaned_data['mensaje'],
+                form.clientes(),
+            )
+            messages.success(request, f'Aviso masivo creado para {cantidad} clientes.')
+            return redirect('lista_avisos')
+    else:
+        form = AvisoMasivoForm()
+    
+    return render(request, 'facturacion/crear_aviso_masivo.html', {'form': form})
+
+
+def enviar_aviso_masivo(request, aviso_masivo_id):
+    """Encolar el envío de un aviso masivo a sus destinatarios pendientes"""
+    aviso = get_object_or_404(AvisoMasivo, id=aviso_masivo_id)
+    encolados = encolar_aviso_masivo(aviso)
+    messages.success(request, f'{encolados} correos en cola para "{aviso.titulo}".')
+    return redirect('lista_avisos')
 
 
 # ===== NUEVAS VISTAS PARA GESTIÓN COMPLETA =====
@@ -334,7 +316,9 @@ def eliminar_cliente(request, cliente_id):
     cliente = get_object_or_404(Cliente, id=cliente_id)
     if request.method == 'POST':
         nombre = cliente.nombre
-        cliente.delete()
+        # Sus boletas y mediciones se descuentan del resumen en un solo paso
+        with transaction.atomic(), resumen.acumulando():
+            cliente.delete()
         messages.success(request, f'Cliente {nombre} eliminado exitosamente.')
         return redirect('lista_clientes')
     
@@ -354,7 +338,10 @@ def toggle_cliente_activo(request, cliente_id):
 
 def lista_mediciones(request):
     """Lista todas las mediciones"""
-    mediciones = Medicion.objects.select_related('cliente').order_by('-fecha')
+    mediciones = Medicion.objects.select_related('cliente').only(
+        'id', 'cliente_id', 'cliente__nombre', 'fecha', 'consumo_m3', 'lectura_anterior', 'lectura_actual',
+    ).annotate(observaciones_resumen=Substr('observaciones', 1, 31))
+    mediciones = paginar(request, mediciones, ['-fecha', '-id'])
     return render(request, 'facturacion/lista_mediciones.html', {'mediciones': mediciones})
 
 
@@ -366,19 +353,24 @@ def editar_medicion(request, medicion_id):
         if form.is_valid():
             form.save()
             messages.success(request, f'Medición actualizada exitosamente.')
-            return redirect('detalle_cliente', cliente_id=medicion.cliente.id)
+            return redirect('detalle_cliente', cliente_id=medicion.cliente_id)
     else:
         form = MedicionForm(instance=medicion)
     
-    return render(request, 'facturacion/editar_medicion.html', {'form': form, 'medicion': medicion})
+    return render(request, 'facturacion/editar_medicion.html', {
+        'form': form,
+        'medicion': medicion,
+        'tarifa': tarifa_vigente(medicion.fecha),
+    })
 
 
 def eliminar_medicion(request, medicion_id):
     """Eliminar una medición"""
-    medicion = get_object_or_404(Medicion, id=medicion_id)
-    cliente_id = medicion.cliente.id
+    medicion = get_object_or_404(Medicion.objects.select_related('cliente'), id=medicion_id)
+    cliente_id = medicion.cliente_id
     if request.method == 'POST':
-        medicion.delete()
+        with transaction.atomic(), resumen.acumulando():
+            medicion.delete()  # y su boleta, si la tiene
         messages.success(request, 'Medición eliminada exitosamente.')
         return redirect('detalle_cliente', cliente_id=cliente_id)
     
@@ -387,22 +379,22 @@ def eliminar_medicion(request, medicion_id):
 
 def cambiar_estado_boleta(request, boleta_id):
     """Cambiar estado de una boleta"""
-    boleta = get_object_or_404(Boleta, id=boleta_id)
+    boleta = get_object_or_404(Boleta.objects.select_related('cliente'), id=boleta_id)
     if request.method == 'POST':
         nuevo_estado = request.POST.get('estado')
         if nuevo_estado in ['pendiente', 'pagada', 'vencida', 'cancelada']:
             boleta.estado = nuevo_estado
             boleta.save()
             messages.success(request, f'Estado de boleta #{boleta.numero_boleta} cambiado a {boleta.get_estado_display()}.')
-        return redirect('detalle_cliente', cliente_id=boleta.cliente.id)
+        return redirect('detalle_cliente', cliente_id=boleta.cliente_id)
     
     return render(request, 'facturacion/cambiar_estado_boleta.html', {'boleta': boleta})
 
 
 def eliminar_boleta(request, boleta_id):
     """Eliminar una boleta"""
-    boleta = get_object_or_404(Boleta, id=boleta_id)
-    cliente_id = boleta.cliente.id
+    boleta = get_object_or_404(Boleta.objects.select_related('cliente'), id=boleta_id)
+    cliente_id = boleta.cliente_id
     if request.method == 'POST':
         numero = boleta.numero_boleta
         boleta.delete()
@@ -420,7 +412,7 @@ def editar_aviso(request, aviso_id):
         if form.is_valid():
             form.save()
             messages.success(request, f'Aviso actualizado exitosamente.')
-            return redirect('detalle_cliente', cliente_id=aviso.cliente.id)
+            return redirect('detalle_cliente', cliente_id=aviso.cliente_id)
     else:
         form = AvisoForm(instance=aviso)
     
@@ -429,8 +421,8 @@ def editar_aviso(request, aviso_id):
 
 def eliminar_aviso(request, aviso_id):
     """Eliminar un aviso"""
-    aviso = get_object_or_404(Aviso, id=aviso_id)
-    cliente_id = aviso.cliente.id
+    aviso = get_object_or_404(Aviso.objects.select_related('cliente'), id=aviso_id)
+    cliente_id = aviso.cliente_id
     if request.method == 'POST':
         aviso.delete()
         messages.success(request, 'Aviso eliminado exitosamente.')
@@ -445,10 +437,13 @@ def buscar(request):
     resultados = {
         'clientes': [],
         'boletas': [],
-        'avisos': []
+        'avisos': [],
+        'avisos_masivos': [],
     }
     
-    if query:
+    if query and busqueda.soportada():
+        resultados = busqueda.buscar(query)
+    elif query:
         resultados['clientes'] = Cliente.objects.filter(
             nombre__icontains=query
         ).order_by('nombre')[:10]
@@ -469,37 +464,61 @@ def buscar(request):
 
 def reportes(request):
     """Página de reportes y estadísticas"""
-    from django.db.models import Sum, Count, Avg
-    from datetime import datetime, timedelta
-    
-    # Estadísticas generales
+    # Se leen los totales precalculados por mes en vez de recorrer boletas y mediciones
+    totales = resumen.totales()
+    cifras = contadores.obtener()
     stats = {
-        'total_clientes': Cliente.objects.filter(activo=True).count(),
-        'total_boletas': Boleta.objects.count(),
-        'boletas_pendientes': Boleta.objects.filter(estado='pendiente').count(),
-        'boletas_pagadas': Boleta.objects.filter(estado='pagada').count(),
-        'boletas_vencidas': Boleta.objects.filter(estado='vencida').count(),
-        'ingresos_totales': Boleta.objects.filter(estado='pagada').aggregate(
-            total=Sum('monto_total')
-        )['total'] or 0,
-        'consumo_promedio': Medicion.objects.aggregate(
-            promedio=Avg('consumo_m3')
-        )['promedio'] or 0,
+        'total_clientes': cifras['clientes']['activos'],
+        'total_boletas': sum(cifras['boletas'].values()),
+        'boletas_pendientes': cifras['boletas']['pendiente'],
+        'boletas_pagadas': cifras['boletas']['pagada'],
+        'boletas_vencidas': cifras['boletas']['vencida'],
+        'ingresos_totales': totales['monto_recaudado'],
+        'consumo_promedio': totales['consumo_m3'] / totales['mediciones'] if totales['mediciones'] else 0,
     }
     
     # Boletas por mes (últimos 6 meses)
-    from django.utils import timezone
-    seis_meses_atras = timezone.now() - timedelta(days=180)
-    boletas_por_mes = Boleta.objects.filter(
-        fecha_emision__gte=seis_meses_atras
-    ).extra(
-        select={'mes': "strftime('%%Y-%%m', fecha_emision)"}
-    ).values('mes').annotate(
-        cantidad=Count('id'),
-        total=Sum('monto_total')
-    ).order_by('mes')
+    seis_meses_atras = timezone.localdate() - timedelta(days=180)
+    boletas_por_mes = [mes for mes in resumen.ultimos_meses(seis_meses_atras) if mes.total_boletas]
     
     return render(request, 'facturacion/reportes.html', {
         'stats': stats,
         'boletas_por_mes': boletas_por_mes
     })
+
+
+def simulador_tarifas(request):
+    """Compara lo facturado en los últimos meses con tarifas candidatas"""
+    resultados = []
+    historial = None
+    if 'escenarios' in request.GET:
+        form = SimuladorTarifasForm(request.GET)
+    else:
+        # Se parte de la tarifa vigente para editarla
+        try:
+            vigente = tarifario().vigente(timezone.localdate())
+            inicial = simulacion.describir('Tarifa vigente', vigente)
+        except ValidationError:
+            inicial = ''
+        form = SimuladorTarifasForm(initial={'escenarios': inicial})
+
+    if form.is_bound and form.is_valid():
+        # El historial queda en memoria: probar otro escenario no vuelve a leerlo
+        historial = simulacion.historial(*simulacion.periodo(form.cleaned_data['meses']))
+        resultados = [historial.simular(nombre, tarifas) for nombre, tarifas in form.cleaned_data['escenarios']]
+
+    return render(request, 'facturacion/simulador_tarifas.html', {
+        'form': form,
+        'historial': historial,
+        'resultados': resultados,
+    })
+
+
+def metricas_prometheus(request):
+    """Métricas por vista en formato Prometheus, para el personal o con el token"""
+    token = getattr(settings, 'METRICAS_TOKEN', None)
+    autorizacion = request.headers.get('Authorization', '')
+    con_token = bool(token) and hmac.compare_digest(autorizacion.encode(), f'Bearer {token}'.encode())
+    if not (con_token or request.user.is_staff):
+        return HttpResponse('No autorizado', status=403)
+    return HttpResponse(metricas.exportar(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,32 @@
+"""
+Widgets de formulario que no cargan tablas completas en cada página.
+"""
+
+from django import forms
+from django.urls import reverse_lazy
+
+from .models import Cliente
+
+
+class ClienteAutocompletar(forms.Select):
+    """
+    Select de clientes que solo renderiza la opción elegida.
+
+    Las demás opciones se piden al endpoint de autocompletado mientras el
+    usuario escribe, por lo que el formulario envía únicamente la clave
+    primaria del cliente.
+    """
+    template_name = 'facturacion/widgets/cliente_autocompletar.html'
+    url = reverse_lazy('autocompletar_clientes')
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context['widget']['url'] = self.url
+        return context
+
+    def optgroups(self, name, value, attrs=None):
+        opciones = [self.create_option(name, '', '---------', not any(value), 0)]
+        ids = [v for v in value if str(v).isdigit()]
+        for indice, cliente in enumerate(Cliente.objects.filter(pk__in=ids).only('id', 'nombre', 'email'), 1):
+            opciones.append(self.create_option(name, cliente.pk, str(cliente), True, indice))
+        return [(None, opciones, 0)]
@@ -132,13 +132,14 @@ def create_sample_data():
             }
         ]
         
+        from facturacion.avisos import registrar_aviso_masivo
+        
         for aviso_data in avisos_data:
-            for cliente in clientes:
-                aviso = Aviso.objects.create(
-                    cliente=cliente,
-                    **aviso_data
-                )
-                print(f"✅ Aviso creado: {aviso.titulo} para {cliente.nombre}")
+            aviso, cantidad = registrar_aviso_masivo(
+                clientes=Cliente.objects.filter(id__in=[cliente.id for cliente in clientes]),
+                **aviso_data
+            )
+            print(f"✅ Aviso masivo creado: {aviso.titulo} para {cantidad} clientes")
         
         print("✅ Datos de muestra creados exitosamente")
         
@@ -14,6 +14,9 @@ else:
     print('ℹ️ Superusuario ya existe')
 "
 
+# Las métricas de la ejecución anterior no se suman a las nuevas
+rm -rf "${METRICAS_DIRECTORIO:-metricas}"
+
 # Iniciar servidor
 echo "🌐 Iniciando servidor..."
 python3 -m gunicorn aguas_del_valle.wsgi --log-file - --bind 0.0.0.0:$PORT